@@ -1,6 +1,15 @@
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from django.conf import settings
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.core.cache.backends.locmem import LocMemCache
 
+from django_statsd.clients import statsd
+
 
 class SimpleDictCache(LocMemCache):
     """A local memory cache that doesn't pickle values.
@@ -50,3 +59,129 @@ class SimpleDictCache(LocMemCache):
         with self._lock.writer():
             self._cache[key] = new_value
         return new_value
+
+
+class LRUCache(object):
+    """A bounded, per-process mapping that evicts the least recently used key.
+
+    Values are stored as-is (no pickling and no expiry). Hits and misses are
+    counted, and also sent to statsd as `<stats_name>.hit` and
+    `<stats_name>.miss` if a `stats_name` is given.
+    """
+    def __init__(self, maxsize, stats_name=None):
+        self.maxsize = maxsize
+        self.stats_name = stats_name
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        if self.stats_name:
+            statsd.incr('{0}.{1}'.format(self.stats_name, 'hit' if hit else 'miss'))
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._cache.pop(key)
+            except KeyError:
+                hit = False
+                value = default
+            else:
+                hit = True
+                self._cache[key] = value
+
+        self._count(hit)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = value
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+fragment_caches = []
+
+
+def cached_fragment(key_func, sources=None, maxsize=1000):
+    """Cache the output of a template helper, e.g. a rendered fragment.
+
+    The output is stored under the key `key_func` returns for the helper's
+    arguments, or not cached at all if it returns None or DEBUG is on, so
+    template changes show up during development. The cache is cleared
+    when any of the objects `sources` returns is replaced by a new one,
+    e.g. when product-details data has been reloaded. Hits and misses are
+    sent to statsd as `fragment_cache.<helper name>.hit` and `.miss`.
+
+    :param key_func: function taking the helper's arguments.
+    :param sources: function returning a tuple of the data the output
+            depends on.
+    :param maxsize: the number of outputs to keep.
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize, stats_name='fragment_cache.' + func.__name__)
+        cache.sources = ()
+        fragment_caches.append(cache)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = None if settings.DEBUG else key_func(*args, **kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+
+            if sources is not None:
+                current = sources()
+                if (len(current) != len(cache.sources) or
+                        any(a is not b for a, b in zip(current, cache.sources))):
+                    cache.clear()
+                    cache.sources = current
+
+            output = cache.get(key)
+            if output is None:
+                output = func(*args, **kwargs)
+                cache.set(key, output)
+
+            return output
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def clear_fragment_caches():
+    """Clear the output of all helpers decorated with cached_fragment."""
+    for cache in fragment_caches:
+        cache.clear()
+
+
+@receiver(setting_changed)
+def reset_fragment_caches(**kwargs):
+    clear_fragment_caches()
@@ -15,9 +15,11 @@ from django.utils.encoding import smart_str, force_text
 
 from . import urlresolvers
 from .templatetags.helpers import urlparams
+from .timing import timed_middleware
 from lib.l10n_utils import translation
 
 
+@timed_middleware('locale')
 class LocaleURLMiddleware(object):
     """
     1. Search for the locale.
@@ -2,14 +2,29 @@ import datetime
 import urllib
 import urlparse
 
+from django.conf import settings
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.utils.encoding import smart_str
 
 from django_jinja import library
 import jinja2
 
-from ..urlresolvers import reverse
+from ..urlresolvers import get_url_prefix, reverse
 from bedrock.base import waffle
+from lib.l10n_utils import translation
+
+
+def fragment_request_key(request):
+    """
+    Return the parts of a request that a rendered fragment depends on.
+
+    For use in the key of a `cached_fragment` helper: the active language,
+    the lang files used for translations, and the prefix of reversed URLs.
+    """
+    prefixer = get_url_prefix()
+    return (translation.get_language(),
+            tuple(getattr(request, 'langfiles', settings.DOTLANG_FILES)),
+            prefixer.fix('') if prefixer else None)
 
 
 @library.global_function
@@ -0,0 +1,66 @@
+from django.test import TestCase
+
+from mock import patch
+
+from bedrock.base.cache import cached_fragment, clear_fragment_caches
+
+
+def key_func(name, skip=False):
+    return None if skip else (name,)
+
+
+class TestCachedFragment(TestCase):
+    def setUp(self):
+        self.data = {}
+        self.calls = []
+
+        @cached_fragment(key_func, sources=lambda: (self.data,))
+        def helper(name, skip=False):
+            self.calls.append(name)
+            return 'Hello, %s' % name
+
+        self.helper = helper
+
+    def test_cached(self):
+        self.assertEqual(self.helper('dude'), 'Hello, dude')
+        self.assertEqual(self.helper('dude'), 'Hello, dude')
+        self.assertEqual(self.helper('walter'), 'Hello, walter')
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.helper.cache.hits, 1)
+        self.assertEqual(self.helper.cache.misses, 2)
+
+    def test_no_key(self):
+        self.helper('dude', skip=True)
+        self.helper('dude', skip=True)
+        self.assertEqual(len(self.calls), 2)
+
+    @patch('django.conf.settings.DEBUG', True)
+    def test_debug(self):
+        self.helper('dude')
+        self.helper('dude')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_sources_replaced(self):
+        self.helper('dude')
+        self.data = {}
+        self.helper('dude')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_clear_fragment_caches(self):
+        self.helper('dude')
+        clear_fragment_caches()
+        self.helper('dude')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_settings_change_clears_cache(self):
+        self.helper('dude')
+        with self.settings(DUDE='abides'):
+            self.helper('dude')
+        self.assertEqual(len(self.calls), 2)
+
+    @patch('bedrock.base.cache.statsd')
+    def test_statsd(self, statsd_mock):
+        self.helper('dude')
+        self.helper('dude')
+        statsd_mock.incr.assert_any_call('fragment_cache.helper.miss')
+        statsd_mock.incr.assert_any_call('fragment_cache.helper.hit')
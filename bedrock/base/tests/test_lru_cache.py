@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from mock import patch
+
+from bedrock.base.cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_get_set(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('dude'))
+        self.assertEqual(cache.get('dude', 'default'), 'default')
+        cache.set('dude', 'abides')
+        self.assertEqual(cache.get('dude'), 'abides')
+        self.assertIn('dude', cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('dude', 'abides')
+        cache.set('walter', 'bowls')
+        cache.get('dude')
+        cache.set('donnie', 'out of his element')
+        self.assertNotIn('walter', cache)
+        self.assertIn('dude', cache)
+        self.assertIn('donnie', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_hit_ratio(self):
+        cache = LRUCache(2)
+        self.assertEqual(cache.hit_ratio, 0.0)
+        cache.set('dude', 'abides')
+        cache.get('dude')
+        cache.get('walter')
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hit_ratio, 0.5)
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(2)
+        cache.set('dude', 'abides')
+        cache.set('walter', 'bowls')
+        cache.delete('dude')
+        self.assertNotIn('dude', cache)
+        cache.get('walter')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
+    @patch('bedrock.base.cache.statsd')
+    def test_statsd(self, statsd_mock):
+        cache = LRUCache(2, stats_name='lebowski')
+        cache.set('dude', 'abides')
+        cache.get('dude')
+        cache.get('walter')
+        statsd_mock.incr.assert_any_call('lebowski.hit')
+        statsd_mock.incr.assert_any_call('lebowski.miss')
+
+    @patch('bedrock.base.cache.statsd')
+    def test_no_statsd(self, statsd_mock):
+        cache = LRUCache(2)
+        cache.get('dude')
+        self.assertFalse(statsd_mock.incr.called)
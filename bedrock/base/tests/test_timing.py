@@ -0,0 +1,83 @@
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
+
+from mock import call, patch
+
+from bedrock.base.timing import (phase, RequestTimer, RequestTimingMiddleware,
+                                 timed_middleware)
+
+
+@timed_middleware('dude')
+class DudeMiddleware(object):
+    def process_request(self, request):
+        request.abides = True
+
+    @staticmethod
+    def process_response(request, response):
+        response['X-Dude'] = 'abides'
+        return response
+
+
+class TestTiming(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.middleware = RequestTimingMiddleware()
+        self.middleware.process_request(self.request)
+
+    def test_phase(self):
+        with phase(self.request, 'bowling'):
+            pass
+
+        with phase(self.request, 'bowling'):
+            pass
+
+        self.assertEqual(list(self.request.timer.phases), ['bowling'])
+
+    def test_phase_no_timer(self):
+        request = RequestFactory().get('/')
+        with phase(request, 'bowling'):
+            pass
+
+        self.assertFalse(hasattr(request, 'timer'))
+
+    def test_phase_exception(self):
+        with self.assertRaises(ValueError):
+            with phase(self.request, 'bowling'):
+                raise ValueError
+
+        self.assertIn('bowling', self.request.timer.phases)
+
+    def test_timed_middleware(self):
+        middleware = DudeMiddleware()
+        middleware.process_request(self.request)
+        response = middleware.process_response(self.request, HttpResponse())
+        self.assertTrue(self.request.abides)
+        self.assertEqual(response['X-Dude'], 'abides')
+        self.assertEqual(list(self.request.timer.phases),
+                         ['middleware.dude.process_request',
+                          'middleware.dude.process_response'])
+
+    def test_header_value(self):
+        timer = RequestTimer()
+        timer.add('middleware.dude.process_request', 1.23)
+        timer.add('render.template', 10)
+        timer.add('render.template', 5)
+        self.assertEqual(timer.header_value(),
+                         'middleware.dude.process_request;dur=1.2, render.template;dur=15.0')
+
+    @override_settings(ENABLE_SERVER_TIMING_HEADER=True)
+    @patch('bedrock.base.timing.statsd')
+    def test_process_response(self, statsd_mock):
+        self.request.timer.add('render.template', 15)
+        response = self.middleware.process_response(self.request, HttpResponse())
+        self.assertEqual(response['Server-Timing'], 'render.template;dur=15.0')
+        statsd_mock.timing.assert_has_calls([call('timing.render.template', 15)])
+
+    @override_settings(ENABLE_SERVER_TIMING_HEADER=False)
+    @patch('bedrock.base.timing.statsd')
+    def test_process_response_no_header(self, statsd_mock):
+        self.request.timer.add('render.template', 15)
+        response = self.middleware.process_response(self.request, HttpResponse())
+        self.assertNotIn('Server-Timing', response)
+        statsd_mock.timing.assert_called_once_with('timing.render.template', 15)
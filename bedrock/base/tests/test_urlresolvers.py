@@ -5,7 +5,8 @@ from django.test import TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 
-from bedrock.base.urlresolvers import reverse, split_path, Prefixer
+from bedrock.base.urlresolvers import (AcceptLanguageNegotiator, accept_language, find_supported,
+                                      get_locale_index, reverse, split_path, Prefixer)
 from mock import patch, Mock
 from nose.tools import eq_, ok_
 
@@ -171,3 +172,70 @@ class TestPrefixer(TestCase):
         request = self.factory.get('/')
         prefixer = Prefixer(request)
         eq_(prefixer.get_best_language('en; q=1,'), None)
+
+
+@override_settings(LANGUAGE_URL_MAP={'en-us': 'en-US', 'de': 'de', 'fr': 'fr'},
+                   CANONICAL_LOCALES={'en': 'en-US'},
+                   PROD_LANGUAGES=('de', 'en-US', 'fr'))
+class TestAcceptLanguageNegotiator(TestCase):
+    def test_negotiate(self):
+        negotiator = AcceptLanguageNegotiator(10)
+        eq_(negotiator.negotiate('fr-FR,de;q=0.5'), (('fr', 'de'), 'fr'))
+        eq_(negotiator.negotiate('en-GB,xx'), (('en-GB', 'xx'), 'en-US'))
+        eq_(negotiator.negotiate('xx'), (('xx',), None))
+        eq_(negotiator.get_languages('pt-pt,de;q=0.3'), ['pt-PT', 'de'])
+        eq_(negotiator.get_best_language('pt-pt,de;q=0.3'), 'de')
+
+    @patch('bedrock.base.urlresolvers.parse_accept_lang_header')
+    def test_cached(self, parse_mock):
+        parse_mock.return_value = [('de', 1.0)]
+        negotiator = AcceptLanguageNegotiator(10)
+        eq_(negotiator.get_best_language('de'), 'de')
+        eq_(negotiator.get_languages('de'), ['de'])
+        eq_(parse_mock.call_count, 1)
+        eq_(negotiator.hit_ratio, 0.5)
+
+    @patch('bedrock.base.urlresolvers.parse_accept_lang_header')
+    def test_settings_change_clears_cache(self, parse_mock):
+        parse_mock.return_value = [('de', 1.0)]
+        eq_(accept_language.get_best_language('the-dude'), 'de')
+        with override_settings(LANGUAGE_URL_MAP={'en-us': 'en-US'}):
+            eq_(accept_language.get_best_language('the-dude'), None)
+        eq_(parse_mock.call_count, 2)
+
+
+@override_settings(LANGUAGE_URL_MAP={'en-us': 'en-US', 'en-gb': 'en-GB', 'es-es': 'es-ES', 'de': 'de'},
+                   CANONICAL_LOCALES={'en': 'en-US'},
+                   SUPPORTED_NONLOCALES=['media'])
+class TestLocaleIndex(TestCase):
+    def test_find_locale(self):
+        index = get_locale_index()
+        eq_(index.find_locale('de'), 'de')
+        eq_(index.find_locale('DE'), 'de')
+        eq_(index.find_locale('en'), 'en-US')
+        eq_(index.find_locale('es'), 'es-ES')
+        eq_(index.find_locale('es-mx'), 'es-ES')
+        eq_(index.find_locale('firefox'), '')
+        eq_(index.find_locale(''), '')
+        for segment in ('de', 'de-AT', 'es-MX', 'en-ZZ', 'firefox'):
+            eq_(index.find_locale(segment) or None, (find_supported(segment) or [None])[0])
+
+    def test_fix_nonlocale_skips_language(self):
+        """Should not negotiate a locale for paths that don't get one."""
+        prefixer = Prefixer(RequestFactory().get('/media/img/dude.png'))
+        with patch.object(prefixer, 'get_language') as get_language:
+            eq_(prefixer.fix('/media/img/dude.png'), '/media/img/dude.png')
+            ok_(not get_language.called)
+
+    def test_settings_change_resets_index(self):
+        index = get_locale_index()
+        ok_(get_locale_index() is index)
+        with override_settings(LANGUAGE_URL_MAP={'fr': 'fr'}):
+            eq_(split_path('/fr/firefox/'), ('fr', 'firefox/'))
+            eq_(split_path('/de/firefox/'), ('', 'de/firefox/'))
+        ok_(get_locale_index() is not index)
+
+    def test_get_languages_returns_copy(self):
+        negotiator = AcceptLanguageNegotiator(10)
+        negotiator.get_languages('de').append('fr')
+        eq_(negotiator.get_languages('de'), ['de'])
@@ -0,0 +1,113 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Timers for the phases of a request: each instrumented middleware and the
+stages of l10n_utils.render.
+
+`RequestTimingMiddleware` puts a `RequestTimer` on the request. Code
+that has the request wraps a phase in `phase(request, name)`, which does
+nothing if the request has no timer (e.g. requests from a RequestFactory).
+"""
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+from django_statsd.clients import statsd
+
+
+MIDDLEWARE_METHODS = ('process_request', 'process_view', 'process_response',
+                      'process_exception')
+
+
+class RequestTimer(object):
+    """Milliseconds spent in each phase of a request, in the order they started."""
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    def add(self, name, ms):
+        # a phase can run more than once per request, e.g. template lookups
+        self.phases[name] = self.phases.get(name, 0) + ms
+
+    def send(self):
+        for name, ms in self.phases.items():
+            statsd.timing('timing.' + name, int(ms))
+
+    def header_value(self):
+        """The phases as the value of a Server-Timing header."""
+        return ', '.join('{0};dur={1:.1f}'.format(name, ms)
+                         for name, ms in self.phases.items())
+
+
+@contextmanager
+def phase(request, name):
+    """Time the block as the phase `name` of the request."""
+    timer = getattr(request, 'timer', None)
+    if timer is None:
+        yield
+        return
+
+    start = time.time()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.time() - start) * 1000)
+
+
+def _timed_method(func, name, request_index):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with phase(args[request_index], name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def timed_middleware(name):
+    """
+    Class decorator that times the middleware methods the class defines as
+    the phases `middleware.<name>.<method>`, e.g.
+    `middleware.locale.process_request`.
+    """
+    def decorator(cls):
+        for method_name in MIDDLEWARE_METHODS:
+            method = cls.__dict__.get(method_name)
+            if method is None:
+                continue
+
+            phase_name = 'middleware.{0}.{1}'.format(name, method_name)
+            if isinstance(method, staticmethod):
+                method = staticmethod(_timed_method(method.__func__, phase_name, 0))
+            else:
+                method = _timed_method(method, phase_name, 1)
+
+            setattr(cls, method_name, method)
+
+        return cls
+
+    return decorator
+
+
+class RequestTimingMiddleware(object):
+    """
+    Send the phase timers of each request to statsd, and list them in a
+    Server-Timing header if ENABLE_SERVER_TIMING_HEADER is set.
+
+    Should come first in MIDDLEWARE_CLASSES so that its process_response
+    runs after every other middleware's.
+    """
+    def process_request(self, request):
+        request.timer = RequestTimer()
+
+    def process_response(self, request, response):
+        timer = getattr(request, 'timer', None)
+        if timer is not None and timer.phases:
+            timer.send()
+            if settings.ENABLE_SERVER_TIMING_HEADER:
+                response['Server-Timing'] = timer.header_value()
+
+        return response
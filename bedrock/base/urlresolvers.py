@@ -1,14 +1,20 @@
+import re
 from threading import local
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.core.urlresolvers import reverse as django_reverse
+from django.dispatch import receiver
 from django.utils.encoding import iri_to_uri
 from django.utils.functional import lazy
 from django.utils.translation.trans_real import parse_accept_lang_header
 
+from bedrock.base.cache import LRUCache
+
 
 # Thread-local storage for URL prefixes. Access with (get|set)_url_prefix.
 _local = local()
+ACCEPT_LANG_RE = re.compile(r'^([A-Za-z]{2,3})(?:-([A-Za-z]{2})(?:-[A-Za-z0-9]+)?)?$')
 
 
 def set_url_prefix(prefix):
@@ -65,6 +71,50 @@ def find_supported(test):
             x.split('-', 1)[0] == test.lower().split('-', 1)[0]]
 
 
+# settings the LocaleIndex and AcceptLanguageNegotiator results depend on.
+# LANGUAGE_URL_MAP is lazy and built from DEV, DEV_LANGUAGES and PROD_LANGUAGES.
+LANGUAGE_SETTINGS = frozenset(['LANGUAGE_URL_MAP', 'CANONICAL_LOCALES', 'DEV', 'DEV_LANGUAGES',
+                               'PROD_LANGUAGES', 'SUPPORTED_NONLOCALES'])
+
+
+class LocaleIndex(object):
+    """
+    The supported locales, indexed for finding the locale in a URL.
+
+    `language_map` is `FULL_LANGUAGE_MAP` evaluated once, and `prefixes`
+    maps each language prefix (e.g. `es`) to the locale `find_supported`
+    would pick for it, so a URL segment is resolved with a dict lookup on
+    the segment or on its prefix.
+    """
+    def __init__(self):
+        self.language_map = _get_language_map()
+        self.prefixes = {}
+        for lang, locale in settings.LANGUAGE_URL_MAP.items():
+            self.prefixes.setdefault(lang.split('-', 1)[0], locale)
+        self.nonlocales = frozenset(settings.SUPPORTED_NONLOCALES)
+
+    def find_locale(self, segment):
+        """Return the supported locale for a URL segment, or ''."""
+        lang = segment.lower()
+        locale = self.language_map.get(lang)
+        if locale is None:
+            locale = self.prefixes.get(lang.split('-', 1)[0], '')
+
+        return locale
+
+
+_locale_index = {}
+
+
+def get_locale_index():
+    """Return an up-to-date LocaleIndex."""
+    index = _locale_index.get('index')
+    if index is None:
+        index = _locale_index['index'] = LocaleIndex()
+
+    return index
+
+
 def split_path(path_):
     """
     Split the requested path into (locale, path).
@@ -76,15 +126,96 @@ def split_path(path_):
     # Use partition instead of split since it always returns 3 parts
     first, _, rest = path.partition('/')
 
-    lang = first.lower()
-    if lang in FULL_LANGUAGE_MAP:
-        return FULL_LANGUAGE_MAP[lang], rest
+    locale = get_locale_index().find_locale(first)
+    if locale:
+        return locale, rest
     else:
-        supported = find_supported(first)
-        if len(supported):
-            return supported[0], rest
-        else:
-            return '', path
+        return '', path
+
+
+class AcceptLanguageNegotiator(object):
+    """
+    Work out the languages and the best supported locale for Accept-Language
+    header values.
+
+    The results for the most recently used header values are kept, since
+    the same few values make up most requests.
+    """
+    def __init__(self, maxsize):
+        self.cache = LRUCache(maxsize, stats_name='accept_language.cache')
+
+    @property
+    def hit_ratio(self):
+        return self.cache.hit_ratio
+
+    def negotiate(self, accept_lang):
+        """
+        Return the languages and the best supported locale for a header value.
+
+        :param accept_lang: value of an Accept-Language header
+        :return: (tuple of language codes, best locale or None)
+        """
+        result = self.cache.get(accept_lang)
+        if result is None:
+            result = self._negotiate(accept_lang)
+            self.cache.set(accept_lang, result)
+
+        return result
+
+    def _negotiate(self, accept_lang):
+        try:
+            parsed = parse_accept_lang_header(accept_lang)
+        except ValueError:  # see https://code.djangoproject.com/ticket/21078
+            parsed = []
+
+        languages = []
+        for lang, priority in parsed:
+            m = ACCEPT_LANG_RE.match(lang)
+
+            if not m:
+                continue
+
+            lang = m.group(1).lower()
+
+            # Check if the shorter code is supported. This covers obsolete long
+            # codes like fr-FR (should match fr) or ja-JP (should match ja)
+            if m.group(2) and lang not in settings.PROD_LANGUAGES:
+                lang += '-' + m.group(2).upper()
+
+            if lang not in languages:
+                languages.append(lang)
+
+        best = None
+        language_map = get_locale_index().language_map
+        for lang, _ in parsed:
+            lang = lang.lower()
+            if lang in language_map:
+                best = language_map[lang]
+                break
+            pre = lang.split('-')[0]
+            if pre in language_map:
+                best = language_map[pre]
+                break
+
+        return tuple(languages), best
+
+    def get_languages(self, accept_lang):
+        """Return the list of language codes in an Accept-Language header value."""
+        return list(self.negotiate(accept_lang)[0])
+
+    def get_best_language(self, accept_lang):
+        """Return the best supported locale for an Accept-Language header value, or None."""
+        return self.negotiate(accept_lang)[1]
+
+
+accept_language = AcceptLanguageNegotiator(1000)
+
+
+@receiver(setting_changed)
+def reset_language_caches(setting, **kwargs):
+    if setting in LANGUAGE_SETTINGS:
+        _locale_index.clear()
+        accept_language.cache.clear()
 
 
 class Prefixer(object):
@@ -101,8 +232,9 @@ class Prefixer(object):
         """
         if 'lang' in self.request.GET:
             lang = self.request.GET['lang'].lower()
-            if lang in FULL_LANGUAGE_MAP:
-                return FULL_LANGUAGE_MAP[lang]
+            language_map = get_locale_index().language_map
+            if lang in language_map:
+                return language_map[lang]
 
         if self.request.META.get('HTTP_ACCEPT_LANGUAGE'):
             best = self.get_best_language(
@@ -113,20 +245,13 @@ class Prefixer(object):
 
     def get_best_language(self, accept_lang):
         """Given an Accept-Language header, return the best-matching language."""
-        ranked = parse_accept_lang_header(accept_lang)
-        for lang, _ in ranked:
-            lang = lang.lower()
-            if lang in FULL_LANGUAGE_MAP:
-                return FULL_LANGUAGE_MAP[lang]
-            pre = lang.split('-')[0]
-            if pre in FULL_LANGUAGE_MAP:
-                return FULL_LANGUAGE_MAP[pre]
+        return accept_language.get_best_language(accept_lang)
 
     def fix(self, path):
         path = path.lstrip('/')
         url_parts = [self.request.META['SCRIPT_NAME']]
 
-        if path.partition('/')[0] not in settings.SUPPORTED_NONLOCALES:
+        if path.partition('/')[0] not in get_locale_index().nonlocales:
             locale = self.locale if self.locale else self.get_language()
             url_parts.append(locale)
 
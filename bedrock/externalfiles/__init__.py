@@ -3,6 +3,8 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import logging
+from collections import OrderedDict
+from functools import wraps
 from os.path import basename
 from time import mktime
 try:
@@ -13,13 +15,31 @@ except ImportError:
 from django.conf import settings
 from django.core.cache import caches
 from django.utils.http import http_date
+from django.utils.module_loading import import_string
 
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 from bedrock.externalfiles.models import ExternalFile as EFModel
 
 
 log = logging.getLogger(__name__)
+DEFAULT_CLASS = 'bedrock.externalfiles.ExternalFile'
+# seconds to wait for the server to respond, unless the file sets a 'timeout'
+DEFAULT_TIMEOUT = 30
+
+
+def parsed_property(func):
+    """
+    Like `property`, but the value is kept in the process until the file's
+    `last_modified` changes. The value is shared, so don't modify it.
+    """
+    @wraps(func)
+    def getter(self):
+        return self.get_parsed(func.__name__, lambda: func(self))
+
+    return property(getter)
 
 
 class ExternalFile(object):
@@ -33,7 +53,10 @@ class ExternalFile(object):
         self.file_id = file_id
         self.url = fileinfo['url']
         self.name = fileinfo.get('name', basename(self.url))
+        self.timeout = fileinfo.get('timeout', DEFAULT_TIMEOUT)
         self.cache_key = 'externalfile:{}'.format(self.file_id)
+        # parsed representations of the content: name -> (last_modified, value)
+        self._parsed = {}
 
     @property
     def file_object(self):
@@ -60,6 +83,20 @@ class ExternalFile(object):
 
         return None
 
+    def get_parsed(self, name, parse):
+        """
+        Return the value of `parse()` for the current version of the file,
+        only calling it again once the file has been updated.
+        """
+        version = self.last_modified
+        cached = self._parsed.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        value = parse()
+        self._parsed[name] = (version, value)
+        return value
+
     @property
     def last_modified_http(self):
         """
@@ -107,20 +144,28 @@ class ExternalFile(object):
     def readlines(self):
         return StringIO(self.read()).readlines()
 
-    def update(self, force=False):
-        log.info('Updating {0}.'.format(self.name))
+    def request_headers(self, force=False):
+        """Return the headers for requesting the file, conditional unless `force`."""
         headers = {}
         if not force:
             if self.last_modified:
                 headers['if-modified-since'] = self.last_modified_http
 
-        resp = requests.get(self.url, headers=headers, verify=True)
-        content = self.validate_resp(resp)
+        return headers
 
-        if content is None:
-            # up-to-date
-            return None
+    def fetch(self, headers, session=None):
+        """
+        Download and validate the file. Doesn't use the DB, so it's safe to call
+        from other threads.
+        :param session: requests.Session to use, if any
+        :return: str or None if up-to-date
+        :raises: ValueError, requests.RequestException
+        """
+        session = session or requests
+        resp = session.get(self.url, headers=headers, verify=True, timeout=self.timeout)
+        return self.validate_resp(resp)
 
+    def save(self, content):
         fo = self.file_object
         if fo:
             fo.content = content
@@ -129,7 +174,72 @@ class ExternalFile(object):
             EFModel.objects.create(name=self.file_id, content=content)
 
         log.info('Successfully updated {0}.'.format(self.name))
+
+    def update(self, force=False, session=None):
+        log.info('Updating {0}.'.format(self.name))
+        content = self.fetch(self.request_headers(force), session)
+
+        if content is None:
+            # up-to-date
+            return None
+
+        self.save(content)
         return True
 
     def clear_cache(self):
         self._cache.delete(self.cache_key)
+        self._parsed.clear()
+
+
+def get_external_file(file_id):
+    """Return the ExternalFile, or the subclass set as its 'type', for `file_id`."""
+    try:
+        fileinfo = settings.EXTERNAL_FILES[file_id]
+    except KeyError:
+        raise ValueError('No external file with the {0} ID.'.format(file_id))
+
+    return import_string(fileinfo.get('type', DEFAULT_CLASS))(file_id)
+
+
+def update_files(file_ids, force=False, workers=4):
+    """
+    Update the files, downloading up to `workers` of them at once over a
+    shared pool of connections. The downloaded files are saved from the
+    calling thread.
+
+    :return: OrderedDict of file ID -> True if updated, None if up-to-date,
+             or the exception raised while updating it.
+    """
+    files = [get_external_file(file_id) for file_id in file_ids]
+    results = OrderedDict()
+    if not files:
+        return results
+
+    workers = max(1, min(workers, len(files)))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    with ThreadPoolExecutor(workers) as executor:
+        futures = []
+        for ef in files:
+            log.info('Updating {0}.'.format(ef.name))
+            futures.append(executor.submit(ef.fetch, ef.request_headers(force), session))
+
+        for ef, future in zip(files, futures):
+            try:
+                content = future.result()
+                if content is None:
+                    result = None
+                else:
+                    ef.save(content)
+                    result = True
+            except Exception as e:
+                log.warning('Error updating {0}: {1}'.format(ef.name, e))
+                result = e
+
+            results[ef.file_id] = result
+
+    session.close()
+    return results
@@ -2,10 +2,8 @@ from optparse import make_option
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.utils.module_loading import import_by_path
 
-
-DEFAULT_CLASS = 'bedrock.externalfiles.ExternalFile'
+from bedrock.externalfiles import update_files
 
 
 class Command(BaseCommand):
@@ -26,30 +24,41 @@ class Command(BaseCommand):
                     action='store_true',
                     dest='status',
                     default=False,
-                    help='Print only a final status to stdout. Mostly for scripts.')
+                    help='Print only a final status to stdout. Mostly for scripts.'),
+        make_option('--workers',
+                    type='int',
+                    dest='workers',
+                    default=4,
+                    help='Number of files to download at once. Default: 4.'),
     )
 
     def handle(self, *args, **options):
         file_ids = args or settings.EXTERNAL_FILES.keys()
         updated = False
+        failed = []
 
         def printout(msg, ending=None):
             if not (options['quiet'] or options['status']):
                 self.stdout.write(msg, ending=ending)
 
         for fid in file_ids:
-            try:
-                finfo = settings.EXTERNAL_FILES[fid]
-            except KeyError:
+            if fid not in settings.EXTERNAL_FILES:
                 raise CommandError('No external file configuration for ' + fid)
-            klass = import_by_path(finfo.get('type', DEFAULT_CLASS))
+
+        results = update_files(file_ids, options['force'], options['workers'])
+        for fid, result in results.items():
             printout('updating {0}... '.format(fid), ending='')
-            result = klass(fid).update(options['force'])
             if result is None:
                 printout('already up-to-date')
-            else:
+            elif result is True:
                 updated = True
                 printout('done')
+            else:
+                failed.append(fid)
+                printout('failed: {0}'.format(result))
+
+        if failed:
+            raise CommandError('Error updating ' + ', '.join(failed))
 
         if options['status']:
             if updated:
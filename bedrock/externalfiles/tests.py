@@ -2,9 +2,15 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
-from datetime import datetime
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from datetime import datetime, timedelta
+from threading import Thread
 
 from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
 from django.utils import timezone
 
 from mock import Mock, patch, PropertyMock
@@ -118,3 +124,104 @@ class TestExternalFile(TestCase):
             ef.validate_resp(response)
 
         self.assertTrue(str(e.exception).startswith('Unknown error'))
+
+    def test_get_parsed(self):
+        """Should only parse the content again once the file is updated."""
+        EFModel.objects.create(name='test', content='test')
+        ef = externalfiles.ExternalFile('test')
+        parse = Mock(side_effect=lambda: ef.read().upper())
+        self.assertEqual(ef.get_parsed('upper', parse), 'TEST')
+        self.assertEqual(ef.get_parsed('upper', parse), 'TEST')
+        self.assertEqual(parse.call_count, 1)
+
+        # another process updated the file
+        EFModel.objects.filter(name='test').update(
+            content='dude', last_modified=timezone.now() + timedelta(minutes=1))
+        ef._cache.delete(ef.cache_key)
+        self.assertEqual(ef.get_parsed('upper', parse), 'DUDE')
+        self.assertEqual(parse.call_count, 2)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /dude.txt, /slow.txt and 404s, with If-Modified-Since support."""
+    def do_GET(self):
+        if self.path == '/slow.txt':
+            time.sleep(0.5)
+
+        if self.path not in ('/dude.txt', '/slow.txt'):
+            self.send_response(404)
+            self.end_headers()
+        elif self.headers.get('if-modified-since'):
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.end_headers()
+            self.wfile.write('The Dude abides.')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestUpdateFiles(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super(TestUpdateFiles, cls).setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls.thread = Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        base_url = 'http://127.0.0.1:{0}/'.format(cls.server.server_port)
+        cls.files = {
+            'dude': {'url': base_url + 'dude.txt'},
+            'slow': {'url': base_url + 'slow.txt', 'timeout': 0.1},
+            'missing': {'url': base_url + 'missing.txt'},
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super(TestUpdateFiles, cls).tearDownClass()
+
+    def setUp(self):
+        self.settings_override = override_settings(EXTERNAL_FILES=self.files)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        for file_id in self.files:
+            externalfiles.ExternalFile(file_id).clear_cache()
+
+        self.settings_override.disable()
+
+    def test_update_files(self):
+        """Should update files concurrently and report each one's result."""
+        results = externalfiles.update_files(['dude', 'slow', 'missing'])
+        self.assertEqual(list(results), ['dude', 'slow', 'missing'])
+        self.assertIs(results['dude'], True)
+        self.assertIsInstance(results['slow'], requests.Timeout)
+        self.assertIsInstance(results['missing'], ValueError)
+        self.assertEqual(EFModel.objects.get(name='dude').content, 'The Dude abides.')
+        self.assertFalse(EFModel.objects.filter(name__in=['slow', 'missing']).exists())
+
+    def test_update_files_not_modified(self):
+        """Should send If-Modified-Since and leave up-to-date files alone."""
+        externalfiles.update_files(['dude'])
+        externalfiles.ExternalFile('dude').clear_cache()
+        results = externalfiles.update_files(['dude'])
+        self.assertIsNone(results['dude'])
+
+        results = externalfiles.update_files(['dude'], force=True)
+        self.assertIs(results['dude'], True)
+
+    def test_command(self):
+        """Should update the other files and then fail for the broken ones."""
+        with self.assertRaisesMessage(CommandError, 'Error updating missing'):
+            call_command('update_externalfiles', 'dude', 'missing', quiet=True)
+
+        self.assertTrue(EFModel.objects.filter(name='dude').exists())
+
+    def test_command_unknown_file(self):
+        with self.assertRaises(CommandError):
+            call_command('update_externalfiles', 'walter', quiet=True)
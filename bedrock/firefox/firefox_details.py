@@ -1,24 +1,143 @@
 import re
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from operator import itemgetter
 from urllib import urlencode
 
 from django.conf import settings
+from django.utils.functional import Promise
 from product_details import ProductDetails
+
+from bedrock.base.cache import LRUCache
 from lib.l10n_utils.dotlang import _lazy as _
 
 
+class FrozenDict(dict):
+    """A dict that can't be changed after it's created."""
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('FrozenDict can not be modified')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+
+def freeze(data):
+    """Return an immutable copy of JSON data: dicts become FrozenDicts and lists tuples."""
+    if isinstance(data, dict):
+        return FrozenDict((key, freeze(value)) for key, value in data.iteritems())
+    if isinstance(data, list):
+        return tuple(freeze(value) for value in data)
+    return data
+
+
+def split_query(query):
+    """Return the lowercase words of a search query for locale names."""
+    return re.split(r',|,?\s+', query.strip().lower())
+
+
+class BuildListing(object):
+    """
+    The builds of a product for a channel and version, in listing order,
+    with an index of their locale names for searching.
+
+    A search word is matched against the English and native names once and
+    the matching builds are kept, so filtering by a query is a lookup per
+    word. Names that are translated on use are matched on every search.
+    """
+    def __init__(self, builds):
+        self.builds = freeze(builds)
+        self.names = []
+        self.lazy_names = []
+        for i, build in enumerate(self.builds):
+            names = (build['name_en'], build['name_native'])
+            if any(isinstance(name, Promise) for name in names):
+                self.lazy_names.append((i, names))
+            else:
+                self.names.append((i, names[0].lower(), names[1].lower()))
+        self.word_index = LRUCache(1000)
+
+    def _find(self, word):
+        matches = self.word_index.get(word)
+        if matches is None:
+            matches = frozenset(i for i, name_en, name_native in self.names
+                                if word in name_en or word in name_native)
+            self.word_index.set(word, matches)
+
+        return matches
+
+    def filter(self, query=None):
+        """
+        Return the builds with locale names matching all the words of a query.
+
+        :param query: a string to match against native or english locale name
+        :return: list
+        """
+        if query is None:
+            return list(self.builds)
+
+        words = set(split_query(query))
+        matches = set.intersection(*[set(self._find(word)) for word in words])
+        for i, names in self.lazy_names:
+            names = [unicode(name).lower() for name in names]
+            if all(word in names[0] or word in names[1] for word in words):
+                matches.add(i)
+
+        return [build for i, build in enumerate(self.builds) if i in matches]
+
+
 # TODO: port this to django-mozilla-product-details
 class _ProductDetails(ProductDetails):
     bouncer_url = 'https://download.mozilla.org/'
 
-    def _matches_query(self, info, query):
-        words = re.split(r',|,?\s+', query.strip().lower())
-        return all((word in info['name_en'].lower() or
-                    word in info['name_native'].lower()) for word in words)
+    # names of the product-details data the snapshot is built from
+    snapshot_data = ()
+    _snapshot = None
+    _snapshot_sources = ()
+
+    def snapshot(self):
+        """
+        Return an immutable snapshot of the product-details data.
+
+        The snapshot is built by the subclass's `_build_snapshot` from the
+        `snapshot_data`, and built again only when product-details data has
+        been reloaded, which gives new data objects. The query methods read
+        from it instead of the shared data.
+        """
+        sources = tuple(getattr(self, name) for name in self.snapshot_data)
+        snapshot = self._snapshot
+        # missing data is a new empty dict each time
+        if (snapshot is None or
+                any(a is not b and (a or b) for a, b in zip(sources, self._snapshot_sources))):
+            snapshot = self._snapshot = self._build_snapshot(*sources)
+            self._snapshot_sources = sources
+
+        return snapshot
+
+
+class _BuildListingMixin(object):
+    """
+    Searchable listings of the builds of a product, for /firefox/all/.
+
+    The class provides `_get_listing_builds(snapshot, kind, channel)` and
+    `_get_filtered_builds(builds, channel, version)`, and its snapshot a
+    `listings` dict.
+    """
+    def _get_build_listing(self, kind, channel, version):
+        """
+        Return the BuildListing of the full or test builds for a channel and version.
+
+        The listing is made once per snapshot.
+        """
+        snapshot = self.snapshot()
+        key = (kind, channel, version)
+        listing = snapshot.listings.get(key)
+        if listing is None:
+            builds = self._get_listing_builds(snapshot, kind, channel)
+            listing = snapshot.listings[key] = BuildListing(
+                self._get_filtered_builds(builds, channel, version))
+
+        return listing
 
 
-class FirefoxDesktop(_ProductDetails):
+class FirefoxDesktop(_BuildListingMixin, _ProductDetails):
     download_base_url_transition = '/firefox/new/?scene=2'
     nightly_url_base = ('https://archive.mozilla.org/pub/firefox/nightly/'
                         'latest-mozilla-central')
@@ -60,8 +179,48 @@ class FirefoxDesktop(_ProductDetails):
         'release': 'LATEST_FIREFOX_VERSION',
     }
 
+    # 64-bit builds are listed under the name of the 32-bit build
+    platform_aliases = {
+        'Windows 64-bit': 'Windows',
+        'Linux 64-bit': 'Linux',
+    }
+
+    snapshot_data = ('firefox_versions', 'firefox_primary_builds',
+                     'firefox_beta_builds', 'languages')
+    Snapshot = namedtuple('FirefoxDesktopSnapshot',
+                          snapshot_data + ('latest_builds', 'listings'))
+
     def __init__(self, **kwargs):
         super(FirefoxDesktop, self).__init__(**kwargs)
+        self._download_builds = LRUCache(1000)
+        self._download_builds_sources = ()
+
+    def _build_snapshot(self, *data):
+        # the latest builds and listings are added when first needed
+        return self.Snapshot(*map(freeze, data), latest_builds={}, listings={})
+
+    def _get_latest_builds(self, snapshot, channel):
+        """Return the builds of the latest version of a channel by locale,
+        with the 64-bit aliases added."""
+        version = snapshot.firefox_versions.get(self.version_map[channel])
+        channel_builds = {}
+        # primary builds take precedence over beta builds
+        for builds in (snapshot.firefox_beta_builds, snapshot.firefox_primary_builds):
+            for locale, locale_builds in builds.iteritems():
+                if version not in locale_builds:
+                    continue
+
+                platforms = dict(locale_builds[version])
+                for alias, label in self.platform_aliases.iteritems():
+                    if label in platforms:
+                        platforms[alias] = platforms[label]
+
+                channel_builds[locale] = (version, FrozenDict(platforms))
+
+        return FrozenDict(channel_builds)
+
+    def _get_download_builds_sources(self):
+        return self.snapshot(), settings.STUB_INSTALLER_LOCALES
 
     def platforms(self, channel='release'):
         platforms = self.platform_labels.copy()
@@ -70,10 +229,7 @@ class FirefoxDesktop(_ProductDetails):
 
     def latest_version(self, channel='release'):
         version = self.version_map.get(channel, 'LATEST_FIREFOX_VERSION')
-        try:
-            return self.firefox_versions[version]
-        except KeyError:
-            return None
+        return self.snapshot().firefox_versions.get(version)
 
     def latest_major_version(self, channel):
         """Return latest major version as an int."""
@@ -112,49 +268,125 @@ class FirefoxDesktop(_ProductDetails):
 
         :param locale: locale string of the build
         :param channel: channel of the build: release, beta, or aurora
-        :return: dict or None
+        :return: (version, FrozenDict of platforms) or None
+        """
+        if channel not in self.version_map:
+            channel = 'release'
+
+        snapshot = self.snapshot()
+        channel_builds = snapshot.latest_builds.get(channel)
+        if channel_builds is None:
+            channel_builds = snapshot.latest_builds[channel] = self._get_latest_builds(
+                snapshot, channel)
+
+        return channel_builds.get(locale)
+
+    def get_download_builds(self, channel, locale, force_direct=False,
+                            force_full_installer=False, force_funnelcake=False,
+                            funnelcake_id=None):
         """
-        all_builds = (self.firefox_primary_builds,
-                      self.firefox_beta_builds)
-        version = self.latest_version(channel)
-
-        for builds in all_builds:
-            if locale in builds and version in builds[locale]:
-                _builds = builds[locale][version]
-                # Append 64-bit builds
-                if 'Windows' in _builds:
-                    _builds['Windows 64-bit'] = _builds['Windows']
-                if 'Linux' in _builds:
-                    _builds['Linux 64-bit'] = _builds['Linux']
-                return version, _builds
-
-    def _get_filtered_builds(self, builds, channel, version=None, query=None):
+        Return the desktop builds for a download button.
+
+        The result for each combination of arguments is computed once for
+        the current product-details data.
+
+        :param channel: one of self.version_map.keys().
+        :param locale: locale of the build. en-US is used instead if the
+                locale has no build.
+        :return: (locale, version, tuple of dicts with the 'os', 'os_pretty',
+                'download_link' and 'download_link_direct' of each platform)
+        """
+        sources = self._get_download_builds_sources()
+        if (len(sources) != len(self._download_builds_sources) or
+                any(a is not b for a, b in zip(sources, self._download_builds_sources))):
+            self._download_builds.clear()
+            self._download_builds_sources = sources
+
+        key = (channel, locale, force_direct, force_full_installer, force_funnelcake,
+               funnelcake_id)
+        download_builds = self._download_builds.get(key)
+        if download_builds is None:
+            download_builds = self._get_download_builds(*key)
+            self._download_builds.set(key, download_builds)
+
+        return download_builds
+
+    def _get_download_builds(self, channel, locale, force_direct, force_full_installer,
+                             force_funnelcake, funnelcake_id):
+        l_version = self.latest_builds(locale, channel)
+        if l_version:
+            version, platforms = l_version
+        else:
+            locale = 'en-US'
+            version, platforms = self.latest_builds('en-US', channel)
+
+        builds = []
+        for plat_os, plat_os_pretty in self.platform_labels.iteritems():
+            # Fallback to en-US if this plat_os/version isn't available
+            # for the current locale
+            _locale = locale if plat_os_pretty in platforms else 'en-US'
+
+            # And generate all the info
+            download_link = self.get_download_url(
+                channel, version, plat_os, _locale,
+                force_direct=force_direct,
+                force_full_installer=force_full_installer,
+                force_funnelcake=force_funnelcake,
+                funnelcake_id=funnelcake_id,
+            )
+
+            # If download_link_direct is False the data-direct-link attr
+            # will not be output, and the JS won't attempt the IE popup.
+            if force_direct:
+                # no need to run get_download_url again with the same args
+                download_link_direct = False
+            else:
+                download_link_direct = self.get_download_url(
+                    channel, version, plat_os, _locale,
+                    force_direct=True,
+                    force_full_installer=force_full_installer,
+                    force_funnelcake=force_funnelcake,
+                    funnelcake_id=funnelcake_id,
+                )
+                if download_link_direct == download_link:
+                    download_link_direct = False
+
+            builds.append({'os': plat_os,
+                           'os_pretty': plat_os_pretty,
+                           'download_link': download_link,
+                           'download_link_direct': download_link_direct})
+
+        return locale, version, tuple(builds)
+
+    def _get_listing_builds(self, snapshot, kind, channel):
+        if kind == 'test':
+            return snapshot.firefox_beta_builds
+
+        return snapshot.firefox_primary_builds
+
+    def _get_filtered_builds(self, builds, channel, version=None):
         """
         Get a list of builds, sorted by english locale name, for a specific
         Firefox version.
         :param builds: a build dict from the JSON
         :param channel: one of self.version_map.keys().
         :param version: a firefox version. one of self.latest_versions.
-        :param query: a string to match against native or english locale name
         :return: list
         """
         version = version or self.latest_version(channel)
+        languages = self.snapshot().languages
         f_builds = []
         for locale, build in builds.iteritems():
-            if locale not in self.languages or not build.get(version):
+            if locale not in languages or not build.get(version):
                 continue
 
             build_info = {
                 'locale': locale,
-                'name_en': self.languages[locale]['English'],
-                'name_native': self.languages[locale]['native'],
+                'name_en': languages[locale]['English'],
+                'name_native': languages[locale]['native'],
                 'platforms': {},
             }
 
-            # only include builds that match a search query
-            if query is not None and not self._matches_query(build_info, query):
-                continue
-
             for platform, label in self.platform_labels.iteritems():
                 build_info['platforms'][platform] = {
                     'download_url': self.get_download_url(channel, version,
@@ -174,8 +406,8 @@ class FirefoxDesktop(_ProductDetails):
         :param query: a string to match against native or english locale name
         :return: list
         """
-        return self._get_filtered_builds(self.firefox_primary_builds,
-                                         channel, version, query)
+        version = version or self.latest_version(channel)
+        return self._get_build_listing('full', channel, version).filter(query)
 
     def get_filtered_test_builds(self, channel, version=None, query=None):
         """
@@ -185,8 +417,8 @@ class FirefoxDesktop(_ProductDetails):
         :param query: a string to match against native or english locale name
         :return: list
         """
-        return self._get_filtered_builds(self.firefox_beta_builds,
-                                         channel, version, query)
+        version = version or self.latest_version(channel)
+        return self._get_build_listing('test', channel, version).filter(query)
 
     def get_download_url(self, channel, version, platform, locale,
                          force_direct=False, force_full_installer=False,
@@ -279,7 +511,7 @@ class FirefoxDesktop(_ProductDetails):
                 return self.download_base_url_transition
 
 
-class FirefoxAndroid(_ProductDetails):
+class FirefoxAndroid(_BuildListingMixin, _ProductDetails):
     # Architecture names defined in bouncer and these human-readable names
     platform_labels = OrderedDict([
         ('android', _('Modern devices\n(Android 4.0+)')),
@@ -314,6 +546,9 @@ class FirefoxAndroid(_ProductDetails):
         'release': 'fennec-latest',
     }
 
+    snapshot_data = ('mobile_details', 'languages')
+    Snapshot = namedtuple('FirefoxAndroidSnapshot', snapshot_data + ('listings',))
+
     store_url = settings.GOOGLE_PLAY_FIREFOX_LINK
     aurora_url_base = ('https://archive.mozilla.org/pub/mobile/nightly/'
                        'latest-mozilla-aurora-android')
@@ -339,21 +574,27 @@ class FirefoxAndroid(_ProductDetails):
 
         return platforms.items()
 
+    def _build_snapshot(self, *data):
+        return self.Snapshot(*map(freeze, data), listings={})
+
+    def _get_listing_builds(self, snapshot, kind, channel):
+        return snapshot.mobile_details[self.build_map.get(channel, 'builds')]
+
     def latest_version(self, channel):
         version = self.version_map.get(channel, 'version')
-        return self.mobile_details[version]
+        return self.snapshot().mobile_details[version]
 
-    def _get_filtered_builds(self, builds, channel, version=None, query=None):
+    def _get_filtered_builds(self, builds, channel, version=None):
         """
         Get a list of builds, sorted by english locale name, for a specific
         Firefox version.
         :param builds: a build dict from the JSON
         :param channel: one of self.version_map.keys().
         :param version: a firefox version. one of self.latest_versions.
-        :param query: a string to match against native or english locale name
         :return: list
         """
         product = self.product_map.get(channel, 'fennec-latest')
+        languages = self.snapshot().languages
         locales = [build['locale']['code'] for build in builds]
         f_builds = []
 
@@ -365,9 +606,9 @@ class FirefoxAndroid(_ProductDetails):
             if locale == 'multi':
                 name_en = _('Multi-locale')
                 name_native = ''
-            elif locale in self.languages:
-                name_en = self.languages[locale]['English']
-                name_native = self.languages[locale]['native']
+            elif locale in languages:
+                name_en = languages[locale]['English']
+                name_native = languages[locale]['native']
             else:
                 continue
 
@@ -378,10 +619,6 @@ class FirefoxAndroid(_ProductDetails):
                 'platforms': {},
             }
 
-            # only include builds that match a search query
-            if query is not None and not self._matches_query(build_info, query):
-                continue
-
             for arch, label in self.platform_labels.iteritems():
                 # x86 builds are not localized yet
                 if arch == 'android-x86' and locale not in ['multi', 'en-US']:
@@ -410,9 +647,7 @@ class FirefoxAndroid(_ProductDetails):
         :param query: a string to match against native or english locale name
         :return: list
         """
-        builds = self.mobile_details[self.build_map.get(channel, 'builds')]
-
-        return self._get_filtered_builds(builds, channel, version, query)
+        return self._get_build_listing('full', channel, version).filter(query)
 
     def get_filtered_test_builds(self, channel, version=None, query=None):
         # We don't have pre-release builds yet
@@ -435,11 +670,17 @@ class FirefoxIOS(_ProductDetails):
         'beta': 'ios_beta_version',
         'release': 'ios_version',
     }
+    snapshot_data = ('mobile_details',)
+    Snapshot = namedtuple('FirefoxIOSSnapshot', snapshot_data)
+
     store_url = settings.APPLE_APPSTORE_FIREFOX_LINK
 
+    def _build_snapshot(self, *data):
+        return self.Snapshot(*map(freeze, data))
+
     def latest_version(self, channel):
         version = self.version_map.get(channel, 'ios_version')
-        return self.mobile_details[version]
+        return self.snapshot().mobile_details[version]
 
     def get_download_url(self, channel='release', locale='en-US'):
         countries = settings.APPLE_APPSTORE_COUNTRY_MAP
@@ -10,8 +10,11 @@ from django_jinja import library
 
 from bedrock.firefox.models import FirefoxOSFeedLink
 from bedrock.firefox.firefox_details import firefox_desktop, firefox_android, firefox_ios
+from bedrock.base.cache import cached_fragment
+from bedrock.base.templatetags.helpers import fragment_request_key
 from bedrock.base.urlresolvers import reverse
 from lib.l10n_utils import get_locale
+from lib.l10n_utils.dotlang import get_activation_matrix
 
 
 def android_builds(channel, builds=None):
@@ -56,8 +59,25 @@ def ios_builds(channel, builds=None):
     return builds
 
 
+def fragment_sources():
+    """Return the lang file and product-details data the Firefox fragments use.
+
+    They are replaced by new ones when the lang files or product-details
+    data are reloaded.
+    """
+    return (get_activation_matrix(),
+            firefox_desktop.snapshot(),
+            firefox_android.snapshot(),
+            firefox_ios.snapshot())
+
+
+def firefox_footer_links_key(ctx, channel='release', platform='all'):
+    return (channel, platform) + fragment_request_key(ctx['request'])
+
+
 @library.global_function
 @jinja2.contextfunction
+@cached_fragment(firefox_footer_links_key, sources=fragment_sources)
 def firefox_footer_links(ctx, channel='release', platform='all'):
     """ Outputs Firefox footer links
     :param ctx: context from calling template.
@@ -90,8 +110,20 @@ def firefox_footer_links(ctx, channel='release', platform='all'):
     return jinja2.Markup(html)
 
 
+def download_firefox_key(ctx, channel='release', platform='all',
+                         dom_id=None, locale=None, force_direct=False,
+                         force_full_installer=False, force_funnelcake=False,
+                         alt_copy=None, button_color='green'):
+    request = ctx['request']
+    return ((channel, platform, dom_id, locale or get_locale(request),
+             force_direct, force_full_installer, force_funnelcake,
+             ctx.get('funnelcake_id', False), alt_copy, button_color) +
+            fragment_request_key(request))
+
+
 @library.global_function
 @jinja2.contextfunction
+@cached_fragment(download_firefox_key, sources=fragment_sources)
 def download_firefox(ctx, channel='release', platform='all',
                      dom_id=None, locale=None, force_direct=False,
                      force_full_installer=False, force_funnelcake=False,
@@ -120,51 +152,16 @@ def download_firefox(ctx, channel='release', platform='all',
     dom_id = dom_id or 'download-button-%s-%s' % (
         'desktop' if platform == 'all' else platform, channel)
 
-    l_version = firefox_desktop.latest_builds(locale, channel)
-    if l_version:
-        version, platforms = l_version
-    else:
-        locale = 'en-US'
-        version, platforms = firefox_desktop.latest_builds('en-US', channel)
+    locale, version, desktop_builds = firefox_desktop.get_download_builds(
+        channel, locale,
+        force_direct=force_direct,
+        force_full_installer=force_full_installer,
+        force_funnelcake=force_funnelcake,
+        funnelcake_id=funnelcake_id,
+    )
 
     # Gather data about the build for each platform
-    builds = []
-
-    if show_desktop:
-        for plat_os, plat_os_pretty in firefox_desktop.platform_labels.iteritems():
-            # Fallback to en-US if this plat_os/version isn't available
-            # for the current locale
-            _locale = locale if plat_os_pretty in platforms else 'en-US'
-
-            # And generate all the info
-            download_link = firefox_desktop.get_download_url(
-                channel, version, plat_os, _locale,
-                force_direct=force_direct,
-                force_full_installer=force_full_installer,
-                force_funnelcake=force_funnelcake,
-                funnelcake_id=funnelcake_id,
-            )
-
-            # If download_link_direct is False the data-direct-link attr
-            # will not be output, and the JS won't attempt the IE popup.
-            if force_direct:
-                # no need to run get_download_url again with the same args
-                download_link_direct = False
-            else:
-                download_link_direct = firefox_desktop.get_download_url(
-                    channel, version, plat_os, _locale,
-                    force_direct=True,
-                    force_full_installer=force_full_installer,
-                    force_funnelcake=force_funnelcake,
-                    funnelcake_id=funnelcake_id,
-                )
-                if download_link_direct == download_link:
-                    download_link_direct = False
-
-            builds.append({'os': plat_os,
-                           'os_pretty': plat_os_pretty,
-                           'download_link': download_link,
-                           'download_link_direct': download_link_direct})
+    builds = list(desktop_builds) if show_desktop else []
 
     if show_android:
         builds = android_builds(channel, builds)
@@ -175,7 +172,7 @@ def download_firefox(ctx, channel='release', platform='all',
                        'download_link': firefox_ios.get_download_url()})
 
     # Get the native name for current locale
-    langs = firefox_desktop.languages
+    langs = firefox_desktop.snapshot().languages
     locale_name = langs[locale]['native'] if locale in langs else locale
 
     # Firefox 49+ requires OS X 10.9 Mavericks and later
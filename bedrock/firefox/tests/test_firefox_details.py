@@ -39,6 +39,7 @@ GOOD_BUILDS = {
         '24.0': GOOD_PLATS,  # prev release
     }
 }
+GOOD_PLATS_64 = dict(GOOD_PLATS, **{'Windows 64-bit': {}, 'Linux 64-bit': {}})
 GOOD_VERSIONS = {
     'LATEST_FIREFOX_VERSION': '25.0',
     'LATEST_FIREFOX_DEVEL_VERSION': '26.0b2',
@@ -55,7 +56,28 @@ class TestLatestBuilds(TestCase):
         """Should return platforms if localized build does exist."""
         result = firefox_desktop.latest_builds('de', 'release')
         self.assertEqual(result[0], '25.0')
-        self.assertIs(result[1], GOOD_PLATS)
+        self.assertEqual(result[1], GOOD_PLATS_64)
+
+    def test_latest_builds_snapshot(self):
+        """Should not change the product-details data and be immutable."""
+        platforms = firefox_desktop.latest_builds('de', 'release')[1]
+        self.assertNotIn('Windows 64-bit', GOOD_PLATS)
+        self.assertIs(firefox_desktop.latest_builds('de', 'release')[1], platforms)
+        with self.assertRaises(TypeError):
+            platforms['Windows'] = {}
+
+    def test_snapshot_rebuilt(self):
+        """Should build a new snapshot when the data is reloaded."""
+        snapshot = firefox_desktop.snapshot()
+        self.assertIs(firefox_desktop.snapshot(), snapshot)
+        with patch.object(firefox_desktop, 'firefox_versions', dict(GOOD_VERSIONS)):
+            self.assertIsNot(firefox_desktop.snapshot(), snapshot)
+
+    def test_snapshot_missing_data(self):
+        """Missing data is a new empty dict each time and shouldn't rebuild the snapshot."""
+        snapshot = firefox_desktop.snapshot()
+        with patch.object(firefox_desktop, 'firefox_beta_builds', {}):
+            self.assertIs(firefox_desktop.snapshot(), snapshot)
 
     def test_latest_builds_is_none_if_no_build(self):
         """Should return None if the localized build for the channel doesn't exist."""
@@ -66,11 +88,44 @@ class TestLatestBuilds(TestCase):
         """Should work with all channels."""
         result = firefox_desktop.latest_builds('en-US', 'beta')
         self.assertEqual(result[0], '26.0b2')
-        self.assertIs(result[1], GOOD_PLATS)
+        self.assertEqual(result[1], GOOD_PLATS_64)
 
         result = firefox_desktop.latest_builds('en-US', 'alpha')
         self.assertEqual(result[0], '27.0a1')
-        self.assertIs(result[1], GOOD_PLATS)
+        self.assertEqual(result[1], GOOD_PLATS_64)
+
+    def test_get_download_builds(self):
+        """Should return the download links for each platform."""
+        locale, version, builds = firefox_desktop.get_download_builds('release', 'de')
+        eq_(locale, 'de')
+        eq_(version, '25.0')
+        eq_([build['os'] for build in builds], firefox_desktop.platform_labels.keys())
+        eq_(builds[0]['download_link'], firefox_desktop.get_download_url(
+            'release', '25.0', 'win', 'de'))
+        eq_(builds[0]['download_link_direct'], firefox_desktop.get_download_url(
+            'release', '25.0', 'win', 'de', force_direct=True))
+
+    def test_get_download_builds_force_direct(self):
+        """Should not add a separate direct link if the link is already direct."""
+        builds = firefox_desktop.get_download_builds('release', 'de', force_direct=True)[2]
+        ok_(all(build['download_link_direct'] is False for build in builds))
+
+    def test_get_download_builds_fallback(self):
+        """Should use en-US if there is no build for the locale."""
+        locale, version, builds = firefox_desktop.get_download_builds('release', 'fr')
+        eq_(locale, 'en-US')
+        eq_(version, '25.0')
+
+    def test_get_download_builds_cached(self):
+        """Should only work out the links again after the data changes."""
+        builds = firefox_desktop.get_download_builds('beta', 'en-US')
+        self.assertIs(firefox_desktop.get_download_builds('beta', 'en-US'), builds)
+        ok_(firefox_desktop.get_download_builds('beta', 'en-US', force_direct=True) is not builds)
+
+        with patch.object(firefox_desktop, 'firefox_versions', dict(GOOD_VERSIONS)):
+            new_builds = firefox_desktop.get_download_builds('beta', 'en-US')
+            ok_(new_builds is not builds)
+            eq_(new_builds, builds)
 
 
 class TestFirefoxDesktop(TestCase):
@@ -245,6 +300,20 @@ class TestFirefoxDesktop(TestCase):
         eq_(len(builds), 1)
         eq_(builds[0]['name_en'], 'French')
 
+    def test_filtered_builds_listing_cached(self):
+        """The listing should only be built once and searched with its index."""
+        builds = firefox_desktop.get_filtered_full_builds('release')
+        with patch.object(firefox_desktop, 'get_download_url') as get_download_url:
+            eq_(firefox_desktop.get_filtered_full_builds('release'), builds)
+            eq_(len(firefox_desktop.get_filtered_full_builds('release', None, 'ujara')), 1)
+            ok_(not get_download_url.called)
+
+        listing = firefox_desktop._get_build_listing(
+            'full', 'release', firefox_desktop.latest_version('release'))
+        ok_('ujara' in listing.word_index)
+        eq_(len(firefox_desktop.get_filtered_full_builds('release', None, 'ujara, gu')), 1)
+        eq_(firefox_desktop.get_filtered_full_builds('release', None, 'ujara dude'), [])
+
     def test_windows64_build(self):
         # Aurora
         builds = firefox_desktop.get_filtered_full_builds('alpha')
@@ -368,6 +437,20 @@ class TestFirefoxAndroid(TestCase):
         platforms = [key for (key, value) in firefox_android.platforms('alpha')]
         eq_(platforms, ['android', 'android-api-9', 'android-x86'])
 
+    @patch.object(firefox_android, 'mobile_details',
+                  dict(version='22.0.1', builds=[{'locale': {'code': 'de'}},
+                                                 {'locale': {'code': 'fr'}}]))
+    @patch.object(firefox_android, 'languages',
+                  {'de': {'English': 'German', 'native': 'Deutsch'},
+                   'fr': {'English': 'French', 'native': u'Fran\xe7ais'}})
+    def test_filter_builds_by_locale_name(self):
+        """The multi-locale build should be found by its translated name."""
+        builds = firefox_android.get_filtered_full_builds('release', None, 'multi')
+        eq_([build['locale'] for build in builds], ['multi'])
+
+        builds = firefox_android.get_filtered_full_builds('release', None, 'german')
+        eq_([build['locale'] for build in builds], ['de'])
+
 
 @patch.object(firefox_ios._storage, 'data',
               Mock(return_value=dict(ios_version='5.0', ios_beta_version='6.0')))
@@ -242,6 +242,33 @@ class TestDownloadButtons(TestCase):
         eq_(list.length, 1)
         eq_(pq(list[0]).attr('class'), 'os_ios')
 
+    def test_cached(self):
+        """The button should only be rendered again if its inputs change."""
+        rf = RequestFactory()
+        get_request = rf.get('/fake')
+        get_request.locale = 'de'
+        cache = helpers.download_firefox.cache
+        cache.clear()
+        html = render("{{ download_firefox() }}", {'request': get_request})
+        eq_(render("{{ download_firefox() }}", {'request': get_request}), html)
+        eq_(cache.hits, 1)
+
+        get_request.locale = 'fr'
+        render("{{ download_firefox() }}", {'request': get_request})
+        eq_(cache.misses, 2)
+
+        get_request.locale = 'de'
+        with patch.object(helpers.firefox_desktop, 'firefox_versions',
+                          dict(helpers.firefox_desktop.firefox_versions)):
+            eq_(render("{{ download_firefox() }}", {'request': get_request}), html)
+            eq_(cache.hits, 0)
+
+        # the lang files were reloaded
+        render("{{ download_firefox() }}", {'request': get_request})
+        with patch.object(helpers, 'get_activation_matrix', return_value=object()):
+            eq_(render("{{ download_firefox() }}", {'request': get_request}), html)
+            eq_(cache.hits, 0)
+
 
 class TestFirefoxURL(TestCase):
     rf = RequestFactory()
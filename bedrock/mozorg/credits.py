@@ -6,8 +6,7 @@ import csv
 from collections import OrderedDict
 from operator import itemgetter
 
-
-from bedrock.externalfiles import ExternalFile
+from bedrock.externalfiles import ExternalFile, parsed_property
 
 
 class CreditsFile(ExternalFile):
@@ -21,7 +20,7 @@ class CreditsFile(ExternalFile):
 
         return content
 
-    @property
+    @parsed_property
     def ordered(self):
         """
         Returns an OrderedDict of sorted lists of names by first letter of sortkey.
@@ -39,7 +38,7 @@ class CreditsFile(ExternalFile):
 
         return ordered_names
 
-    @property
+    @parsed_property
     def rows(self):
         """
         Returns a list of lists sorted by the sortkey column.
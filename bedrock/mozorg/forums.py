@@ -5,7 +5,7 @@
 import re
 from collections import OrderedDict
 
-from bedrock.externalfiles import ExternalFile
+from bedrock.externalfiles import ExternalFile, parsed_property
 
 
 class ForumsFile(ExternalFile):
@@ -25,7 +25,7 @@ class ForumsFile(ExternalFile):
 
         return content
 
-    @property
+    @parsed_property
     def ordered(self):
         return self._parse(self.readlines())
 
@@ -51,6 +51,11 @@ class PageNode(object):
         self.template = template
         self.parent = None
 
+        # Set when the tree is frozen by PageRoot.freeze().
+        self.position = None
+        self.frozen_root = None
+        self._page = None
+
         self.children = children or ()
         for child in self.children:
             child.parent = self
@@ -61,13 +66,18 @@ class PageNode(object):
         The full url path for this node, including the paths of its parent
         nodes.
         """
+        if self.frozen_root:
+            return self.frozen_root.full_paths[self.position]
+
         return '/'.join([node.path for node in self.breadcrumbs
                          if node.path is not None])
 
     @property
     def page(self):
         """The page for this node, which is a RegexURLPattern."""
-        if self.template:
+        if self._page is not None:
+            return self._page
+        elif self.template:
             return page(self.full_path, self.template, node_root=self.root,
                         node=self)
         else:
@@ -89,6 +99,9 @@ class PageNode(object):
         """
         A list of nodes that form a path from the tree root to the current node.
         """
+        if self.frozen_root:
+            return self.frozen_root.node_breadcrumbs[self.position]
+
         path = list(self.path_to_root)
         path.reverse()
         return path
@@ -96,6 +109,9 @@ class PageNode(object):
     @property
     def root(self):
         """The root of the tree that this node is in."""
+        if self.frozen_root:
+            return self.frozen_root
+
         root = list(self.path_to_root)[-1]
         if not isinstance(root, PageRoot):
             raise ValueError('Root node is not a PageRoot object.')
@@ -106,11 +122,17 @@ class PageNode(object):
         """
         The previous node with a page in a pre-order traversal of the tree.
         """
+        if self.frozen_root:
+            return self.frozen_root.previous_nodes[self.position]
+
         return self.root.get_previous_node(self)
 
     @property
     def next(self):
         """The next node with a page in a pre-order traversal of the tree."""
+        if self.frozen_root:
+            return self.frozen_root.next_nodes[self.position]
+
         return self.root.get_next_node(self)
 
     @property
@@ -166,7 +188,53 @@ class PageRoot(PageNode):
                 return node
         return None
 
+    def freeze(self):
+        """
+        Work out the full path, breadcrumbs, previous and next node and page
+        of every node once.
+
+        They are kept in lists indexed by the pre-order position of the node,
+        so looking them up while rendering pages doesn't walk the tree. The
+        tree must not be changed afterwards.
+        """
+        self.full_paths = []
+        self.node_breadcrumbs = []
+        for position, node in enumerate(self.preordered_nodes):
+            # parents come before their children in a pre-order traversal
+            if node.parent is None:
+                breadcrumbs = (node,)
+            else:
+                breadcrumbs = self.node_breadcrumbs[node.parent.position] + (node,)
+            self.node_breadcrumbs.append(breadcrumbs)
+            self.full_paths.append('/'.join([n.path for n in breadcrumbs
+                                             if n.path is not None]))
+            node.position = position
+
+        self.previous_nodes = []
+        previous = None
+        for node in self.preordered_nodes:
+            self.previous_nodes.append(previous)
+            if node.template:
+                previous = node
+
+        self.next_nodes = []
+        next = None
+        for node in reversed(self.preordered_nodes):
+            self.next_nodes.append(next)
+            if node.template:
+                next = node
+        self.next_nodes.reverse()
+
+        for node in self.preordered_nodes:
+            node.frozen_root = self
+            node._page = node.page
+
     def as_urlpatterns(self):
-        """Return a urlconf for this PageRoot and its children."""
+        """
+        Return a urlconf for this PageRoot and its children.
+
+        Freezes the tree first.
+        """
+        self.freeze()
         return patterns('', *[node.page for node in self.preordered_nodes if
                               node.template])
@@ -11,7 +11,10 @@ from django.core.exceptions import MiddlewareNotUsed
 
 from django_statsd.middleware import GraphiteRequestTimingMiddleware
 
+from bedrock.base.timing import timed_middleware
 
+
+@timed_middleware('cache')
 class CacheMiddleware(object):
 
     def process_response(self, request, response):
@@ -62,6 +65,7 @@ class HostnameMiddleware(object):
         return response
 
 
+@timed_middleware('vary_nocache')
 class VaryNoCacheMiddleware(object):
     def __init__(self):
         if not settings.ENABLE_VARY_NOCACHE_MIDDLEWARE:
@@ -26,6 +26,7 @@ import bleach
 import jinja2
 from django_jinja import library
 
+from bedrock.base.cache import cached_fragment
 from bedrock.base.urlresolvers import reverse
 from bedrock.base.templatetags.helpers import static, url
 from bedrock.firefox.firefox_details import firefox_ios
@@ -82,8 +83,13 @@ def l10n_img_file_name(ctx, url):
     return path.join('img', 'l10n', locale, url)
 
 
+def l10n_img_key(ctx, url):
+    return url, getattr(ctx['request'], 'locale', None)
+
+
 @library.global_function
 @jinja2.contextfunction
+@cached_fragment(l10n_img_key, maxsize=5000)
 def l10n_img(ctx, url):
     """Output the url to a localized image.
 
@@ -83,3 +83,10 @@ class TestCredits(TestCase):
         good_names['L'] = ['Bunny Lebowski', 'Jeffrey Lebowski', 'Maude Lebowski']
         good_names['S'] = ['Walter Sobchak']
         self.assertEqual(self.credits_file.ordered, good_names)
+
+    def test_credits_ordered_parsed_once(self):
+        """Should keep the sorted names until the file changes."""
+        self.credits_file.readlines = Mock(return_value=['The Dude,Dude'])
+        ordered = self.credits_file.ordered
+        self.assertIs(self.credits_file.ordered, ordered)
+        self.assertEqual(self.credits_file.readlines.call_count, 1)
@@ -228,3 +228,36 @@ class TestPageRoot(TestCase):
         ok_('child2' in args)
         ok_('root' in args)
         ok_('parent' not in args)
+
+    @patch('bedrock.mozorg.hierarchy.page')
+    def test_freeze(self, page):
+        """
+        A frozen tree should give the same navigation without walking the tree,
+        and only make each node's page once.
+        """
+        page.side_effect = lambda path, template, **kwargs: template
+        child1 = PageNode('', path='one', template='test1.html')
+        child2 = PageNode('', path='two', template='test2.html')
+        child3 = PageNode('', path='three', template='test3.html')
+        empty = PageNode('', path='empty', children=[child2])
+        root = PageRoot('', path='root', template='root.html',
+                        children=[child1, empty, child3])
+        nodes = root.preordered_nodes
+        expected = [(node.full_path, list(node.breadcrumbs), node.previous, node.next)
+                    for node in nodes]
+
+        root.freeze()
+        with patch.object(root, 'get_previous_node') as get_previous_node, \
+                patch.object(root, 'get_next_node') as get_next_node:
+            eq_([(node.full_path, list(node.breadcrumbs), node.previous, node.next)
+                 for node in nodes], expected)
+            ok_(not get_previous_node.called)
+            ok_(not get_next_node.called)
+
+        eq_(child2.full_path, 'root/empty/two')
+        eq_(child2.root, root)
+        ok_(child2.breadcrumbs is child2.breadcrumbs)
+        eq_(page.call_count, 4)
+        eq_(child2.page, 'test2.html')
+        eq_(empty.page, None)
+        eq_(page.call_count, 4)
@@ -6,6 +6,7 @@
 
 import os
 
+from django.http import HttpResponse, HttpResponseRedirect
 from django.test import RequestFactory
 from django.test.utils import override_settings
 
@@ -13,7 +14,7 @@ from mock import ANY, patch
 from nose.tools import ok_, eq_
 
 from bedrock.mozorg.tests import TestCase
-from bedrock.mozorg.util import get_fb_like_locale, get_tweets, page
+from bedrock.mozorg.util import get_fb_like_locale, get_tweets, page, PageCache
 
 
 ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_files')
@@ -119,3 +120,80 @@ class TestPageUtil(TestCase):
         url = page('lebowski/urban_achievers', 'lebowski/achievers.html',
                    url_name='proud.we.are.of.all.of.them')
         eq_(url.name, 'proud.we.are.of.all.of.them')
+
+
+@patch('bedrock.mozorg.util.l10n_utils')
+class TestPageCache(TestCase):
+    def setUp(self):
+        self.rf = RequestFactory()
+
+    def get(self, url, path='/de/dude/', locale='de', **kwargs):
+        request = self.rf.get(path, **kwargs)
+        request.locale = locale
+        return url.callback(request)
+
+    def test_cached_per_locale(self, l10n_mock):
+        """The page should only be rendered once for each locale."""
+        l10n_mock.render.return_value = HttpResponse('abides', content_type='text/plain')
+        url = page('dude', 'dude.html', cache=True)
+        response = self.get(url)
+        eq_(response.content, 'abides')
+        response = self.get(url)
+        eq_(response.content, 'abides')
+        eq_(response['Content-Type'], 'text/plain')
+        eq_(l10n_mock.render.call_count, 1)
+
+        self.get(url, path='/fr/dude/', locale='fr')
+        eq_(l10n_mock.render.call_count, 2)
+
+        # funnelcake is always included
+        self.get(url, data={'f': '42'})
+        eq_(l10n_mock.render.call_count, 3)
+
+    def test_vary(self, l10n_mock):
+        """The page should be rendered again for other header and param values."""
+        l10n_mock.render.return_value = HttpResponse('abides')
+        url = page('dude', 'dude.html',
+                   cache=PageCache(headers=['User-Agent'], params=['v']))
+        self.get(url, HTTP_USER_AGENT='Firefox')
+        self.get(url, HTTP_USER_AGENT='Firefox', data={'other': '1'})
+        eq_(l10n_mock.render.call_count, 1)
+        self.get(url, HTTP_USER_AGENT='Chrome')
+        self.get(url, HTTP_USER_AGENT='Firefox', data={'v': '2'})
+        eq_(l10n_mock.render.call_count, 3)
+
+    def test_not_cached(self, l10n_mock):
+        """Redirects and uncached pages should be rendered each time."""
+        l10n_mock.render.return_value = HttpResponseRedirect('/en-US/dude/')
+        url = page('dude', 'dude.html', cache=True)
+        self.get(url)
+        self.get(url)
+        eq_(l10n_mock.render.call_count, 2)
+
+        l10n_mock.render.return_value = HttpResponse('abides')
+        url = page('dude', 'dude.html')
+        self.get(url)
+        self.get(url)
+        eq_(l10n_mock.render.call_count, 4)
+
+    def test_invalidated(self, l10n_mock):
+        """The cache should be emptied when lang files are reloaded or settings change."""
+        l10n_mock.render.return_value = HttpResponse('abides')
+        url = page('dude', 'dude.html', cache=True)
+        self.get(url)
+        with patch('bedrock.mozorg.util.get_activation_matrix', return_value=object()):
+            self.get(url)
+        eq_(l10n_mock.render.call_count, 2)
+
+        self.get(url)
+        with self.settings(DUDE='abides'):
+            self.get(url)
+        eq_(l10n_mock.render.call_count, 4)
+
+    @patch('django.conf.settings.DEBUG', True)
+    def test_debug(self, l10n_mock):
+        l10n_mock.render.return_value = HttpResponse('abides')
+        url = page('dude', 'dude.html', cache=True)
+        self.get(url)
+        self.get(url)
+        eq_(l10n_mock.render.call_count, 2)
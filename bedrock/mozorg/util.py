@@ -7,6 +7,8 @@ import os
 
 from django.conf import settings
 from django.conf.urls import url
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import HttpResponse
 from django.shortcuts import render as django_render
 from django.views.decorators.csrf import csrf_exempt
@@ -14,6 +16,10 @@ from django.views.decorators.csrf import csrf_exempt
 import tweepy
 import commonware.log
 from lib import l10n_utils
+from lib.l10n_utils.dotlang import get_activation_matrix
+
+from bedrock.base.cache import LRUCache
+from bedrock.firefox.firefox_details import firefox_android, firefox_desktop, firefox_ios
 
 try:
     import newrelic.agent
@@ -34,7 +40,91 @@ class HttpResponseJSON(HttpResponse):
             self['Access-Control-Allow-Origin'] = '*'
 
 
-def page(name, tmpl, decorators=None, url_name=None, **kwargs):
+page_caches = []
+
+
+class PageCache(object):
+    """
+    A cache of the rendered responses of a page() view.
+
+    Responses are kept for each locale and path, and for each value of the
+    given request headers and query parameters. The `f` (funnelcake)
+    parameter is always included because every page's context uses it.
+
+    Only successful responses to GET and HEAD requests are kept. The view
+    response is cached before middleware and the page's decorators see it,
+    so the cache can't tell if they go on to set cookies or vary it per
+    user. Only use it for pages whose output depends on nothing but the
+    locale, headers and parameters, e.g. no CSRF tokens, sessions or
+    cookies. The cache is emptied when the lang files are reloaded,
+    product-details data is reloaded, or a setting changes. DEBUG skips it
+    so template changes show up.
+
+    :param headers: names of request headers the response depends on.
+    :param params: names of query parameters the response depends on.
+    :param maxsize: number of responses to keep.
+    """
+    def __init__(self, headers=(), params=(), maxsize=100):
+        self.headers = tuple('HTTP_' + header.upper().replace('-', '_')
+                             for header in headers)
+        self.params = tuple(sorted(set(params) | {'f'}))
+        self.maxsize = maxsize
+        self.responses = None
+        self.sources = ()
+        page_caches.append(self)
+
+    def bind(self, url_name):
+        """Set up the cache for the page called url_name."""
+        self.responses = LRUCache(self.maxsize, stats_name='page_cache.' + url_name)
+
+    def get_sources(self):
+        # the lang file data and product-details data the page was rendered with
+        return (get_activation_matrix(), firefox_desktop.snapshot(),
+                firefox_android.snapshot(), firefox_ios.snapshot())
+
+    def get_key(self, request):
+        return ((getattr(request, 'locale', None), request.path) +
+                tuple(request.META.get(header) for header in self.headers) +
+                tuple(request.GET.get(param) for param in self.params))
+
+    def get_response(self, request, view):
+        """Return the response of view for the request, from the cache if possible."""
+        if settings.DEBUG or request.method not in ('GET', 'HEAD'):
+            return view(request)
+
+        sources = self.get_sources()
+        if any(a is not b for a, b in zip(sources, self.sources)):
+            self.responses.clear()
+        self.sources = sources
+
+        key = self.get_key(request)
+        cached = self.responses.get(key)
+        if cached is not None:
+            content, status, headers = cached
+            response = HttpResponse(content, status=status)
+            for header, value in headers:
+                response[header] = value
+            return response
+
+        response = view(request)
+        if response.status_code == 200 and not response.streaming:
+            self.responses.set(key, (response.content, response.status_code,
+                                     response.items()))
+
+        return response
+
+    def clear(self):
+        if self.responses is not None:
+            self.responses.clear()
+
+
+@receiver(setting_changed)
+def reset_page_caches(**kwargs):
+    for cache in page_caches:
+        cache.clear()
+
+
+def page(name, tmpl, decorators=None, url_name=None, cache=None, **kwargs):
     """
     Define a bedrock page.
 
@@ -51,6 +141,8 @@ def page(name, tmpl, decorators=None, url_name=None, **kwargs):
         be applied to the view.
     @param url_name: The value to use as the URL name, default is to coerce
         the template path into a name as described above.
+    @param cache: True or a PageCache to keep the rendered responses, which
+        vary only by locale by default. Each page needs its own PageCache.
     @param kwargs: Any additional arguments are passed to l10n_utils.render
         after the request and the template name.
     """
@@ -61,6 +153,21 @@ def page(name, tmpl, decorators=None, url_name=None, **kwargs):
         (base, ext) = os.path.splitext(tmpl)
         url_name = base.replace('/', '.')
 
+    if cache is True:
+        cache = PageCache()
+    if cache:
+        cache.bind(url_name)
+
+    def _render(request):
+        kwargs.setdefault('urlname', url_name)
+
+        # skip l10n if path exempt
+        name_prefix = request.path_info.split('/', 2)[1]
+        if name_prefix in settings.SUPPORTED_NONLOCALES:
+            return django_render(request, tmpl, kwargs)
+
+        return l10n_utils.render(request, tmpl, kwargs)
+
     # we don't have a caching backend yet, so no csrf (it's just a
     # newsletter form anyway)
     @csrf_exempt
@@ -69,14 +176,11 @@ def page(name, tmpl, decorators=None, url_name=None, **kwargs):
             # Name this in New Relic to differentiate pages
             newrelic.agent.set_transaction_name(
                 'mozorg.util.page:' + url_name.replace('.', '_'))
-        kwargs.setdefault('urlname', url_name)
 
-        # skip l10n if path exempt
-        name_prefix = request.path_info.split('/', 2)[1]
-        if name_prefix in settings.SUPPORTED_NONLOCALES:
-            return django_render(request, tmpl, kwargs)
+        if cache:
+            return cache.get_response(request, _render)
 
-        return l10n_utils.render(request, tmpl, kwargs)
+        return _render(request)
 
     # This is for graphite so that we can differentiate pages
     _view.page_name = url_name
@@ -15,12 +15,13 @@ from product_details import product_details
 from bedrock.mozorg.forms import (FORMATS, EmailInput, PrivacyWidget,
                                   SideRadios, strip_parenthetical)
 from bedrock.newsletter import utils
-from lib.l10n_utils.dotlang import _, _lazy
+from lib.l10n_utils.dotlang import module_translator
 
 
 _newsletters_re = re.compile(r'^[\w,-]+$')
 
 LANG_FILES = ['mozorg/newsletters']
+_, _lazy = module_translator(globals())
 
 
 def validate_newsletters(newsletters):
@@ -0,0 +1,158 @@
+from __future__ import division
+
+import random
+import sys
+import time
+from importlib import import_module
+from os import path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import RegexURLResolver, Resolver404
+from django.test.client import RequestFactory
+
+from bedrock.redirects.middleware import RedirectsMiddleware
+from bedrock.redirects.util import get_resolver, redirectpatterns
+
+
+MAP_MODULES = ['map_301', 'map_410', 'map_globalconf', 'map_htaccess']
+# paths that bedrock serves itself, so they don't redirect
+MISS_PATHS = [
+    '', 'firefox/', 'firefox/new/', 'firefox/desktop/', 'firefox/android/', 'firefox/ios/',
+    'firefox/features/', 'firefox/channel/desktop/', 'about/', 'about/manifesto/',
+    'about/history/', 'contribute/', 'mission/', 'privacy/', 'newsletter/', 'security/',
+    'security/advisories/', 'plugincheck/', 'teach/', 'internet-health/',
+]
+
+
+def request_headers(headers):
+    return {'HTTP_' + name.upper().replace('-', '_'): value
+            for name, value in (headers or {}).items()}
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = int(round(percent / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def count_evaluated(resolver, path_info):
+    """Return the number of patterns `resolver` runs to resolve `path_info`."""
+    new_path = path_info[1:]
+    if hasattr(resolver, 'candidate_patterns'):
+        patterns = resolver.candidate_patterns(new_path)
+    else:
+        patterns = resolver.url_patterns
+
+    for count, pattern in enumerate(patterns, 1):
+        try:
+            if pattern.resolve(new_path):
+                return count
+        except Resolver404:
+            pass
+
+    return len(patterns)
+
+
+class Command(BaseCommand):
+    help = ('Replay the redirect test maps and a synthetic workload of non-redirecting URLs '
+            'through RedirectsMiddleware and report per-request latency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-maps', action='store_false', dest='maps', default=True,
+                            help='Skip the URLs from the tests/redirects maps.')
+        parser.add_argument('--misses', default=5000, type=int,
+                            help='Number of synthetic URLs that match no redirect. Defaults to 5000.')
+        parser.add_argument('--iterations', default=1, type=int,
+                            help='Number of times to replay the whole workload. Defaults to 1.')
+        parser.add_argument('--cache-size', default=0, type=int,
+                            help='Size of the middleware redirect cache. Defaults to 0 (disabled).')
+        parser.add_argument('--baseline', action='store_true', dest='baseline', default=False,
+                            help="Also run the workload through Django's linear RegexURLResolver.")
+        parser.add_argument('--seed', default=1, type=int,
+                            help='Random seed for the synthetic workload. Defaults to 1.')
+
+    def load_map_urls(self):
+        maps_dir = path.join(settings.ROOT, 'tests')
+        sys.path.insert(0, maps_dir)
+        try:
+            modules = [import_module('redirects.' + name) for name in MAP_MODULES]
+        except ImportError as e:
+            raise CommandError('Could not load the redirect maps from {0}: {1}'.format(maps_dir, e))
+        finally:
+            sys.path.remove(maps_dir)
+
+        urls = []
+        for module in modules:
+            for test in getattr(module, 'URLS', None) or getattr(module, 'URLS_410', []):
+                if isinstance(test, basestring):
+                    test = {'url': test}
+                # skip absolute URLs for other hosts
+                if test['url'].startswith('/'):
+                    urls.append((test['url'], request_headers(test.get('req_headers'))))
+
+        return urls
+
+    def miss_urls(self, count, seed):
+        rand = random.Random(seed)
+        locales = list(settings.PROD_LANGUAGES)
+        urls = []
+        for i in range(count):
+            page = rand.choice(MISS_PATHS)
+            kind = rand.random()
+            if kind < 0.6:
+                url = '/{0}/{1}'.format(rand.choice(locales), page)
+            elif kind < 0.8:
+                url = '/' + page
+            else:
+                url = '/{0}/{1}notfound-{2}/'.format(rand.choice(locales), page, i)
+            urls.append((url, {}))
+
+        return urls
+
+    def run_workload(self, name, resolver, requests, iterations, cache_size):
+        middleware = RedirectsMiddleware(resolver, cache_size=cache_size)
+        timings = []
+        evaluated = 0
+        for i in range(iterations):
+            for request in requests:
+                if middleware.cache is None or request.path_info not in middleware.cache:
+                    evaluated += count_evaluated(resolver, request.path_info)
+
+                start = time.time()
+                middleware.process_request(request)
+                timings.append(time.time() - start)
+
+        timings.sort()
+        self.stdout.write('{0:<24}{1:>10}{2:>12.1f}{3:>12.1f}{4:>14}{5:>12.1f}'.format(
+            name, len(timings),
+            percentile(timings, 50) * 1e6,
+            percentile(timings, 99) * 1e6,
+            evaluated,
+            evaluated / len(timings) if timings else 0))
+
+    def handle(self, *args, **options):
+        workloads = []
+        if options['maps']:
+            workloads.append(('maps', self.load_map_urls()))
+        if options['misses']:
+            workloads.append(('misses', self.miss_urls(options['misses'], options['seed'])))
+        if not workloads:
+            raise CommandError('Nothing to run.')
+
+        rf = RequestFactory()
+        workloads = [(name, [rf.get(url, **headers) for url, headers in urls])
+                     for name, urls in workloads]
+
+        resolvers = [('', get_resolver())]
+        if options['baseline']:
+            resolvers.append((' (baseline)', RegexURLResolver(r'^/', redirectpatterns)))
+
+        self.stdout.write('{0} redirect patterns'.format(len(redirectpatterns)))
+        self.stdout.write('{0:<24}{1:>10}{2:>12}{3:>12}{4:>14}{5:>12}'.format(
+            'workload', 'requests', 'p50 (us)', 'p99 (us)', 'evaluated', 'per req'))
+        for suffix, resolver in resolvers:
+            for name, requests in workloads:
+                self.run_workload(name + suffix, resolver, requests,
+                                  options['iterations'], options['cache_size'])
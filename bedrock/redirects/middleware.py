@@ -1,17 +1,51 @@
+from django.conf import settings
 from django.core.urlresolvers import Resolver404
 
+from bedrock.base.cache import LRUCache
+from bedrock.base.timing import timed_middleware
+
 from .util import get_resolver
 
 
+# cached value for paths that don't match any redirect
+NO_MATCH = object()
+
+
+@timed_middleware('redirects')
 class RedirectsMiddleware(object):
-    def __init__(self, resolver=None):
+    def __init__(self, resolver=None, cache_size=None):
         self.resolver = resolver or get_resolver()
+        if cache_size is None:
+            cache_size = settings.REDIRECTS_CACHE_SIZE
+
+        # header-dependent decisions happen in the callbacks, so only the
+        # resolver match is cached and the callback still runs per request.
+        if cache_size:
+            self.cache = LRUCache(cache_size, stats_name='redirects.resolve_cache')
+        else:
+            self.cache = None
+
+    def resolve(self, path):
+        if self.cache is not None:
+            resolver_match = self.cache.get(path, NO_MATCH)
+            if resolver_match is not NO_MATCH:
+                return resolver_match
 
-    def process_request(self, request):
         try:
-            resolver_match = self.resolver.resolve(request.path_info)
+            resolver_match = self.resolver.resolve(path)
         except Resolver404:
+            resolver_match = None
+
+        if self.cache is not None:
+            self.cache.set(path, resolver_match)
+
+        return resolver_match
+
+    def process_request(self, request):
+        resolver_match = self.resolve(request.path_info)
+        if resolver_match is None:
             return None
+
         callback, callback_args, callback_kwargs = resolver_match
         request.resolver_match = resolver_match
         return callback(request, *callback_args, **callback_kwargs)
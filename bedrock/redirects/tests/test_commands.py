@@ -0,0 +1,39 @@
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from mock import patch
+from nose.tools import eq_, ok_
+
+from bedrock.redirects.management.commands.redirects_benchmark import (count_evaluated,
+                                                                       percentile)
+from bedrock.redirects.util import get_resolver, redirect
+
+
+class TestRedirectsBenchmark(TestCase):
+    def test_percentile(self):
+        values = range(1, 101)
+        eq_(percentile(values, 50), 51)
+        eq_(percentile(values, 99), 99)
+        eq_(percentile([], 50), 0)
+
+    def test_count_evaluated(self):
+        resolver = get_resolver([
+            redirect(r'^(iam|youare)/the/.*/$', '/coo/coo/cachoo/'),
+            redirect(r'^iam/the/walrus/$', '/dammit/donnie/'),
+            redirect(r'^dude/(?P<name>\w+)/$', '/abides/'),
+        ])
+        eq_(count_evaluated(resolver, '/iam/the/walrus/'), 1)
+        # the fallback pattern and the one for 'dude'
+        eq_(count_evaluated(resolver, '/dude/walter/'), 2)
+        eq_(count_evaluated(resolver, '/donnie/'), 1)
+
+    @patch('bedrock.redirects.management.commands.redirects_benchmark.redirectpatterns',
+           [redirect(r'^iam/the/walrus/$', '/dammit/donnie/')])
+    def test_command(self):
+        out = StringIO()
+        call_command('redirects_benchmark', maps=False, misses=10, baseline=True, stdout=out)
+        output = out.getvalue()
+        ok_('1 redirect patterns' in output)
+        ok_('misses (baseline)' in output)
@@ -4,9 +4,11 @@
 
 from django.test import RequestFactory
 
+from mock import patch
+
 from bedrock.mozorg.tests import TestCase
 from bedrock.redirects.middleware import RedirectsMiddleware
-from bedrock.redirects.util import get_resolver, redirect
+from bedrock.redirects.util import get_resolver, redirect, ua_redirector
 
 
 patterns = [
@@ -28,3 +30,45 @@ class TestRedirectsMiddleware(TestCase):
     def test_no_redirect_match(self):
         resp = middleware.process_request(self.rf.get('/donnie/out/element/'))
         self.assertIsNone(resp)
+
+
+class TestRedirectsMiddlewareCache(TestCase):
+    def setUp(self):
+        self.rf = RequestFactory()
+        self.resolver = get_resolver([
+            redirect(r'^dude/already/10th/', '/far/out/'),
+            redirect(r'^walter/', ua_redirector('bowling', '/alley/', '/vietnam/'), cache_timeout=0),
+        ])
+        self.middleware = RedirectsMiddleware(self.resolver, cache_size=2)
+
+    def test_match_cached(self):
+        with patch.object(self.resolver, 'resolve', wraps=self.resolver.resolve) as resolve:
+            for i in range(3):
+                resp = self.middleware.process_request(self.rf.get('/dude/already/10th/'))
+                self.assertEqual(resp['location'], '/far/out/')
+
+            self.assertEqual(resolve.call_count, 1)
+
+        self.assertEqual(self.middleware.cache.hits, 2)
+        self.assertEqual(self.middleware.cache.misses, 1)
+
+    def test_no_match_cached(self):
+        with patch.object(self.resolver, 'resolve', wraps=self.resolver.resolve) as resolve:
+            for i in range(3):
+                self.assertIsNone(self.middleware.process_request(self.rf.get('/donnie/')))
+
+            self.assertEqual(resolve.call_count, 1)
+
+    def test_callback_runs_per_request(self):
+        """Header-dependent redirects should still be decided for each request."""
+        resp = self.middleware.process_request(self.rf.get('/walter/', HTTP_USER_AGENT='bowling'))
+        self.assertEqual(resp['location'], '/alley/')
+        resp = self.middleware.process_request(self.rf.get('/walter/', HTTP_USER_AGENT='sobchak'))
+        self.assertEqual(resp['location'], '/vietnam/')
+        self.assertEqual(self.middleware.cache.hits, 1)
+
+    def test_cache_disabled(self):
+        middleware = RedirectsMiddleware(self.resolver, cache_size=0)
+        self.assertIsNone(middleware.cache)
+        resp = middleware.process_request(self.rf.get('/dude/already/10th/'))
+        self.assertEqual(resp['location'], '/far/out/')
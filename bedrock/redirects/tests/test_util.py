@@ -11,7 +11,8 @@ from mock import patch
 from nose.tools import eq_, ok_
 
 from bedrock.redirects.middleware import RedirectsMiddleware
-from bedrock.redirects.util import (get_resolver, header_redirector, is_firefox_redirector,
+from bedrock.redirects.util import (LOCALE_RE, exact_paths, get_resolver, gone,
+                                    header_redirector, is_firefox_redirector, literal_segment,
                                     no_redirect, redirect, ua_redirector)
 
 
@@ -357,3 +358,127 @@ class TestRedirectUrlPattern(TestCase):
         eq_(resp.status_code, 301)
         eq_(resp['Location'],
             'http://www-archive.mozilla.org/editor/midasdemo/securityprefs.html%C2%A0')
+
+
+class TestLiteralSegment(TestCase):
+    def test_literal_segments(self):
+        eq_(literal_segment(LOCALE_RE + r'about/manifesto$'), 'about')
+        eq_(literal_segment(r'^about\.html$'), 'about.html')
+        eq_(literal_segment(LOCALE_RE + r'opt-out/?$'), 'opt-out')
+        eq_(literal_segment(r'^$'), '')
+
+    def test_no_literal_segment(self):
+        eq_(literal_segment(r'^firefox(?:/.*)?$'), None)
+        eq_(literal_segment(r'^firefoxos'), None)
+        eq_(literal_segment(r'^firefox/?beta$'), None)
+        eq_(literal_segment(r'^firefoxs?/$'), None)
+        eq_(literal_segment(r'^opt.out/$'), None)
+        eq_(literal_segment(r'^\w+/$'), None)
+        eq_(literal_segment(r'about/$'), None)
+        eq_(literal_segment(r'(?i)^about/$'), None)
+        eq_(literal_segment(r'^about/(?i)$'), None)
+        eq_(literal_segment(r'^about/$|^contact/$'), None)
+
+
+class TestExactPaths(TestCase):
+    def test_exact_paths(self):
+        eq_(exact_paths(LOCALE_RE + r'about/manifesto$'), ['about/manifesto'])
+        eq_(exact_paths(r'^about\.html$'), ['about.html'])
+        eq_(exact_paths(r'^about/?$'), ['about', 'about/'])
+        eq_(exact_paths(r'^$'), [''])
+
+    def test_not_exact(self):
+        eq_(exact_paths(r'^about/'), None)
+        eq_(exact_paths(r'^about/.*$'), None)
+        eq_(exact_paths(r'^about/?more$'), None)
+        eq_(exact_paths(r'^abouts?$'), None)
+        eq_(exact_paths(r'^about/\d$'), None)
+        eq_(exact_paths(r'(?i)^about$'), None)
+
+
+class TestRedirectResolver(TestCase):
+    def setUp(self):
+        self.rf = RequestFactory()
+
+    def test_first_match_wins_across_groups(self):
+        """A fallback pattern registered first should win over a literal one."""
+        resolver = get_resolver([
+            redirect(r'^(iam|youare)/the/walrus/$', '/coo/coo/cachoo/'),
+            redirect(r'^iam/the/walrus/$', '/dammit/donnie/'),
+            redirect(r'^iam/the/eggman/$', '/eggman/'),
+        ])
+        middleware = RedirectsMiddleware(resolver)
+        resp = middleware.process_request(self.rf.get('/iam/the/walrus/'))
+        eq_(resp['Location'], '/coo/coo/cachoo/')
+
+        resp = middleware.process_request(self.rf.get('/de/iam/the/eggman/'))
+        eq_(resp['Location'], '/de/eggman/')
+
+    def test_literal_before_fallback(self):
+        resolver = get_resolver([
+            gone(r'^iam/the/walrus/$'),
+            redirect(r'^.*/walrus/$', '/coo/coo/cachoo/'),
+        ])
+        middleware = RedirectsMiddleware(resolver)
+        eq_(middleware.process_request(self.rf.get('/iam/the/walrus/')).status_code, 410)
+        eq_(middleware.process_request(self.rf.get('/he/is/walrus/')).status_code, 301)
+
+    def test_locale_like_segment_not_a_locale(self):
+        """A first segment that looks like a locale can also be a literal segment."""
+        resolver = get_resolver([redirect(r'^faq/$', '/about/faq/')])
+        middleware = RedirectsMiddleware(resolver)
+        resp = middleware.process_request(self.rf.get('/faq/'))
+        eq_(resp['Location'], '/about/faq/')
+
+        resp = middleware.process_request(self.rf.get('/fr/faq/'))
+        eq_(resp['Location'], '/fr/about/faq/')
+
+        self.assertIsNone(middleware.process_request(self.rf.get('/fr/faq/more/')))
+
+    def test_patterns_added_after_first_resolve(self):
+        patterns = [redirect(r'^iam/the/walrus/$', '/coo/coo/cachoo/')]
+        resolver = get_resolver(patterns)
+        middleware = RedirectsMiddleware(resolver, cache_size=0)
+        self.assertIsNone(middleware.process_request(self.rf.get('/iam/the/eggman/')))
+
+        patterns.append(redirect(r'^iam/the/eggman/$', '/eggman/'))
+        resp = middleware.process_request(self.rf.get('/iam/the/eggman/'))
+        eq_(resp['Location'], '/eggman/')
+
+    def test_exact_match_keeps_order(self):
+        """A regex pattern registered before an exact match should still win."""
+        resolver = get_resolver([
+            redirect(r'^iam/the/(walrus|eggman)/$', '/coo/coo/cachoo/'),
+            redirect(r'^iam/the/walrus/$', '/dammit/donnie/'),
+            redirect(r'^iam/the/eggman/?$', '/eggman/'),
+            redirect(r'^iam/the/eggman/$', '/not/the/eggman/'),
+        ])
+        middleware = RedirectsMiddleware(resolver)
+        resp = middleware.process_request(self.rf.get('/iam/the/walrus/'))
+        eq_(resp['Location'], '/coo/coo/cachoo/')
+
+        resp = middleware.process_request(self.rf.get('/iam/the/eggman'))
+        eq_(resp['Location'], '/eggman/')
+
+    def test_exact_match_before_regex(self):
+        resolver = get_resolver([
+            redirect(r'^iam/the/walrus/$', '/dammit/donnie/'),
+            redirect(r'^iam/the/(walrus|eggman)/$', '/coo/coo/cachoo/'),
+        ])
+        middleware = RedirectsMiddleware(resolver)
+        resp = middleware.process_request(self.rf.get('/iam/the/walrus/'))
+        eq_(resp['Location'], '/dammit/donnie/')
+
+        resp = middleware.process_request(self.rf.get('/iam/the/eggman/'))
+        eq_(resp['Location'], '/coo/coo/cachoo/')
+
+    def test_exact_match_locale(self):
+        resolver = get_resolver([
+            redirect(r'^iam/the/walrus/$', '/dammit/donnie/', locale_prefix=False),
+            redirect(r'^iam/the/eggman/$', '/eggman/'),
+        ])
+        middleware = RedirectsMiddleware(resolver)
+        resp = middleware.process_request(self.rf.get('/pt-BR/iam/the/eggman/'))
+        eq_(resp['Location'], '/pt-BR/eggman/')
+
+        self.assertIsNone(middleware.process_request(self.rf.get('/pt-BR/iam/the/walrus/')))
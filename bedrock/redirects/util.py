@@ -3,10 +3,14 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import re
+from collections import defaultdict
+from heapq import merge
+from itertools import takewhile
 from urllib import urlencode
 from urlparse import parse_qs
 
-from django.core.urlresolvers import NoReverseMatch, RegexURLResolver, reverse
+from django.core.urlresolvers import (NoReverseMatch, RegexURLPattern, RegexURLResolver,
+                                      Resolver404, ResolverMatch, reverse)
 from django.conf.urls import url
 from django.http import HttpResponsePermanentRedirect, HttpResponseRedirect, HttpResponseGone
 from django.utils.encoding import force_text
@@ -20,6 +24,12 @@ from bedrock.mozorg.decorators import cache_control_expires
 
 log = commonware.log.getLogger('redirects.util')
 LOCALE_RE = r'^(?P<locale>\w{2,3}(?:-\w{2})?/)?'
+# same flags Django uses to compile url patterns
+locale_re = re.compile(LOCALE_RE, re.UNICODE)
+inline_flags_re = re.compile(r'\(\?[iLmsux]+\)')
+# characters that match themselves when unescaped in a url pattern
+LITERAL_CHARS = frozenset('-_~%,!=:;@\'&"<># ')
+QUANTIFIERS = frozenset('?*+{')
 # redirects registry
 redirectpatterns = []
 
@@ -29,7 +39,249 @@ def register(patterns):
 
 
 def get_resolver(patterns=None):
-    return RegexURLResolver(r'^/', patterns or redirectpatterns)
+    return RedirectResolver(r'^/', patterns or redirectpatterns)
+
+
+def has_toplevel_alternation(pattern):
+    """Return True if `pattern` contains a `|` outside of any group or character set."""
+    depth = 0
+    in_set = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_set:
+            if char == ']':
+                in_set = False
+        elif char == '[':
+            in_set = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+
+    return False
+
+
+def split_literal(pattern):
+    """
+    Split a url pattern regex into its literal leading text and the remaining regex.
+
+    Returns a tuple of (allows_locale, literal, remainder), or None if the pattern
+    can't be matched literally from the start of the path at all (flags,
+    top-level alternation, unanchored patterns). `allows_locale` is True for
+    patterns that start with `LOCALE_RE`.
+
+    split_literal(LOCALE_RE + r'about/manifesto$') -> (True, 'about/manifesto', '$')
+    split_literal(r'^firefox(?:/.*)?$') -> (False, 'firefox', '(?:/.*)?$')
+    """
+    if inline_flags_re.search(pattern) or has_toplevel_alternation(pattern):
+        return None
+
+    if pattern.startswith(LOCALE_RE):
+        allows_locale = True
+        pattern = pattern[len(LOCALE_RE):]
+    elif pattern.startswith('^'):
+        allows_locale = False
+        pattern = pattern[1:]
+    else:
+        return None
+
+    literal = []
+    index = 0
+    length = len(pattern)
+    while index < length:
+        char = pattern[index]
+        if char == '\\':
+            char = pattern[index + 1:index + 2]
+            # \d, \w, \b, etc. are not literals
+            if not char or char.isalnum():
+                break
+            step = 2
+        elif char.isalnum() or char == '/' or char in LITERAL_CHARS:
+            step = 1
+        else:
+            break
+
+        if pattern[index + step:index + step + 1] in QUANTIFIERS:
+            break
+        literal.append(char)
+        index += step
+
+    return allows_locale, force_text(''.join(literal)), pattern[index:]
+
+
+def literal_segment(pattern):
+    """
+    Return the literal first path segment that a url pattern regex requires, or None.
+
+    The segment is the part of the path that must follow the optional locale
+    prefix for the pattern to match. None means the pattern could match paths
+    starting with any segment (wildcards, flags, unanchored patterns, etc.).
+
+    literal_segment(LOCALE_RE + r'about/manifesto$') -> 'about'
+    literal_segment(r'^about\.html$') -> 'about.html'
+    literal_segment(r'^firefox(?:/.*)?$') -> None
+    """
+    parts = split_literal(pattern)
+    if parts is None:
+        return None
+
+    allows_locale, literal, remainder = parts
+    if '/' in literal:
+        return literal.split('/', 1)[0]
+
+    # optional trailing slash is only unambiguous at the end of the pattern
+    if remainder in ('$', '/?$'):
+        return literal
+
+    # e.g. '^firefox' matches 'firefoxos/'
+    return None
+
+
+def exact_paths(pattern):
+    """
+    Return the list of paths a fully literal url pattern regex matches, or None.
+
+    The paths don't include the optional locale prefix.
+
+    exact_paths(LOCALE_RE + r'about/manifesto$') -> ['about/manifesto']
+    exact_paths(r'^about/?$') -> ['about', 'about/']
+    exact_paths(r'^about/.*$') -> None
+    """
+    parts = split_literal(pattern)
+    if parts is None:
+        return None
+
+    allows_locale, literal, remainder = parts
+    if remainder == '$':
+        return [literal]
+
+    if remainder == '/?$':
+        return [literal, literal + '/']
+
+    return None
+
+
+class RedirectResolver(RegexURLResolver):
+    """
+    A RegexURLResolver that only tries the patterns that could match a path.
+
+    Fully literal patterns (see `exact_paths`) are found with a dict lookup on
+    the path. The rest are grouped by the literal path segment they require
+    after the optional locale (see `literal_segment`), and patterns without one
+    go into a fallback group that is always tried. Candidates are merged back
+    into registration order so the first matching pattern still wins.
+    """
+    def __init__(self, *args, **kwargs):
+        super(RedirectResolver, self).__init__(*args, **kwargs)
+        self._exact_patterns = None
+        self._localized_exact_patterns = None
+        self._segment_index = None
+        self._fallback_patterns = None
+        self._indexed_count = None
+
+    def _build_index(self, patterns):
+        exact_patterns = {}
+        localized_exact_patterns = {}
+        segment_index = defaultdict(list)
+        fallback_patterns = []
+        for position, pattern in enumerate(patterns):
+            if not isinstance(pattern, RegexURLPattern):
+                fallback_patterns.append((position, pattern))
+                continue
+
+            regex = pattern.regex.pattern
+            paths = exact_paths(regex)
+            if paths is not None:
+                allows_locale = regex.startswith(LOCALE_RE)
+                for path in paths:
+                    # setdefault keeps the first registered pattern for a path
+                    exact_patterns.setdefault(path, (position, pattern))
+                    if allows_locale:
+                        localized_exact_patterns.setdefault(path, (position, pattern))
+                continue
+
+            segment = literal_segment(regex)
+            if segment is None:
+                fallback_patterns.append((position, pattern))
+            else:
+                segment_index[segment].append((position, pattern))
+
+        self._exact_patterns = exact_patterns
+        self._localized_exact_patterns = localized_exact_patterns
+        self._segment_index = dict(segment_index)
+        self._fallback_patterns = fallback_patterns
+        self._indexed_count = len(patterns)
+
+    def candidate_patterns(self, path):
+        """Return the patterns that could match `path`, in registration order."""
+        patterns = self.url_patterns
+        if self._indexed_count != len(patterns):
+            self._build_index(patterns)
+
+        # `$` also matches before a trailing newline
+        if path.endswith('\n'):
+            path = path[:-1]
+
+        exact = self._exact_patterns.get(path)
+        groups = [self._fallback_patterns]
+        segment = path.split('/', 1)[0]
+        if segment in self._segment_index:
+            groups.append(self._segment_index[segment])
+
+        locale_match = locale_re.match(path)
+        if locale_match.group('locale'):
+            path = path[locale_match.end():]
+            localized_exact = self._localized_exact_patterns.get(path)
+            if localized_exact and (exact is None or localized_exact[0] < exact[0]):
+                exact = localized_exact
+
+            segment = path.split('/', 1)[0]
+            if segment in self._segment_index:
+                groups.append(self._segment_index[segment])
+
+        candidates = merge(*groups) if len(groups) > 1 else groups[0]
+        if exact is None:
+            return [pattern for position, pattern in candidates]
+
+        # only patterns registered before the exact match can beat it
+        exact_position, exact_pattern = exact
+        patterns = [pattern for position, pattern in
+                    takewhile(lambda candidate: candidate[0] < exact_position, candidates)]
+        patterns.append(exact_pattern)
+        return patterns
+
+    def resolve(self, path):
+        path = force_text(path)  # path may be a reverse_lazy object
+        match = self.regex.search(path)
+        if not match:
+            raise Resolver404({'path': path})
+
+        new_path = path[match.end():]
+        for pattern in self.candidate_patterns(new_path):
+            try:
+                sub_match = pattern.resolve(new_path)
+            except Resolver404:
+                continue
+
+            if sub_match:
+                sub_match_dict = dict(match.groupdict(), **self.default_kwargs)
+                sub_match_dict.update(sub_match.kwargs)
+                return ResolverMatch(
+                    sub_match.func,
+                    sub_match.args,
+                    sub_match_dict,
+                    sub_match.url_name,
+                    self.app_name or sub_match.app_name,
+                    [self.namespace] + sub_match.namespaces
+                )
+
+        raise Resolver404({'path': new_path})
 
 
 def header_redirector(header_name, regex, match_dest, nomatch_dest, case_sensitive=False):
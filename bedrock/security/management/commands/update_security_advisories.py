@@ -3,14 +3,18 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 import glob
+import hashlib
 import os
 import re
 import sys
+import time
+from multiprocessing import Pool
 from optparse import make_option
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management.base import NoArgsCommand, BaseCommand
+from django.db import transaction
 from django.db.models import Count
 
 from dateutil.parser import parse as parsedate
@@ -53,13 +57,13 @@ def delete_files(filenames):
     SecurityAdvisory.objects.filter(id__in=ids).delete()
 
 
-def add_or_update_advisory(data, html):
+def get_advisory_fields(data, html):
     """
-    Add or update an advisory in the database.
+    Return the field values and the fixed_in product names of an advisory.
 
     :param data: dict of metadata about the advisory
     :param html: HTML content of the advisory
-    :return: SecurityAdvisory
+    :return: dict of SecurityAdvisory field values, list of product names
     """
     mfsa_id = data.pop('mfsa_id')
     year, order = [int(x) for x in mfsa_id.split('-')]
@@ -76,16 +80,12 @@ def add_or_update_advisory(data, html):
     if datestr:
         dateobj = parsedate(datestr).date()
         kwargs['announced'] = dateobj
-    prodver_objs = []
 
     fixed_in = data.pop('fixed_in')
     if isinstance(fixed_in, basestring):
         fixed_in = [fixed_in]
 
-    for productname in fixed_in:
-        productname = fix_product_name(productname)
-        productobj, created = Product.objects.get_or_create(name=productname)
-        prodver_objs.append(productobj)
+    product_names = [fix_product_name(name) for name in fixed_in]
 
     # discard products. we rely on fixed_in.
     data.pop('products', None)
@@ -93,6 +93,25 @@ def add_or_update_advisory(data, html):
     if data:
         kwargs['extra_data'] = data
 
+    return kwargs, product_names
+
+
+def add_or_update_advisory(data, html, source_hash=''):
+    """
+    Add or update an advisory in the database.
+
+    :param data: dict of metadata about the advisory
+    :param html: HTML content of the advisory
+    :param source_hash: hash of the file the advisory was parsed from
+    :return: SecurityAdvisory
+    """
+    kwargs, product_names = get_advisory_fields(data, html)
+    kwargs['source_hash'] = source_hash
+    prodver_objs = []
+    for productname in product_names:
+        productobj, created = Product.objects.get_or_create(name=productname)
+        prodver_objs.append(productobj)
+
     advisory = SecurityAdvisory(**kwargs)
     advisory.save()
     advisory.fixed_in.clear()
@@ -100,13 +119,13 @@ def add_or_update_advisory(data, html):
     return advisory
 
 
-def update_db_from_file(filename):
+def parse_file(filename):
     """
-    Parse file for YAML and Markdown and update database.
+    Parse file for YAML and Markdown.
 
-    :raises: KeyError or ValueError
-    :param filename: path to markdown file.
-    :return: SecurityAdvisory instance
+    :raises: RuntimeError for an unknown file type
+    :param filename: path to markdown or YAML file.
+    :return: dict of metadata, HTML content
     """
     if filename.endswith('.md'):
         parser = parse_md_file
@@ -115,7 +134,138 @@ def update_db_from_file(filename):
     else:
         raise RuntimeError('Unknown file type %s' % filename)
 
-    return add_or_update_advisory(*parser(filename))
+    return parser(filename)
+
+
+def update_db_from_file(filename):
+    """
+    Parse file for YAML and Markdown and update database.
+
+    :raises: KeyError or ValueError
+    :param filename: path to markdown file.
+    :return: SecurityAdvisory instance
+    """
+    data, html = parse_file(filename)
+    return add_or_update_advisory(data, html, get_source_hash(filename))
+
+
+def get_source_hash(filename):
+    with open(filename, 'rb') as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def filter_unchanged_files(filenames):
+    """
+    Return the files that differ from the file their advisory was imported
+    from, so unchanged advisories aren't parsed and saved again.
+    """
+    hashes = dict(SecurityAdvisory.objects.values_list('id', 'source_hash'))
+    changed = []
+    for filename in filenames:
+        try:
+            source_hash = get_source_hash(filename)
+        except IOError:
+            # let the import report it
+            source_hash = None
+
+        if source_hash is None or hashes.get(mfsa_id_from_filename(filename)) != source_hash:
+            changed.append(filename)
+
+    return changed
+
+
+def parse_file_for_import(filename):
+    """
+    Parse a file and get the advisory's fields. Run in the worker processes
+    of import_files, so errors are returned instead of raised.
+
+    :return: (filename, (field values, product names) or None, error or None)
+    """
+    try:
+        kwargs, product_names = get_advisory_fields(*parse_file(filename))
+        kwargs['source_hash'] = get_source_hash(filename)
+        return filename, (kwargs, product_names), None
+    except Exception as e:
+        return filename, None, str(e)
+
+
+def chunked(items, size=500):
+    """Split the list to stay below the DB's limit on query parameters."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def get_products(names):
+    """
+    Return a dict of the Products with the names, creating the missing ones.
+    """
+    products = dict((p.name, p) for p in Product.objects.all())
+    new_products = []
+    for name in set(names) - set(products):
+        product = Product(name=name)
+        product.set_name_fields()
+        new_products.append(product)
+
+    if new_products:
+        Product.objects.bulk_create(new_products)
+        # bulk_create doesn't set the primary keys
+        products = dict((p.name, p) for p in Product.objects.all())
+
+    return products
+
+
+@transaction.atomic
+def bulk_add_or_update_advisories(advisories):
+    """
+    Add or update the advisories in the database with a few bulk queries
+    instead of several queries per advisory.
+
+    :param advisories: list of (field values, product names) from get_advisory_fields
+    """
+    products = get_products(name for _, names in advisories for name in names)
+    ids = [kwargs['id'] for kwargs, _ in advisories]
+    for ids_chunk in chunked(ids):
+        SecurityAdvisory.objects.filter(id__in=ids_chunk).delete()
+
+    SecurityAdvisory.objects.bulk_create(
+        [SecurityAdvisory(**kwargs) for kwargs, _ in advisories], batch_size=100)
+
+    Through = SecurityAdvisory.fixed_in.through
+    Through.objects.bulk_create([
+        Through(securityadvisory_id=kwargs['id'], product_id=products[name].id)
+        for kwargs, names in advisories for name in set(names)
+    ], batch_size=500)
+
+
+def import_files(filenames, processes=None):
+    """
+    Parse the files in a pool of processes and write them to the database
+    in one transaction.
+
+    :param processes: number of processes. Defaults to the number of CPUs.
+    :return: number of advisories imported, list of errors
+    """
+    if processes == 1:
+        results = map(parse_file_for_import, filenames)
+    else:
+        pool = Pool(processes)
+        try:
+            results = pool.map(parse_file_for_import, filenames, chunksize=20)
+        finally:
+            pool.close()
+            pool.join()
+
+    advisories = []
+    errors = []
+    for filename, advisory, error in results:
+        if error is None:
+            advisories.append(advisory)
+        else:
+            errors.append('ERROR parsing %s: %s' % (filename, error))
+
+    if advisories:
+        bulk_add_or_update_advisories(advisories)
+
+    return len(advisories), errors
 
 
 def get_all_mfsa_files():
@@ -169,6 +319,18 @@ class Command(NoArgsCommand):
                     dest='clear_db',
                     default=False,
                     help='Clear all security advisory data before update (implies --force)'),
+        make_option('--batch',
+                    action='store_true',
+                    dest='batch',
+                    default=False,
+                    help='Parse files in parallel and write them to the DB in bulk. '
+                         'Faster for updating many files.'),
+        make_option('--processes',
+                    type='int',
+                    dest='processes',
+                    default=None,
+                    help='Number of processes parsing files with --batch. '
+                         'Default: number of CPUs.'),
     )
 
     def get_lock(self):
@@ -207,14 +369,15 @@ class Command(NoArgsCommand):
             SecurityAdvisory.objects.all().delete()
             Product.objects.all().delete()
 
+        manifest = None
         if not no_git:
             printout('Updating repository.')
-            modified_files, deleted_files = repo.update()
-            if modified_files is None:
+            manifest = repo.sync()
+            if manifest.is_full:
                 cloned = True
             else:
-                modified_files = filter_advisory_filenames(modified_files)
-                deleted_files = filter_advisory_filenames(deleted_files)
+                modified_files = filter_advisory_filenames(manifest.modified_files)
+                deleted_files = filter_advisory_filenames(manifest.deleted_files)
 
         if force or cloned:
             printout('Reading all files.')
@@ -227,21 +390,35 @@ class Command(NoArgsCommand):
         errors = []
         updates = 0
         if modified_files:
-            for mf in modified_files:
-                mf = os.path.join(ADVISORIES_PATH, mf)
-                try:
-                    update_db_from_file(mf)
-                except Exception as e:
-                    errors.append('ERROR parsing %s: %s' % (mf, e))
+            modified_files = [os.path.join(ADVISORIES_PATH, mf) for mf in modified_files]
+            changed_files = filter_unchanged_files(modified_files)
+            if len(changed_files) < len(modified_files):
+                printout('Skipping {0} unchanged files.'.format(
+                    len(modified_files) - len(changed_files)))
+            modified_files = changed_files
+
+        if modified_files:
+            start_time = time.time()
+            if options['batch']:
+                updates, errors = import_files(modified_files, options['processes'])
+            else:
+                for mf in modified_files:
+                    try:
+                        update_db_from_file(mf)
+                    except Exception as e:
+                        errors.append('ERROR parsing %s: %s' % (mf, e))
+                        if not quiet:
+                            sys.stdout.write('E')
+                            sys.stdout.flush()
+                        continue
                     if not quiet:
-                        sys.stdout.write('E')
+                        sys.stdout.write('.')
                         sys.stdout.flush()
-                    continue
-                if not quiet:
-                    sys.stdout.write('.')
-                    sys.stdout.flush()
-                updates += 1
-            printout('\nUpdated {0} files.'.format(updates))
+                    updates += 1
+
+            duration = time.time() - start_time
+            printout('\nUpdated {0} files in {1:.1f} seconds ({2:.1f} files/sec).'.format(
+                updates, duration, updates / duration if duration else 0))
 
         if deleted_files:
             delete_files(deleted_files)
@@ -253,6 +430,14 @@ class Command(NoArgsCommand):
         if not modified_files and not deleted_files:
             printout('Nothing to update.')
 
+        failed_files = []
         if errors:
             sys.stderr.write('Encountered {0} errors:\n\n'.format(len(errors)) +
                              '\n==========\n'.join(errors))
+            # the files that weren't imported, to retry them in the next run
+            failed_files = [os.path.relpath(mf, ADVISORIES_PATH)
+                            for mf in filter_unchanged_files(modified_files)]
+
+        if manifest is not None:
+            # the next run will start from this commit
+            repo.set_last_synced_hash(manifest.new_hash, failed_files)
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security', '0002_auto_20161013_0642'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityadvisory',
+            name='source_hash',
+            field=models.CharField(max_length=40, blank=True),
+        ),
+    ]
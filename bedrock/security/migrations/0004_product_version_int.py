@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from product_details.version_compare import version_int
+
+
+def set_version_int(apps, schema_editor):
+    Product = apps.get_model('security', 'Product')
+    for product in Product.objects.all():
+        # same as Product.set_name_fields()
+        vers = product.name.rsplit(None, 1)[1]
+        if '.' not in vers:
+            vers += '.0'
+        product.version_int = version_int(vers)
+        product.save(update_fields=['version_int'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security', '0003_securityadvisory_source_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='version_int',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterIndexTogether(
+            name='product',
+            index_together=set([('product_slug', 'version_int')]),
+        ),
+        migrations.RunPython(set_version_int, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import django.utils.timezone
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security', '0004_product_version_int'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='securityadvisory',
+            name='last_modified',
+            field=django_extensions.db.fields.ModificationDateTimeField(default=django.utils.timezone.now, db_index=True, editable=False, blank=True),
+        ),
+    ]
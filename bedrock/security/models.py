@@ -2,14 +2,27 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import time
+from hashlib import md5
+
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, Max
 from django.template.defaultfilters import slugify
 from django.utils.functional import total_ordering
 
 from django_extensions.db.fields import ModificationDateTimeField
 from django_extensions.db.fields.json import JSONField
 from bedrock.base.urlresolvers import reverse
-from product_details.version_compare import Version
+from product_details.version_compare import Version, version_int
+
+
+LAST_MODIFIED_TIMEOUT = 60 * 60  # 1 hour
+LAST_MODIFIED_BUILT = 'built'
+# seconds between checks of the advisories' version, see get_advisories_version
+LAST_MODIFIED_CHECK_INTERVAL = 60
+# the advisories' version and when to check it again, per process
+advisories_version = {}
 
 
 @total_ordering
@@ -18,9 +31,13 @@ class Product(models.Model):
     slug = models.CharField(max_length=50, db_index=True)
     product = models.CharField(max_length=50)
     product_slug = models.SlugField()
+    # the version as an integer that sorts like Version, so the DB can
+    # filter and sort on it.
+    version_int = models.BigIntegerField(default=0)
 
     class Meta:
         ordering = ('slug',)
+        index_together = [('product_slug', 'version_int')]
 
     def __unicode__(self):
         return self.name
@@ -53,13 +70,18 @@ class Product(models.Model):
         return reverse('security.product-version-advisories',
                        kwargs={'product': product, 'version': vers})
 
-    def save(self, force_insert=False, force_update=False,
-             using=None, update_fields=None):
+    def set_name_fields(self):
+        """Set the product, slug and version fields from the name."""
         # do not use self.name_tuple because don't want ".0" on versions.
         product, vers = self.name_and_version
         self.product = product
         self.product_slug = slugify(product)
         self.slug = '{0}-{1}'.format(self.product_slug, vers)
+        self.version_int = version_int(str(self.version))
+
+    def save(self, force_insert=False, force_update=False,
+             using=None, update_fields=None):
+        self.set_name_fields()
         super(Product, self).save(force_insert, force_update,
                                   using, update_fields)
 
@@ -75,7 +97,9 @@ class SecurityAdvisory(models.Model):
     fixed_in = models.ManyToManyField(Product, related_name='advisories')
     extra_data = JSONField()
     html = models.TextField()
-    last_modified = ModificationDateTimeField()
+    # SHA-1 of the file the advisory was imported from
+    source_hash = models.CharField(max_length=40, blank=True)
+    last_modified = ModificationDateTimeField(db_index=True)
 
     class Meta:
         ordering = ('-year', '-order')
@@ -98,3 +122,83 @@ class SecurityAdvisory(models.Model):
     def products(self):
         prods_set = set(v.product for v in self.fixed_in.all())
         return sorted(prods_set)
+
+
+def last_modified_key(version, name):
+    return 'security:last-modified:{0}:{1}'.format(version, md5(name.encode('utf-8')).hexdigest())
+
+
+def build_last_modified_registry():
+    """
+    Return the latest advisory last_modified dates the views need for their
+    Last-Modified header, from two queries:
+
+    * 'all': of all advisories.
+    * 'year:<year>': dict of advisory ID -> its last_modified, per year.
+    * 'product:<product slug>': dict of version_int -> the latest of the
+      advisories fixed in that version of the product.
+    """
+    registry = {}
+    for mfsa_id, last_modified in SecurityAdvisory.objects.values_list('id', 'last_modified'):
+        registry.setdefault('year:' + mfsa_id.split('-')[0], {})[mfsa_id] = last_modified
+        if 'all' not in registry or last_modified > registry['all']:
+            registry['all'] = last_modified
+
+    fixed_in = SecurityAdvisory.fixed_in.through.objects.values_list(
+        'product__product_slug', 'product__version_int', 'securityadvisory__last_modified')
+    for product_slug, version, last_modified in fixed_in:
+        versions = registry.setdefault('product:' + product_slug, {})
+        if version not in versions or last_modified > versions[version]:
+            versions[version] = last_modified
+
+    return registry
+
+
+def get_advisories_version():
+    """
+    Return the number of advisories and their latest last_modified date,
+    which change whenever advisories are imported, changed or deleted.
+
+    They are queried at most every LAST_MODIFIED_CHECK_INTERVAL seconds per
+    process, so most requests don't query the DB.
+
+    :return: dict with 'count' and 'last_modified' keys
+    """
+    now = time.time()
+    if now >= advisories_version.get('next_check', 0):
+        advisories_version['latest'] = SecurityAdvisory.objects.aggregate(
+            count=Count('id'), last_modified=Max('last_modified'))
+        advisories_version['next_check'] = now + LAST_MODIFIED_CHECK_INTERVAL
+
+    return advisories_version['latest']
+
+
+def get_last_modified(name):
+    """
+    Return an entry of the last-modified registry (see
+    build_last_modified_registry) without a DB query, unless the registry
+    has to be built and cached first.
+
+    The registry is cached under the advisories' version (see
+    get_advisories_version), so every process sees imported, changed or
+    deleted advisories within LAST_MODIFIED_CHECK_INTERVAL seconds, whether
+    or not the cache is shared.
+
+    :return: datetime, dict or None if there's no such entry
+    """
+    latest = get_advisories_version()
+    if name == 'all':
+        return latest['last_modified']
+
+    version = md5('{count}:{last_modified}'.format(**latest)).hexdigest()
+    built_key = last_modified_key(version, LAST_MODIFIED_BUILT)
+    key = last_modified_key(version, name)
+    values = cache.get_many([built_key, key])
+    if built_key in values:
+        return values.get(key)
+
+    registry = build_last_modified_registry()
+    registry[LAST_MODIFIED_BUILT] = True
+    cache.set_many(dict((last_modified_key(version, entry), value)
+                        for entry, value in registry.items()), LAST_MODIFIED_TIMEOUT)
+    return registry.get(name)
@@ -2,13 +2,17 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import os
+import shutil
+import tempfile
+
 from django.conf import settings
 
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 from bedrock.mozorg.tests import TestCase
 from bedrock.security.management.commands import update_security_advisories
-from bedrock.security.models import Product
+from bedrock.security.models import Product, SecurityAdvisory
 
 
 def test_fix_product_name():
@@ -81,3 +85,78 @@ class TestDBActions(TestCase):
         Product.objects.create(name='Firefox 43.0.3')
         eq_(update_security_advisories.delete_orphaned_products(), 2)
         eq_(Product.objects.get().name, 'Firefox 43.0.1')
+
+
+MFSA_MD = u"""---
+title: The Dude is insecure
+impact: High
+announced: December 25, 2015
+fixed_in:
+- {0}
+- Seamonkey 2.40
+---
+The Dude minds, man!
+"""
+
+
+class TestImportFiles(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_file(self, name, content):
+        filename = os.path.join(self.tmpdir, name)
+        with open(filename, 'w') as fh:
+            fh.write(content.encode('utf8'))
+
+        return filename
+
+    def test_import_files(self):
+        """Should write the advisories, their products and fixed_in in bulk."""
+        make_mfsa('2015-100')
+        filenames = [
+            self.write_file('mfsa2015-100.md', MFSA_MD.format('Firefox 44.0')),
+            self.write_file('mfsa2015-101.md', MFSA_MD.format('Firefox 43.0.1')),
+            self.write_file('mfsa2015-102.md', 'no front matter'),
+        ]
+        updates, errors = update_security_advisories.import_files(filenames, processes=1)
+        eq_(updates, 2)
+        eq_(len(errors), 1)
+        ok_('mfsa2015-102.md' in errors[0])
+
+        eq_(sorted(Product.objects.values_list('slug', flat=True)),
+            ['firefox-43.0.1', 'firefox-44', 'seamonkey-2.40'])
+        advisory = SecurityAdvisory.objects.get(id='2015-100')
+        eq_(advisory.html, '<p>The Dude minds, man!</p>')
+        eq_([p.name for p in advisory.fixed_in.all()], ['Firefox 44', 'SeaMonkey 2.40'])
+        eq_(advisory.products, ['Firefox', 'SeaMonkey'])
+        eq_(SecurityAdvisory.objects.get(id='2015-101').fixed_in.count(), 2)
+
+    def test_import_files_pool(self):
+        """Should give the same result when parsing in a process pool."""
+        filenames = [self.write_file('mfsa2015-10{0}.md'.format(i),
+                                     MFSA_MD.format('Firefox 4{0}.0'.format(i)))
+                     for i in range(5)]
+        updates, errors = update_security_advisories.import_files(filenames, processes=2)
+        eq_(updates, 5)
+        eq_(errors, [])
+        eq_(SecurityAdvisory.objects.get(id='2015-103').fixed_in.count(), 2)
+
+    def test_filter_unchanged_files(self):
+        """Should skip the files that haven't changed since they were imported."""
+        filenames = [
+            self.write_file('mfsa2015-100.md', MFSA_MD.format('Firefox 44.0')),
+            self.write_file('mfsa2015-101.md', MFSA_MD.format('Firefox 43.0.1')),
+        ]
+        update_security_advisories.update_db_from_file(filenames[0])
+        update_security_advisories.import_files(filenames[1:], processes=1)
+        eq_(update_security_advisories.filter_unchanged_files(filenames), [])
+
+        self.write_file('mfsa2015-101.md', MFSA_MD.format('Firefox 43.0.2'))
+        new_filename = self.write_file('mfsa2015-102.md', MFSA_MD.format('Firefox 45.0'))
+        missing_filename = os.path.join(self.tmpdir, 'mfsa2015-103.md')
+        eq_(update_security_advisories.filter_unchanged_files(
+            filenames + [new_filename, missing_filename]),
+            [filenames[1], new_filename, missing_filename])
@@ -23,3 +23,10 @@ class TestModels(TestCase):
         pv1 = Product.objects.create(name='Firefox ESR 24.2')
         self.assertEqual(pv0.slug, 'firefox-24.0.1')
         self.assertEqual(pv1.slug, 'firefox-esr-24.2')
+
+    def test_version_int(self):
+        """Should sort like Version."""
+        pvs = [Product.objects.create(name=name) for name in
+               ['Firefox 24.0.1', 'Firefox 24', 'Firefox 3.6', 'Firefox 24.1']]
+        self.assertListEqual(sorted(pvs, key=lambda pv: pv.version_int),
+                             sorted(pvs))
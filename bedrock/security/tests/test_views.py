@@ -1,7 +1,11 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
+from datetime import timedelta
+
+from django.db.models import Max
 from django.test import RequestFactory
+from django.utils import timezone
 
 from mock import patch, Mock
 from nose.tools import eq_, ok_
@@ -10,9 +14,10 @@ from product_details.version_compare import Version
 
 from bedrock.mozorg.tests import TestCase
 from bedrock.security.management.commands.update_security_advisories import add_or_update_advisory
-from bedrock.security.models import Product
-from bedrock.security.views import (ProductView, ProductVersionView, latest_queryset,
-                                    product_is_obsolete)
+from bedrock.security.models import (advisories_version, get_last_modified, Product,
+                                     SecurityAdvisory)
+from bedrock.security.views import (ProductView, ProductVersionView, latest_advisory,
+                                    product_is_obsolete, product_version_filter)
 
 
 @patch.object(product_details, 'firefox_versions', {'LATEST_FIREFOX_VERSION': '33.0',
@@ -34,6 +39,33 @@ def test_product_is_obsolete():
     ok_(not product_is_obsolete('seamonkey', '2.30'))
 
 
+def latest_queryset(request, kwargs):
+    """
+    Return the advisories whose latest last_modified date latest_advisory
+    should find, the way the views used to query it.
+    :param request: the http request object
+    :param kwargs: the URL param args for the request
+    :return: QuerySet
+    """
+    urlname = request.resolver_match.url_name.split('.')[1]
+    if urlname == 'advisories':
+        return SecurityAdvisory.objects.all()
+
+    if urlname == 'advisory':
+        pk = kwargs.get('pk')
+        return SecurityAdvisory.objects.filter(pk=pk)
+
+    if urlname == 'product-advisories':
+        slug = kwargs.get('slug')
+        # doesn't take minimum versions into account.
+        # don't think that's really a problem as they shouldn't change.
+        return SecurityAdvisory.objects.filter(fixed_in__product_slug=slug)
+
+    if urlname == 'product-version-advisories':
+        return SecurityAdvisory.objects.filter(
+            product_version_filter(kwargs['product'], kwargs['version'], 'fixed_in__'))
+
+
 class TestViews(TestCase):
     def setUp(self):
         pvnames = [
@@ -70,7 +102,21 @@ class TestViews(TestCase):
         pview.kwargs = {'product': 'firefox', 'version': '4.2'}
         self.assertListEqual(pview.get_queryset(), [self.pvs[4], self.pvs[3]])
 
+    def test_product_view_queries(self):
+        """Should fetch the versions and their advisories in 2 queries."""
+        add_or_update_advisory({'mfsa_id': '2014-01', 'title': 'Dude', 'fixed_in': ['Firefox 4.2']},
+                               'The Dude abides.')
+        pview = ProductView()
+        pview.kwargs = {'slug': 'firefox'}
+        with self.assertNumQueries(2):
+            versions = pview.get_queryset()
+            advisories = [list(version.advisories.all()) for version in versions]
+
+        eq_([[a.id for a in version_advisories] for version_advisories in advisories],
+            [[], [], ['2014-01'], [], []])
 
+
+@patch.dict('bedrock.security.models.advisories_version', clear=True)
 class TestLastModified(TestCase):
     def setUp(self):
         self.next_id = 1
@@ -143,6 +189,66 @@ class TestLastModified(TestCase):
         qs = latest_queryset(req, {'product': 'firefox', 'version': '29.0'})
         self.assertListEqual(advisories_29, list(qs.order_by('year', 'order')))
 
+    def test_latest_advisory(self):
+        """Should find the date of the latest advisory of latest_queryset without a query."""
+        for fixed_in in (['Firefox 29.0.1', 'Thunderbird 29'], ['Firefox 30'], ['Firefox 29.1'],
+                         ['Firefox 29', 'Firefox 30.0.1'], ['Thunderbird 30']):
+            self.new_advisory(fixed_in=fixed_in)
+
+        now = timezone.now()
+        for i, mfsa_id in enumerate(['2014-01', '2014-04', '2014-02', '2014-05', '2014-03']):
+            SecurityAdvisory.objects.filter(id=mfsa_id).update(
+                last_modified=now - timedelta(days=i))
+
+        # build and cache the registry
+        get_last_modified('year:2014')
+        req = self.rf.get('/')
+        req.resolver_match = Mock()
+        for urlname, kwargs in [
+            ('security.advisories', {}),
+            ('security.advisory', {'pk': '2014-02'}),
+            ('security.advisory', {'pk': '2014-99'}),
+            ('security.product-advisories', {'slug': 'firefox'}),
+            ('security.product-advisories', {'slug': 'thunderbird'}),
+            ('security.product-advisories', {'slug': 'seamonkey'}),
+            ('security.product-version-advisories', {'product': 'firefox', 'version': '29'}),
+            ('security.product-version-advisories', {'product': 'firefox', 'version': '29.0'}),
+            ('security.product-version-advisories', {'product': 'firefox', 'version': '30.0'}),
+            ('security.product-version-advisories', {'product': 'firefox', 'version': '31'}),
+        ]:
+            req.resolver_match.url_name = urlname
+            expected = latest_queryset(req, kwargs).aggregate(Max('last_modified'))
+            with self.assertNumQueries(0):
+                eq_(latest_advisory(req, **kwargs), expected['last_modified__max'])
+
+    def test_latest_advisory_changed(self):
+        """Should see new, changed and deleted advisories once the version is checked again."""
+        req = self.rf.get('/')
+        req.resolver_match = Mock()
+        req.resolver_match.url_name = 'security.product-advisories'
+
+        def check_again():
+            advisories_version['next_check'] = 0
+
+        eq_(latest_advisory(req, slug='firefox'), None)
+        advisory = self.new_advisory(fixed_in=['Firefox 30'])
+        eq_(latest_advisory(req, slug='firefox'), None)
+        check_again()
+        eq_(latest_advisory(req, slug='firefox'), advisory.last_modified)
+
+        advisory.save()
+        check_again()
+        eq_(latest_advisory(req, slug='firefox'), advisory.last_modified)
+
+        older = timezone.now() - timedelta(days=1)
+        other = self.new_advisory(fixed_in=['Firefox 29'])
+        SecurityAdvisory.objects.filter(id=other.id).update(last_modified=older)
+        check_again()
+        eq_(latest_advisory(req, slug='firefox'), advisory.last_modified)
+        advisory.delete()
+        check_again()
+        eq_(latest_advisory(req, slug='firefox'), older)
+
 
 class TestKVRedirects(TestCase):
     def _test_names(self, url_component, expected):
@@ -4,18 +4,18 @@
 import re
 
 from django.core.urlresolvers import NoReverseMatch
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import last_modified
 from django.views.generic import DetailView, ListView, RedirectView
 
 from bedrock.base.urlresolvers import reverse
 from product_details import product_details
-from product_details.version_compare import Version
+from product_details.version_compare import Version, version_int
 from lib.l10n_utils import LangFilesMixin
 
 from bedrock.mozorg.decorators import cache_control_expires
-from bedrock.security.models import Product, SecurityAdvisory
+from bedrock.security.models import get_last_modified, Product, SecurityAdvisory
 
 
 def product_is_obsolete(prod_name, version):
@@ -54,53 +54,82 @@ def product_is_obsolete(prod_name, version):
     return True
 
 
-def latest_queryset(request, kwargs):
+def version_int_range(version):
     """
-    Return a queryset for use as a way to find last-modified date.
-    :param request: the http request object
-    :param kwargs: the URL param args for the request
-    :return: QuerySet
+    Return the range of Product.version_int values of a major or minor
+    version, e.g. 4.0, 4.0.1 and 4.2.3 for version 4, or 4.2 and 4.2.3 for
+    version 4.2.
+
+    :param version: e.g. "4" or "4.2"
+    :return: lowest, highest (excluded)
     """
-    urlname = request.resolver_match.url_name.split('.')[1]
-    if urlname == 'advisories':
-        return SecurityAdvisory.objects.all()
+    parts = [int(x) for x in version.split('.')]
+    if len(parts) == 1:
+        lowest = '{0}.0'.format(parts[0])
+        highest = '{0}.0'.format(parts[0] + 1)
+    else:
+        lowest = '{0}.{1}'.format(*parts)
+        highest = '{0}.{1}'.format(parts[0], parts[1] + 1)
 
-    if urlname == 'advisory':
-        pk = kwargs.get('pk')
-        return SecurityAdvisory.objects.filter(pk=pk)
+    return version_int(lowest), version_int(highest)
 
-    if urlname == 'product-advisories':
-        slug = kwargs.get('slug')
-        # doesn't take minimum versions into account.
-        # don't think that's really a problem as they shouldn't change.
-        return SecurityAdvisory.objects.filter(fixed_in__product_slug=slug)
 
-    if urlname == 'product-version-advisories':
-        slug = u'{product}-{version}'.format(**kwargs)
-        qfilter = Q(fixed_in__slug__startswith=slug + '.')
-        dots = slug.count('.')
-        if dots < 2:
-            # add exact match if not point release
-            if slug.endswith('.0'):
-                # stip trailing .0 as products are stored without them
-                slug = slug[:-2]
-            qfilter |= Q(fixed_in__slug__exact=slug)
-        return SecurityAdvisory.objects.filter(qfilter)
+def product_version_filter(product, version, prefix=''):
+    """
+    Return a Q matching the Products of a major or minor version.
+
+    :param product: product slug, e.g. "firefox"
+    :param version: e.g. "4" or "4.2"
+    :param prefix: lookup path to the Product, e.g. "fixed_in__"
+    """
+    lowest, highest = version_int_range(version)
+    return Q(**{
+        prefix + 'product_slug': product.lower(),
+        prefix + 'version_int__gte': lowest,
+        prefix + 'version_int__lt': highest,
+    })
+
+
+def with_advisories(versions):
+    """
+    Sort the Products by version, newest first, and fetch the advisories
+    the product-advisories template lists for them in one more query.
+    """
+    advisories = SecurityAdvisory.objects.only('id', 'impact', 'title')
+    return versions.order_by('-version_int').prefetch_related(
+        Prefetch('advisories', queryset=advisories))
 
 
 def latest_advisory(request, *args, **kwargs):
     """
     Callback function for use with last_modified decorator.
+
+    Finds the latest last_modified date of the advisories the page lists in
+    the cached last-modified registry, so it usually takes no DB query (see
+    bedrock.security.models.get_last_modified).
     :params: request, *args, **kwargs same as sent to view
-    :return: function
+    :return: datetime or None
     """
-    queryset = latest_queryset(request, kwargs)
-    try:
-        latest = queryset.only('last_modified').latest()
-    except SecurityAdvisory.DoesNotExist:
-        return None
+    urlname = request.resolver_match.url_name.split('.')[1]
+    if urlname == 'advisories':
+        return get_last_modified('all')
 
-    return latest.last_modified
+    if urlname == 'advisory':
+        pk = kwargs.get('pk')
+        advisories = get_last_modified('year:' + pk.split('-')[0]) or {}
+        return advisories.get(pk)
+
+    if urlname == 'product-advisories':
+        # doesn't take minimum versions into account.
+        # don't think that's really a problem as they shouldn't change.
+        versions = get_last_modified('product:' + kwargs.get('slug')) or {}
+        return max(versions.values()) if versions else None
+
+    if urlname == 'product-version-advisories':
+        versions = get_last_modified('product:' + kwargs['product'].lower()) or {}
+        lowest, highest = version_int_range(kwargs['version'])
+        dates = [date for version, date in versions.items() if lowest <= version < highest]
+        return max(dates) if dates else None
 
 
 class AdvisoriesView(LangFilesMixin, ListView):
@@ -115,7 +144,7 @@ class AdvisoriesView(LangFilesMixin, ListView):
 
 
 class AdvisoryView(LangFilesMixin, DetailView):
-    model = SecurityAdvisory
+    queryset = SecurityAdvisory.objects.prefetch_related('fixed_in')
     template_name = 'security/advisory.html'
     context_object_name = 'advisory'
 
@@ -145,8 +174,8 @@ class ProductView(LangFilesMixin, ListView):
         versions = Product.objects.filter(product_slug=product_slug)
         min_version = self.minimum_versions.get(product_slug)
         if min_version:
-            versions = [vers for vers in versions if vers.version >= min_version]
-        return sorted(versions, reverse=True)
+            versions = versions.filter(version_int__gte=version_int(str(min_version)))
+        return list(with_advisories(versions))
 
     def get_context_data(self, **kwargs):
         cxt = super(ProductView, self).get_context_data(**kwargs)
@@ -165,17 +194,9 @@ class ProductVersionView(LangFilesMixin, ListView):
         return super(ProductVersionView, self).dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        slug = u'{product}-{version}'.format(**self.kwargs)
-        qfilter = Q(slug__startswith=slug + '.')
-        dots = slug.count('.')
-        if dots < 2:
-            # add exact match if not point release
-            if slug.endswith('.0'):
-                # stip trailing .0 as products are stored without them
-                slug = slug[:-2]
-            qfilter |= Q(slug__exact=slug)
-        versions = Product.objects.filter(qfilter)
-        return sorted(versions, reverse=True)
+        versions = Product.objects.filter(
+            product_version_filter(self.kwargs['product'], self.kwargs['version']))
+        return list(with_advisories(versions))
 
     def get_context_data(self, **kwargs):
         cxt = super(ProductVersionView, self).get_context_data(**kwargs)
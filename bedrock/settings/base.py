@@ -312,11 +312,20 @@ ENABLE_HOSTNAME_MIDDLEWARE = config('ENABLE_HOSTNAME_MIDDLEWARE',
                                     default=bool(DEIS_APP), cast=bool)
 ENABLE_VARY_NOCACHE_MIDDLEWARE = config('ENABLE_VARY_NOCACHE_MIDDLEWARE',
                                         default=True, cast=bool)
+# number of request paths per process whose redirect lookup result is kept in memory.
+# set to 0 to disable.
+REDIRECTS_CACHE_SIZE = config('REDIRECTS_CACHE_SIZE', default=1000, cast=int)
 # set this to enable basic auth for the entire site
 # e.g. BASIC_AUTH_CREDS="thedude:thewalrus"
 BASIC_AUTH_CREDS = config('BASIC_AUTH_CREDS', default=None)
+# list the time spent in each middleware and render stage in a Server-Timing
+# response header. the timers are always sent to statsd.
+ENABLE_SERVER_TIMING_HEADER = config('ENABLE_SERVER_TIMING_HEADER',
+                                     default=DEV and not PROD, cast=bool)
 
 MIDDLEWARE_CLASSES = [
+    # must come first to time the other middleware
+    'bedrock.base.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'bedrock.mozorg.middleware.MozorgRequestTimingMiddleware',
     'django_statsd.middleware.GraphiteMiddleware',
@@ -4,8 +4,9 @@
 from __future__ import print_function, unicode_literals
 
 import os
+from collections import namedtuple
 from shutil import rmtree
-from subprocess import check_output, STDOUT
+from subprocess import CalledProcessError, check_output, STDOUT
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -17,6 +18,48 @@ from pathlib2 import Path
 
 
 GIT = getattr(settings, 'GIT_BIN', 'git')
+# commits of history fetched by GitRepo.sync(). the diff only needs the commits at both ends.
+SYNC_DEPTH = 1
+LAST_SYNCED_FILENAME = 'bedrock-last-synced'
+# files the consumer failed to process at the last-synced commit, one per line
+FAILED_FILES_FILENAME = 'bedrock-failed-files'
+
+# status is A, M, D or R. old_path is only set for renames, and blob is the
+# hash of the new content, or of the old content for deletions.
+FileChange = namedtuple('FileChange', ['status', 'path', 'blob', 'old_path'])
+
+
+class ChangeManifest(object):
+    """
+    The files that changed between the `old_hash` and `new_hash` commits.
+    If `old_hash` is None every file of `new_hash` is listed as added.
+    """
+    def __init__(self, old_hash, new_hash, changes):
+        self.old_hash = old_hash
+        self.new_hash = new_hash
+        self.changes = list(changes)
+        self.added = [c for c in self.changes if c.status == 'A']
+        self.modified = [c for c in self.changes if c.status == 'M']
+        self.deleted = [c for c in self.changes if c.status == 'D']
+        self.renamed = [c for c in self.changes if c.status == 'R']
+
+    @property
+    def is_full(self):
+        """True if there was no earlier sync to compare with."""
+        return self.old_hash is None
+
+    @property
+    def modified_files(self):
+        """Paths of the added, modified and renamed files, like the first set from GitRepo.diff"""
+        return set(c.path for c in self.changes if c.status != 'D')
+
+    @property
+    def deleted_files(self):
+        """Paths of the deleted and renamed files, like the second set from GitRepo.diff"""
+        return set(c.path for c in self.deleted) | set(c.old_path for c in self.renamed)
+
+    def __len__(self):
+        return len(self.changes)
 
 
 class GitRepo(object):
@@ -30,12 +73,15 @@ class GitRepo(object):
 
         self.remote_name = remote_name
 
-    def git(self, *args):
-        """Run a git command against the current repo"""
+    def git(self, *args, **kwargs):
+        """Run a git command against the current repo
+
+        :param stderr: where git's stderr goes. By default it is part of the output.
+        """
         curdir = os.getcwd()
         try:
             os.chdir(self.path_str)
-            output = check_output((GIT,) + args, stderr=STDOUT)
+            output = check_output((GIT,) + args, stderr=kwargs.get('stderr', STDOUT))
         finally:
             os.chdir(curdir)
 
@@ -89,6 +135,77 @@ class GitRepo(object):
 
         return modified, removed
 
+    def diff_manifest(self, start_hash, end_hash):
+        """Return a ChangeManifest of the files changed between the commits"""
+        # warnings, e.g. about diff.renameLimit on big diffs, must not end up in the output
+        raw = self.git('diff', '--raw', '--no-abbrev', '-M', start_hash, end_hash, stderr=None)
+        return ChangeManifest(start_hash, end_hash, parse_raw_diff(raw))
+
+    def tree_files(self, commit_hash, *paths):
+        """Return (path, blob hash) of every file in the commit, or of the given paths that exist"""
+        files = []
+        args = ('ls-tree', '-r', '--full-tree', commit_hash)
+        if paths:
+            args += ('--',) + paths
+        for line in StringIO(self.git(*args)):
+            info, path = line.rstrip('\n').split('\t', 1)
+            files.append((path, info.split()[2]))
+
+        return files
+
+    def tree_manifest(self, commit_hash):
+        """Return a ChangeManifest listing every file in the commit as added"""
+        changes = [FileChange('A', path, blob, None) for path, blob in self.tree_files(commit_hash)]
+        return ChangeManifest(None, commit_hash, changes)
+
+    def has_commit(self, commit_hash):
+        """Return True if the commit is in the local repo"""
+        try:
+            self.git('cat-file', '-e', commit_hash + '^{commit}')
+        except CalledProcessError:
+            return False
+
+        return True
+
+    @property
+    def last_synced_path(self):
+        return self.path.joinpath('.git', LAST_SYNCED_FILENAME)
+
+    @property
+    def last_synced_hash(self):
+        """The hash the last sync was confirmed at with set_last_synced_hash(), or None"""
+        try:
+            return self.last_synced_path.read_text().strip() or None
+        except (IOError, OSError):
+            return None
+
+    @property
+    def failed_files_path(self):
+        return self.path.joinpath('.git', FAILED_FILES_FILENAME)
+
+    @property
+    def failed_files(self):
+        """Paths of the files set_last_synced_hash() was told failed to process"""
+        try:
+            return set(self.failed_files_path.read_text().split('\n')) - {''}
+        except (IOError, OSError):
+            return set()
+
+    def set_last_synced_hash(self, commit_hash, failed_files=()):
+        """Save the hash the repo's consumer has processed the files up to
+
+        :param failed_files: paths of the files it failed to process. The next
+            sync() lists them as modified again.
+        """
+        with self.last_synced_path.open('wb') as fh:
+            fh.write(commit_hash)
+
+        if failed_files:
+            with self.failed_files_path.open('wb') as fh:
+                fh.write('\n'.join(sorted(failed_files)).encode('utf-8'))
+        elif self.failed_files_path.exists():
+            self.failed_files_path.unlink()
+
     def clone(self):
         """Clone the repo specified in the initial arguments"""
         if not self.remote_url:
@@ -110,6 +227,46 @@ class GitRepo(object):
         self.git('checkout', '-f', self.full_branch_name)
         return old_hash, self.current_hash
 
+    def sync(self, depth=SYNC_DEPTH):
+        """Update the repo to the latest of the remote and branch with a shallow fetch.
+
+        Unlike update(), the changes are from the commit saved with
+        set_last_synced_hash(), so files aren't missed if the last update wasn't
+        processed, and a directory that isn't a repo is initialized in place
+        instead of deleted and cloned again. Files that failed to process at
+        that commit are listed as modified again.
+
+        :return ChangeManifest, listing every file if there's no usable last-synced commit
+        """
+        initialized = False
+        if not self.path.joinpath('.git').is_dir():
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.git('init')
+            initialized = True
+
+        if not self.has_remote():
+            self.add_remote()
+
+        self.git('fetch', '--depth', str(depth), self.remote_name, self.branch_name)
+        self.git('checkout', '-f', self.full_branch_name)
+        if initialized:
+            # remove whatever was in the directory before, like update() does
+            self.git('clean', '-fdx')
+
+        new_hash = self.current_hash
+        old_hash = self.last_synced_hash
+        if not old_hash or not self.has_commit(old_hash):
+            return self.tree_manifest(new_hash)
+
+        manifest = self.diff_manifest(old_hash, new_hash)
+        retry = self.failed_files - set(c.path for c in manifest.changes)
+        if retry:
+            changes = [FileChange('M', path, blob, None)
+                       for path, blob in self.tree_files(new_hash, *sorted(retry))]
+            manifest = ChangeManifest(old_hash, new_hash, manifest.changes + changes)
+
+        return manifest
+
     def update(self):
         """Updates a repo, cloning if necessary.
 
@@ -125,3 +282,33 @@ class GitRepo(object):
             self.clone()
 
         return None, None
+
+
+def parse_raw_diff(raw):
+    """
+    Return the FileChanges in the output of `git diff --raw --no-abbrev -M`.
+    Copies are listed as added, and type changes as modified. Lines that
+    aren't diff entries, like warnings, are skipped.
+    """
+    changes = []
+    for line in StringIO(raw):
+        line = line.rstrip('\n')
+        if not line.startswith(':'):
+            continue
+
+        info, paths = line.split('\t', 1)
+        _, _, old_blob, new_blob, status = info.split()
+        paths = paths.split('\t')
+        status = status[0]
+        if status == 'D':
+            changes.append(FileChange('D', paths[0], old_blob, None))
+        elif status == 'R':
+            changes.append(FileChange('R', paths[1], new_blob, paths[0]))
+        elif status == 'C':
+            changes.append(FileChange('A', paths[1], new_blob, None))
+        elif status == 'A':
+            changes.append(FileChange('A', paths[0], new_blob, None))
+        else:
+            changes.append(FileChange('M', paths[0], new_blob, None))
+
+    return changes
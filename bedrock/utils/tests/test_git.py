@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+from subprocess import check_call
+
 import pytest
 from django.test import override_settings
 from mock import call, patch, DEFAULT
@@ -167,6 +169,123 @@ def test_git_diff():
     }
 
 
+def test_parse_raw_diff():
+    changes = git.parse_raw_diff(GIT_RAW_DIFF_TEST_DATA)
+    assert changes == [
+        git.FileChange('A', 'docker/run.sh', 'b' * 40, None),
+        git.FileChange('M', 'docs/javascript-libs.rst', 'd' * 40, None),
+        git.FileChange('R', 'etc/supervisor_available/cron_db.conf', 'f' * 40,
+                       'etc/supervisor_available/cron.conf'),
+        git.FileChange('D', 'media/css/pebbles/base.less', '1' * 40, None),
+        git.FileChange('A', 'media/css/pebbles/base/elements/_forms.scss', '3' * 40, None),
+    ]
+    manifest = git.ChangeManifest('abcd', 'ef12', changes)
+    assert len(manifest.added) == 2
+    assert manifest.modified_files == {
+        'docker/run.sh',
+        'docs/javascript-libs.rst',
+        'etc/supervisor_available/cron_db.conf',
+        'media/css/pebbles/base/elements/_forms.scss',
+    }
+    assert manifest.deleted_files == {
+        'etc/supervisor_available/cron.conf',
+        'media/css/pebbles/base.less',
+    }
+
+
+def test_parse_raw_diff_skips_warnings():
+    """Should skip lines that aren't diff entries, e.g. git warnings."""
+    raw = ('warning: inexact rename detection was skipped due to too many files.\n'
+           'warning: you may want to set your diff.renameLimit variable to at least 1234 '
+           'and retry the command.\n' + GIT_RAW_DIFF_TEST_DATA)
+    assert git.parse_raw_diff(raw) == git.parse_raw_diff(GIT_RAW_DIFF_TEST_DATA)
+
+
+def test_git_diff_manifest_stderr():
+    """Should keep git's stderr out of the diff it parses."""
+    g = git.GitRepo('.')
+    with patch.object(g, 'git') as git_mock:
+        git_mock.return_value = GIT_RAW_DIFF_TEST_DATA
+        manifest = g.diff_manifest('abcd', 'ef12')
+        git_mock.assert_called_with('diff', '--raw', '--no-abbrev', '-M', 'abcd', 'ef12',
+                                    stderr=None)
+    assert len(manifest) == 5
+
+
+def commit_files(path, files, message):
+    """Write files to the repo at path and commit them. None deletes a file."""
+    for name, content in files.items():
+        filepath = path.join(name)
+        if content is None:
+            filepath.remove()
+        else:
+            filepath.write(content, ensure=True)
+
+    check_call(['git', '-C', str(path), 'add', '-A'])
+    check_call(['git', '-C', str(path), '-c', 'user.name=Dude', '-c', 'user.email=dude@example.com',
+                'commit', '-q', '-m', message])
+
+
+def test_git_sync(tmpdir):
+    """Should sync from the last confirmed hash, even if the repo was pulled since."""
+    remote = tmpdir.mkdir('remote')
+    check_call(['git', 'init', '-q', str(remote)])
+    commit_files(remote, {'dude.txt': 'abides', 'walter.txt': 'shomer shabbos'}, 'first')
+
+    local = tmpdir.join('local')
+    local.mkdir()
+    local.join('stale.txt').write('not a repo yet')
+    g = git.GitRepo(str(local), str(remote), remote_name='dude')
+    manifest = g.sync()
+    assert manifest.is_full
+    assert manifest.modified_files == {'dude.txt', 'walter.txt'}
+    assert g.last_synced_hash is None
+    assert not local.join('stale.txt').exists()
+    g.set_last_synced_hash(manifest.new_hash)
+
+    commit_files(remote, {'dude.txt': 'still abides', 'walter.txt': None}, 'second')
+    manifest = g.sync()
+    assert not manifest.is_full
+    assert [c.path for c in manifest.modified] == ['dude.txt']
+    assert [c.path for c in manifest.deleted] == ['walter.txt']
+    assert manifest.modified[0].blob == g.git('rev-parse', 'HEAD:dude.txt')
+    # not confirmed, so the next sync has the same changes and more
+    commit_files(remote, {'donny.txt': 'out of his element'}, 'third')
+    manifest = g.sync()
+    assert manifest.modified_files == {'dude.txt', 'donny.txt'}
+    assert manifest.deleted_files == {'walter.txt'}
+    g.set_last_synced_hash(manifest.new_hash)
+
+    assert len(g.sync()) == 0
+    assert git.GitRepo(str(local)).last_synced_hash == manifest.new_hash
+    assert local.join('donny.txt').read() == 'out of his element'
+
+
+def test_git_sync_failed_files(tmpdir):
+    """Should list the files that failed at the last-synced commit as modified again."""
+    remote = tmpdir.mkdir('remote')
+    check_call(['git', 'init', '-q', str(remote)])
+    commit_files(remote, {'dude.txt': 'abides', 'walter.txt': 'shomer shabbos',
+                          'donny.txt': 'out of his element'}, 'first')
+
+    g = git.GitRepo(str(tmpdir.join('local')), str(remote), remote_name='dude')
+    manifest = g.sync()
+    g.set_last_synced_hash(manifest.new_hash, ['dude.txt', 'walter.txt'])
+    assert g.failed_files == {'dude.txt', 'walter.txt'}
+
+    commit_files(remote, {'walter.txt': None, 'donny.txt': 'shut up'}, 'second')
+    manifest = g.sync()
+    assert not manifest.is_full
+    assert manifest.modified_files == {'dude.txt', 'donny.txt'}
+    assert manifest.deleted_files == {'walter.txt'}
+    assert manifest.modified[0].blob == g.git('rev-parse', 'HEAD:donny.txt')
+    assert manifest.modified[1].blob == g.git('rev-parse', 'HEAD:dude.txt')
+
+    g.set_last_synced_hash(manifest.new_hash)
+    assert g.failed_files == set()
+    assert len(g.sync()) == 0
+
+
 # real output from git against the bedrock repo
 GIT_DIFF_TEST_DATA = """\
 A       docker/run.sh
@@ -204,3 +323,12 @@ R080    media/css/pebbles/components/modal.less media/css/pebbles/components/_mo
 A       media/css/pebbles/components/_sections.scss
 D       media/css/pebbles/base.less
 """
+
+GIT_RAW_DIFF_TEST_DATA = """\
+:000000 100644 0000000000000000000000000000000000000000 {b} A\tdocker/run.sh
+:100644 100644 {c} {d} M\tdocs/javascript-libs.rst
+:100644 100644 {e} {f} R072\tetc/supervisor_available/cron.conf\tetc/supervisor_available/cron_db.conf
+:100644 000000 {one} 0000000000000000000000000000000000000000 D\tmedia/css/pebbles/base.less
+:100644 100644 {two} {three} C080\tmedia/css/pebbles/elements/forms.less\tmedia/css/pebbles/base/elements/_forms.scss
+""".format(b='b' * 40, c='c' * 40, d='d' * 40, e='e' * 40, f='f' * 40,
+           one='1' * 40, two='2' * 40, three='3' * 40)
@@ -112,6 +112,8 @@ def schedul_l10n_jobs():
     @scheduled_job('interval', minutes=10)
     def update_locales():
         call_command('l10n_update')
+        call_command('l10n_compile --quiet')
+        call_command('l10n_store --quiet')
 
 
 if __name__ == '__main__':
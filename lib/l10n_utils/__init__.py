@@ -2,16 +2,15 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
-import re
 from os.path import splitext
 
 from django.conf import settings
 from django.http import HttpResponseRedirect
 from django.shortcuts import render as django_render
 from django.template import TemplateDoesNotExist
-from django.utils.translation.trans_real import parse_accept_lang_header
 
-from bedrock.base.urlresolvers import split_path
+from bedrock.base.timing import phase
+from bedrock.base.urlresolvers import accept_language, split_path
 
 from .dotlang import get_lang_path
 from .gettext import template_is_active, translations_for_template
@@ -36,6 +35,29 @@ def render(request, template, context=None, **kwargs):
     if isinstance(template, list):
         template = template[0]
 
+    with phase(request, 'render.negotiate'):
+        response, templates = _negotiate(request, template, context)
+
+    if response is not None:
+        return response
+
+    with phase(request, 'render.template'):
+        for tmpl in templates[:-1]:
+            try:
+                return django_render(request, tmpl, context, **kwargs)
+            except TemplateDoesNotExist:
+                pass
+
+        return django_render(request, templates[-1], context, **kwargs)
+
+
+def _negotiate(request, template, context):
+    """
+    Do the l10n work for rendering `template` for the request's locale.
+
+    Returns a redirect to another locale and None, or None and the
+    templates to try rendering in order.
+    """
     # Every template gets its own .lang file, so figure out what it is
     # and pass it in the context
     context['template'] = template
@@ -56,7 +78,7 @@ def render(request, template, context=None, **kwargs):
             # localized. This is useful especially for legal documents where the
             # content is translated in the external legal-docs repository.
             if context.get('localized', False):
-                return django_render(request, template, context, **kwargs)
+                return None, [template]
 
             matched = None
 
@@ -90,24 +112,18 @@ def render(request, template, context=None, **kwargs):
             # Add the Vary header to avoid wrong redirects due to a cache
             response['Vary'] = 'Accept-Language'
 
-            return response
+            return response, None
 
-        # Render try #1: Look for l10n template in locale/{{ LANG }}/templates/
-        l10n_tmpl = '%s/templates/%s' % (request.locale, template)
-        try:
-            return django_render(request, l10n_tmpl, context, **kwargs)
-        except TemplateDoesNotExist:
-            pass
+        return None, [
+            # Render try #1: Look for l10n template in locale/{{ LANG }}/templates/
+            '%s/templates/%s' % (request.locale, template),
+            # Render try #2: Look for locale-specific template in app/templates/
+            '.{}'.format(request.locale).join(splitext(template)),
+            # Render try #3: Render originally requested/default template
+            template,
+        ]
 
-        # Render try #2: Look for locale-specific template in app/templates/
-        locale_tmpl = '.{}'.format(request.locale).join(splitext(template))
-        try:
-            return django_render(request, locale_tmpl, context, **kwargs)
-        except TemplateDoesNotExist:
-            pass
-
-    # Render try #3: Render originally requested/default template
-    return django_render(request, template, context, **kwargs)
+    return None, [template]
 
 
 def get_locale(request):
@@ -118,31 +134,7 @@ def get_accept_languages(request):
     """
     Parse the user's Accept-Language HTTP header and return a list of languages
     """
-    languages = []
-    pattern = re.compile(r'^([A-Za-z]{2,3})(?:-([A-Za-z]{2})(?:-[A-Za-z0-9]+)?)?$')
-
-    try:
-        parsed = parse_accept_lang_header(request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
-    except ValueError:  # see https://code.djangoproject.com/ticket/21078
-        return languages
-
-    for lang, priority in parsed:
-        m = pattern.match(lang)
-
-        if not m:
-            continue
-
-        lang = m.group(1).lower()
-
-        # Check if the shorter code is supported. This covers obsolete long
-        # codes like fr-FR (should match fr) or ja-JP (should match ja)
-        if m.group(2) and lang not in settings.PROD_LANGUAGES:
-            lang += '-' + m.group(2).upper()
-
-        if lang not in languages:
-            languages.append(lang)
-
-    return languages
+    return accept_language.get_languages(request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
 
 
 class LangFilesMixin(object):
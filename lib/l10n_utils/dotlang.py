@@ -9,11 +9,23 @@ system.
 
 It caches them using the django caching library, but it could
 potentially just use thread-local variables. Caching seems safer at
-the expense of another caching layer."""
+the expense of another caching layer.
+
+Lookups for a locale and list of lang files go through a `Catalog`,
+which keeps the parsed files and the result for each string in process
+memory, so translating a string is usually a single dict lookup.
+
+If the shared translation store has been built with the `l10n_store`
+command, catalogs read translations from it instead of keeping parsed
+copies of the lang files in each process."""
 import codecs
-import inspect
+import hashlib
+import marshal
 import os
 import re
+import struct
+import sys
+import time
 from functools import partial
 
 from django.conf import settings
@@ -22,7 +34,9 @@ from django.utils.functional import lazy
 from jinja2 import Markup
 from product_details import product_details
 
+from bedrock.base.cache import LRUCache
 from lib.l10n_utils import translation
+from lib.l10n_utils.store import TranslationStore, write_store
 from lib.l10n_utils.utils import ContainsEverything, strip_whitespace
 
 ALL_THE_THINGS = ContainsEverything()
@@ -31,22 +45,35 @@ FORMAT_IDENTIFIER_RE = re.compile(r"""(%
                                       s)""", re.VERBOSE)
 TAG_REGEX = re.compile(r"^## ([\w-]+) ##")
 cache = caches['l10n']
-
-
-def parse(path, skip_untranslated=True, extract_comments=False):
+# Catalog instances keyed by (locale, tuple of lang file names)
+catalogs = {}
+# compiled lang files for a locale, written by the l10n_compile command
+COMPILED_LANG_FILE = '.compiled-lang.marshal'
+COMPILED_LANG_VERSION = 1
+# (mtime, data) for recently used compiled locales, keyed by path
+compiled_locales = LRUCache(10)
+# the current ActivationMatrix, see get_activation_matrix
+activation = {}
+# activation matrix for all workers, written by the l10n_update command
+ACTIVATION_FILE = '.activation-matrix'
+# (LANG_FILES, DOTLANG_FILES, extra lang files) keyed by module name
+module_lang_files = {}
+# shared translation store for all locales, written by the l10n_store command
+STORE_FILE = '.dotlang-store'
+# open TranslationStore instances keyed by path
+stores = {}
+
+
+def read_entries(path):
     """
-    Parse a dotlang file and return a dict of translations.
+    Read the translations in a dotlang file in file order.
+
     :param path: Absolute path to a lang file.
-    :param skip_untranslated: Exclude strings for which the ID and translation
-                              match.
-    :param extract_comments: Extract one line comments from template if True
-    :return: dict
+    :return: list of [comment, source, translation] lists, one per translation
+             line. `comment` is the last comment line since the previous
+             translation line, or None.
     """
-    trans = {}
-
-    if not os.path.exists(path):
-        return trans
-
+    entries = []
     with codecs.open(path, 'r', 'utf-8', errors='replace') as lines:
         source = None
         comment = None
@@ -69,14 +96,286 @@ def parse(path, skip_untranslated=True, extract_comments=False):
                 for tag in ('{ok}', '{l10n-extra}'):
                     if line.lower().endswith(tag):
                         line = line[:-len(tag)]
-                line = line.strip()
-                if skip_untranslated and source == line:
-                    continue
-                if extract_comments:
-                    trans[source] = [comment, line]
-                    comment = None
+                entries.append([comment, source, line.strip()])
+                comment = None
+
+    return entries
+
+
+def read_tags(path):
+    """
+    Read the tags at the top of a dotlang file.
+
+    :param path: Absolute path to a lang file.
+    :return: list of strings
+    """
+    tags = []
+    try:
+        with codecs.open(path, 'r', 'utf-8', errors='replace') as lines:
+            for line in lines:
+                # Filter out Byte order Mark
+                line = line.replace(u'\ufeff', '')
+                m = TAG_REGEX.match(line)
+                if m:
+                    tags.append(m.group(1))
                 else:
-                    trans[source] = line
+                    # Stop at the first non-tag line.
+                    break
+    except IOError:
+        pass
+
+    return tags
+
+
+def lang_files_signature(langs):
+    """
+    Return a hash of the names and mtimes of all lang files of the locales.
+
+    It changes whenever one of the lang files is added, removed or modified,
+    so the commands writing compiled data can skip locales that haven't
+    changed since.
+
+    :param langs: list of language codes
+    :return: string
+    """
+    locales_dir = os.path.join(settings.ROOT, 'locale')
+    files = []
+    for lang in langs:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(locales_dir, lang)):
+            for filename in filenames:
+                if filename.endswith('.lang'):
+                    path = os.path.join(dirpath, filename)
+                    files.append((os.path.relpath(path, locales_dir), repr(os.path.getmtime(path))))
+
+    return hashlib.sha1(repr(sorted(files))).hexdigest()
+
+
+def read_compiled_lang_file(compiled_path):
+    """Return the data in a compiled lang file, or None if it is missing or invalid."""
+    try:
+        with open(compiled_path, 'rb') as compiled_file:
+            data = marshal.load(compiled_file)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(data, dict) or data.get('version') != COMPILED_LANG_VERSION:
+        return None
+
+    return data
+
+
+def compiled_lang_files_current(lang):
+    """Return True if no lang file of the locale changed since it was last compiled."""
+    compiled_path = os.path.join(settings.ROOT, 'locale', lang, COMPILED_LANG_FILE)
+    data = read_compiled_lang_file(compiled_path)
+    return data is not None and data.get('signature') == lang_files_signature([lang])
+
+
+def compile_lang_files(lang):
+    """
+    Compile all of the lang files for a locale into one file for faster loading.
+
+    The compiled file is written to the locale directory and is used by
+    `parse` and `lang_file_tag_set` for any lang file that hasn't changed
+    since.
+
+    :param lang: the language code
+    :return: the number of lang files compiled
+    """
+    locale_dir = os.path.join(settings.ROOT, 'locale', lang)
+    signature = lang_files_signature([lang])
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(locale_dir):
+        for filename in filenames:
+            if filename.endswith('.lang'):
+                path = os.path.join(dirpath, filename)
+                files[os.path.relpath(path, locale_dir)] = {
+                    'tags': read_tags(path),
+                    'entries': read_entries(path),
+                }
+
+    compiled_path = os.path.join(locale_dir, COMPILED_LANG_FILE)
+    tmp_path = compiled_path + '.tmp'
+    with open(tmp_path, 'wb') as compiled_file:
+        marshal.dump({'version': COMPILED_LANG_VERSION, 'signature': signature, 'files': files},
+                     compiled_file)
+    os.rename(tmp_path, compiled_path)
+    return len(files)
+
+
+def compiled_lang_file(path):
+    """
+    Return the compiled data for a lang file if it is up-to-date.
+
+    :param path: Absolute path to a lang file.
+    :return: dict with 'tags' and 'entries' keys, or None if there is no
+             compiled file for the locale or the lang file changed since.
+    """
+    locales_dir = os.path.join(settings.ROOT, 'locale', '')
+    if not path.startswith(locales_dir):
+        return None
+
+    try:
+        lang, rel_path = path[len(locales_dir):].split(os.sep, 1)
+    except ValueError:
+        return None
+
+    compiled_path = os.path.join(locales_dir, lang, COMPILED_LANG_FILE)
+    try:
+        compiled_mtime = os.path.getmtime(compiled_path)
+        if os.path.getmtime(path) > compiled_mtime:
+            return None
+    except OSError:
+        return None
+
+    compiled = compiled_locales.get(compiled_path)
+    if compiled is None or compiled[0] != compiled_mtime:
+        data = read_compiled_lang_file(compiled_path)
+        if data is None:
+            return None
+
+        compiled = (compiled_mtime, data['files'])
+        compiled_locales.set(compiled_path, compiled)
+
+    return compiled[1].get(rel_path)
+
+
+def store_key(kind, lang, file_, *rest):
+    """
+    Return the key of a value in the translation store.
+
+    :param kind: 'M' for the mtime of the lang file when the store was built,
+                 'G' for its tags (one per line) or 'T' for a translation,
+                 in which case the source string is the last argument.
+                 'S' with an empty lang and file is the `lang_files_signature`
+                 of all stored locales.
+    """
+    return u'\x00'.join((kind, lang, file_) + rest)
+
+
+def build_store(langs):
+    """
+    Write the translations and tags of all lang files of the locales to
+    the shared translation store.
+
+    :param langs: list of language codes
+    :return: (number of keys written, estimated bytes the parsed lang
+             files and tag sets take in the memory of one process)
+    """
+    locales_dir = os.path.join(settings.ROOT, 'locale')
+    items = [(store_key('S', u'', u''), unicode(lang_files_signature(langs)))]
+    parsed_size = 0
+    for lang in langs:
+        locale_dir = os.path.join(locales_dir, lang)
+        for dirpath, dirnames, filenames in os.walk(locale_dir):
+            for filename in filenames:
+                if not filename.endswith('.lang'):
+                    continue
+
+                path = os.path.join(dirpath, filename)
+                file_ = os.path.splitext(os.path.relpath(path, locale_dir))[0]
+                tags = read_tags(path)
+                trans = parse(path)
+                items.append((store_key('M', lang, file_), unicode(repr(os.path.getmtime(path)))))
+                items.append((store_key('G', lang, file_), u'\n'.join(tags)))
+                for source, line in trans.iteritems():
+                    items.append((store_key('T', lang, file_, source), line))
+
+                parsed_size += sys.getsizeof(trans) + sys.getsizeof(set(tags))
+                parsed_size += sum(sys.getsizeof(s) for s in tags)
+                parsed_size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in trans.iteritems())
+
+    count = write_store(os.path.join(locales_dir, STORE_FILE), items)
+    return count, parsed_size
+
+
+def get_store():
+    """Return the shared translation store, or None if it hasn't been built."""
+    path = os.path.join(settings.ROOT, 'locale', STORE_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    store = stores.get(path)
+    if store is None or store.mtime != mtime:
+        try:
+            store = stores[path] = TranslationStore(path)
+        except (EnvironmentError, ValueError, struct.error):
+            return None
+
+    return store
+
+
+def store_is_up_to_date(langs):
+    """Return True if the store has all lang files of the locales as they are now."""
+    store = get_store()
+    return (store is not None and
+            store.get(store_key('S', u'', u'')) == lang_files_signature(langs))
+
+
+def store_is_current(store, lang, file_):
+    """Return True if the lang file hasn't changed since the store was built."""
+    path = os.path.join(settings.ROOT, 'locale', lang, '%s.lang' % file_)
+    try:
+        mtime = unicode(repr(os.path.getmtime(path)))
+    except OSError:
+        return False
+
+    return store.get(store_key('M', lang, file_)) == mtime
+
+
+class StoreLangFile(object):
+    """The translations of one lang file for a locale in the translation store."""
+    def __init__(self, store, lang, file_):
+        self.store = store
+        self.prefix = store_key('T', lang, file_, u'')
+
+    def get(self, text, default=None):
+        return self.store.get(self.prefix + text, default)
+
+    def __contains__(self, text):
+        return self.get(text) is not None
+
+    def __getitem__(self, text):
+        translation = self.get(text)
+        if translation is None:
+            raise KeyError(text)
+
+        return translation
+
+
+def parse(path, skip_untranslated=True, extract_comments=False):
+    """
+    Parse a dotlang file and return a dict of translations.
+    :param path: Absolute path to a lang file.
+    :param skip_untranslated: Exclude strings for which the ID and translation
+                              match.
+    :param extract_comments: Extract one line comments from template if True
+    :return: dict
+    """
+    trans = {}
+
+    if not os.path.exists(path):
+        return trans
+
+    compiled = compiled_lang_file(path)
+    if compiled is None:
+        entries = read_entries(path)
+    else:
+        entries = compiled['entries']
+
+    comment = None
+    for entry_comment, source, line in entries:
+        if entry_comment is not None:
+            comment = entry_comment
+        if skip_untranslated and source == line:
+            continue
+        if extract_comments:
+            trans[source] = [comment, line]
+            comment = None
+        else:
+            trans[source] = line
 
     return trans
 
@@ -97,6 +396,86 @@ def fix_case(locale):
         return '%s-%s' % (parts[0], parts[1].upper())
 
 
+def lang_file_translations(lang, file_):
+    """
+    Return the dict of translations in a lang file for a locale.
+
+    :param lang: the language code
+    :param file_: the relative lang file name
+    :return: dict
+    """
+    key = "dotlang-%s-%s" % (lang, file_)
+    trans = cache.get(key)
+    if trans is None:
+        path = os.path.join(settings.ROOT, 'locale', lang, '%s.lang' % file_)
+        trans = parse(path)
+        cache.set(key, trans, settings.DOTLANG_CACHE)
+
+    return trans
+
+
+class Catalog(object):
+    """
+    The translations from a list of lang files for a locale.
+
+    The first file in the list with a translation for a string wins. The
+    result for each string is memoized, so after the first lookup a
+    string costs one dict lookup. A catalog goes stale after
+    `settings.DOTLANG_CACHE` seconds so updated lang files are picked up.
+    """
+    def __init__(self, lang, files):
+        self.root = settings.ROOT
+        self.expires = time.time() + settings.DOTLANG_CACHE
+        self.files = []
+        self.results = {}
+        store = get_store()
+        for file_ in files:
+            if store is not None and store_is_current(store, lang, file_):
+                trans = StoreLangFile(store, lang, file_)
+            else:
+                trans = lang_file_translations(lang, file_)
+            self.files.append((os.path.join('locale', lang, '%s.lang' % file_), trans))
+
+    def is_stale(self):
+        return time.time() > self.expires or self.root != settings.ROOT
+
+    def translate(self, text):
+        try:
+            return self.results[text]
+        except KeyError:
+            pass
+
+        result = self.results[text] = self._translate(text)
+        return result
+
+    def _translate(self, text):
+        tweaked_text = strip_whitespace(text)
+
+        for rel_path, trans in self.files:
+            if tweaked_text in trans:
+                original = FORMAT_IDENTIFIER_RE.findall(text)
+                translated = FORMAT_IDENTIFIER_RE.findall(trans[tweaked_text])
+                if set(original) != set(translated):
+                    explanation = ('The translation has a different set of '
+                                   'replaced text (aka %s)')
+                    message = '%s\n\n%s\n%s' % (explanation, text,
+                                                trans[tweaked_text])
+                    mail_error(rel_path, message)
+                    return Markup(text)
+                return Markup(trans[tweaked_text])
+        return Markup(text)
+
+
+def get_catalog(lang, files):
+    """Return an up-to-date Catalog for the locale and list of lang files."""
+    key = (lang, tuple(files))
+    catalog = catalogs.get(key)
+    if catalog is None or catalog.is_stale():
+        catalog = catalogs[key] = Catalog(lang, files)
+
+    return catalog
+
+
 def translate(text, files):
     """Search a list of .lang files for a translation"""
     lang = fix_case(translation.get_language())
@@ -105,52 +484,61 @@ def translate(text, files):
     if lang == settings.LANGUAGE_CODE:
         return Markup(text)
 
-    tweaked_text = strip_whitespace(text)
+    return get_catalog(lang, files).translate(text)
+
 
-    for file_ in files:
-        key = "dotlang-%s-%s" % (lang, file_)
-        rel_path = os.path.join('locale', lang, '%s.lang' % file_)
+def get_module_lang_files(module_globals):
+    """
+    Return the extra lang files a module asks for with a `LANG_FILES` constant.
 
-        trans = cache.get(key)
-        if trans is None:
-            path = os.path.join(settings.ROOT, rel_path)
-            trans = parse(path)
-            cache.set(key, trans, settings.DOTLANG_CACHE)
+    The list is worked out once per module, and again only if the module
+    assigns a new `LANG_FILES` value or `settings.DOTLANG_FILES` changes.
 
-        if tweaked_text in trans:
-            original = FORMAT_IDENTIFIER_RE.findall(text)
-            translated = FORMAT_IDENTIFIER_RE.findall(trans[tweaked_text])
-            if set(original) != set(translated):
-                explanation = ('The translation has a different set of '
-                               'replaced text (aka %s)')
-                message = '%s\n\n%s\n%s' % (explanation, text,
-                                            trans[tweaked_text])
-                mail_error(rel_path, message)
-                return Markup(text)
-            return Markup(trans[tweaked_text])
-    return Markup(text)
+    :param module_globals: the module's `globals()`
+    :return: list of lang file names
+    """
+    # None rather than a new list each call, so modules without LANG_FILES hit the cache
+    new_lang_files = module_globals.get('LANG_FILES')
+    name = module_globals.get('__name__')
+    cached = module_lang_files.get(name)
+    if (cached is None or cached[0] is not new_lang_files or
+            cached[1] is not settings.DOTLANG_FILES):
+        lang_files = new_lang_files or []
+        if isinstance(lang_files, basestring):
+            lang_files = [lang_files]
+        lang_files = [lf for lf in lang_files if lf not in settings.DOTLANG_FILES]
+        cached = module_lang_files[name] = (new_lang_files, settings.DOTLANG_FILES, lang_files)
+
+    return cached[2][:]
 
 
 def _get_extra_lang_files():
-    frame = inspect.currentframe()
-    new_lang_files = []
-    if frame is None:
+    try:
+        # globals of the calling module. have to go back 2x to compensate
+        # for this function.
+        module_globals = sys._getframe(2).f_globals
+    except (AttributeError, ValueError):
         if settings.DEBUG:
             import warnings
             warnings.warn('Your Python runtime does not support the frame '
                           'stack. Extra LANG_FILES specified in Python '
                           'source files will not work.', RuntimeWarning)
-    else:
-        try:
-            # gets value of LANG_FILE constant in calling module if specified.
-            # have to go back 2x to compensate for this function.
-            new_lang_files = frame.f_back.f_back.f_globals.get('LANG_FILES', [])
-        finally:
-            del frame
-        if new_lang_files:
-            if isinstance(new_lang_files, basestring):
-                new_lang_files = [new_lang_files]
-    return [lf for lf in new_lang_files if lf not in settings.DOTLANG_FILES]
+        return []
+
+    return get_module_lang_files(module_globals)
+
+
+def _lang_files_arg(lang_files):
+    if isinstance(lang_files, list):
+        return lang_files[:]
+    return [lang_files]
+
+
+def _gettext(text, args, lang_files):
+    text = translate(text, lang_files + settings.DOTLANG_FILES)
+    if args:
+        text = text % args
+    return text
 
 
 def gettext(text, *args, **kwargs):
@@ -168,19 +556,11 @@ def gettext(text, *args, **kwargs):
         add that file for the whole module via the `LANG_FILES` constant.
     :return: translated string
     """
-    lang_files = kwargs.pop('lang_files', [])
-    if isinstance(lang_files, list):
-        lang_files = lang_files[:]
-    else:
-        lang_files = [lang_files]
+    lang_files = _lang_files_arg(kwargs.pop('lang_files', []))
     if not lang_files:
         lang_files += _get_extra_lang_files()
-    lang_files += settings.DOTLANG_FILES
 
-    text = translate(text, lang_files)
-    if args:
-        text = text % args
-    return text
+    return _gettext(text, args, lang_files)
 
 
 _lazy_proxy = lazy(gettext, unicode)
@@ -193,6 +573,27 @@ def gettext_lazy(*args, **kwargs):
     return _lazy_proxy(*args, **kwargs)
 
 
+def module_translator(module_globals):
+    """
+    Return `gettext` and `gettext_lazy` functions bound to a module, so its
+    `LANG_FILES` are found without looking at the call stack on each call.
+
+    Usage, after the module's `LANG_FILES`:
+    _, _lazy = module_translator(globals())
+
+    :param module_globals: the module's `globals()`
+    :return: (gettext, gettext_lazy)
+    """
+    def module_gettext(text, *args, **kwargs):
+        lang_files = _lang_files_arg(kwargs.pop('lang_files', []))
+        if not lang_files:
+            lang_files += get_module_lang_files(module_globals)
+
+        return _gettext(text, args, lang_files)
+
+    return module_gettext, lazy(module_gettext, unicode)
+
+
 # backward compat
 _ = gettext
 _lazy = gettext_lazy
@@ -225,7 +626,34 @@ def lang_file_is_active(path, lang=None):
     :param lang: the language code
     :return: bool
     """
-    return lang_file_has_tag(path, lang, 'active')
+    if settings.DEV or lang == settings.LANGUAGE_CODE:
+        return True
+
+    lang = lang or fix_case(translation.get_language())
+    matrix = get_activation_matrix()
+    return matrix.is_active(matrix.lang_file_mask(path), lang)
+
+
+def read_lang_file_tags(lang, path):
+    """
+    Read the tags of a lang file from the translation store, the compiled
+    lang files or the lang file itself, whichever is up-to-date.
+
+    :param lang: the language code
+    :param path: the relative lang file name
+    :return: set of strings
+    """
+    store = get_store()
+    if store is not None and store_is_current(store, lang, path):
+        tags = store.get(store_key('G', lang, path))
+        return set(tags.split(u'\n')) if tags else set()
+
+    fpath = os.path.join(settings.ROOT, 'locale', lang, '%s.lang' % path)
+    compiled = compiled_lang_file(fpath)
+    if compiled is None:
+        return set(read_tags(fpath))
+
+    return set(compiled['tags'])
 
 
 def lang_file_tag_set(path, lang=None):
@@ -239,26 +667,10 @@ def lang_file_tag_set(path, lang=None):
         return ALL_THE_THINGS
 
     lang = lang or fix_case(translation.get_language())
-    rel_path = os.path.join('locale', lang, '%s.lang' % path)
-    cache_key = 'tag:%s' % rel_path
+    cache_key = 'tag:%s' % os.path.join('locale', lang, '%s.lang' % path)
     tag_set = cache.get(cache_key)
     if tag_set is None:
-        tag_set = set()
-        fpath = os.path.join(settings.ROOT, rel_path)
-        try:
-            with codecs.open(fpath, 'r', 'utf-8', errors='replace') as lines:
-                for line in lines:
-                    # Filter out Byte order Mark
-                    line = line.replace(u'\ufeff', '')
-                    m = TAG_REGEX.match(line)
-                    if m:
-                        tag_set.add(m.group(1))
-                    else:
-                        # Stop at the first non-tag line.
-                        break
-        except IOError:
-            pass
-
+        tag_set = read_lang_file_tags(lang, path)
         cache.set(cache_key, tag_set, settings.DOTLANG_CACHE)
 
     return tag_set
@@ -280,25 +692,169 @@ def lang_file_has_tag(path, lang=None, tag='active'):
     return tag in lang_file_tag_set(path, lang)
 
 
-def get_translations_for_langfile(langfile):
+def get_locale_dirs():
+    """Return the sorted names of the locale directories in the locale repo."""
+    locale_dir = os.path.join(settings.ROOT, 'locale')
+    try:
+        names = os.listdir(locale_dir)
+    except OSError:
+        return []
+
+    return [lang for lang in sorted(names)
+            if lang != 'templates' and lang[0] != '.' and
+            os.path.isdir(os.path.join(locale_dir, lang))]
+
+
+class ActivationMatrix(object):
     """
-    Return the list of available translations for the langfile.
+    Which locales each lang file is active in.
+
+    Every locale directory gets a bit, and every lang file a bitmap of the
+    locales in which it has the 'active' tag, read once from the tags of
+    all lang files. Checking whether a lang file or template is active, or
+    listing its translations, then needs no file access. Templates are
+    added to `templates` by `lib.l10n_utils.gettext` the first time they
+    are checked.
+
+    The `l10n_update` command writes the matrix to `ACTIVATION_FILE` after
+    updating the lang files, and `get_activation_matrix` loads it again
+    when that file changes, so requests never have to read the tags.
+    """
+    def __init__(self, bits, masks, mtime=None, signature=None):
+        self.root = settings.ROOT
+        self.settings = (settings.DEV, settings.LANGUAGE_CODE, settings.PROD_LANGUAGES)
+        self.mtime = mtime
+        self.next_check = 0
+        self.signature = signature
+        self.bits = bits
+        self.masks = masks
+        self.templates = {}
+        self.translations = {}
+
+    @classmethod
+    def build(cls, mtime=None):
+        """Return a matrix read from the tags of the lang files."""
+        langs = get_locale_dirs()
+        bits = {}
+        masks = {}
+        for i, lang in enumerate(langs):
+            bit = bits[lang] = 1 << i
+            locale_dir = os.path.join(settings.ROOT, 'locale', lang)
+            for dirpath, dirnames, filenames in os.walk(locale_dir):
+                for filename in filenames:
+                    if not filename.endswith('.lang'):
+                        continue
+
+                    path = os.path.join(dirpath, filename)
+                    file_ = os.path.splitext(os.path.relpath(path, locale_dir))[0]
+                    if 'active' in read_lang_file_tags(lang, file_):
+                        masks[file_] = masks.get(file_, 0) | bit
+
+        return cls(bits, masks, mtime, lang_files_signature(langs))
+
+    @classmethod
+    def load(cls, path, mtime):
+        """Return the matrix saved in a file, or None if it is invalid."""
+        try:
+            with open(path, 'rb') as matrix_file:
+                data = marshal.load(matrix_file)
+            return cls(data['bits'], data['masks'], mtime, data['signature'])
+        except (IOError, EOFError, ValueError, TypeError, KeyError):
+            return None
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as matrix_file:
+            marshal.dump({'bits': self.bits, 'masks': self.masks, 'signature': self.signature},
+                         matrix_file)
+        os.rename(tmp_path, path)
+
+    def settings_changed(self):
+        current = (settings.DEV, settings.LANGUAGE_CODE, settings.PROD_LANGUAGES)
+        return (self.root != settings.ROOT or
+                any(a is not b for a, b in zip(self.settings, current)))
+
+    def is_stale(self, mtime):
+        return mtime != self.mtime or self.settings_changed()
+
+    def lang_file_mask(self, langfile):
+        return self.masks.get(langfile, 0)
+
+    def is_active(self, mask, lang):
+        return bool(mask & self.bits.get(lang, 0))
+
+    def get_translations(self, mask):
+        """
+        Return the production locales active in a bitmap.
+
+        :return: dict, like {'en-US': 'English (US)', 'fr': 'Français'}
+        """
+        translations = self.translations.get(mask)
+        if translations is None:
+            translations = self.translations[mask] = {}
+            for lang in settings.PROD_LANGUAGES:
+                if (lang in product_details.languages and
+                        (settings.DEV or lang == settings.LANGUAGE_CODE or
+                         self.is_active(mask, lang))):
+                    translations[lang] = product_details.languages[lang]['native']
 
-    :param langfile: the path to a lang file, retrieved with get_lang_path()
-    :return: dict, like {'en-US': 'English (US)', 'fr': 'Français'}
+        return translations
+
+
+def get_activation_matrix():
     """
+    Return the current ActivationMatrix.
 
-    cache_key = 'translations:%s' % langfile
-    translations = cache.get(cache_key, {})
+    The matrix is reloaded when the file written by `update_activation_matrix`
+    changes, which is checked at most once every `settings.DOTLANG_CACHE`
+    seconds, so most calls touch no files. Without that file it is read from
+    the lang files once, usually when the WSGI app is loaded, and only
+    replaced once `l10n_update` writes the file or the process restarts.
+    """
+    matrix = activation.get('matrix')
+    if (matrix is not None and time.time() < matrix.next_check and
+            not matrix.settings_changed()):
+        return matrix
 
-    if translations:
-        return translations
+    path = os.path.join(settings.ROOT, 'locale', ACTIVATION_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
 
-    for lang in settings.PROD_LANGUAGES:
-        if (lang in product_details.languages and
-                (lang == settings.LANGUAGE_CODE or
-                 lang_file_is_active(langfile, lang))):
-            translations[lang] = product_details.languages[lang]['native']
+    if matrix is None or matrix.is_stale(mtime):
+        if mtime is not None:
+            matrix = ActivationMatrix.load(path, mtime)
+        if matrix is None or matrix.is_stale(mtime):
+            matrix = ActivationMatrix.build(mtime)
+        activation['matrix'] = matrix
 
-    cache.set(cache_key, translations, settings.DOTLANG_CACHE)
-    return translations
+    matrix.next_check = time.time() + settings.DOTLANG_CACHE
+    return matrix
+
+
+def update_activation_matrix():
+    """
+    Write the activation matrix for all workers to load, unless no lang
+    file was added, removed or modified since it was last written.
+
+    :return: True if the matrix was written
+    """
+    path = os.path.join(settings.ROOT, 'locale', ACTIVATION_FILE)
+    saved = ActivationMatrix.load(path, None)
+    if saved is not None and saved.signature == lang_files_signature(get_locale_dirs()):
+        return False
+
+    ActivationMatrix.build().save(path)
+    return True
+
+
+def get_translations_for_langfile(langfile):
+    """
+    Return the list of available translations for the langfile.
+
+    :param langfile: the path to a lang file, retrieved with get_lang_path()
+    :return: dict, like {'en-US': 'English (US)', 'fr': 'Français'}
+    """
+    matrix = get_activation_matrix()
+    return matrix.get_translations(matrix.lang_file_mask(langfile))
@@ -17,8 +17,8 @@ from django.core.cache import caches
 from django.template.loader import get_template
 from jinja2 import Environment
 
-from dotlang import (parse as parse_lang, get_lang_path,
-                     get_translations_for_langfile, lang_file_tag_set)
+from dotlang import (parse as parse_lang, get_activation_matrix, get_lang_path,
+                     lang_file_tag_set)
 from lib.l10n_utils.utils import ContainsEverything
 
 
@@ -178,16 +178,34 @@ def parse_template(path):
     return []
 
 
-def _get_template_tag_set(lang, path):
+def template_lang_files(path):
+    """Return the template's own lang file followed by the ones it sets."""
     lang_files = [get_lang_path(path)]
     template = get_template(path)
     lang_files.extend(parse_template(template.template.filename))
+    return lang_files
+
+
+def _get_template_tag_set(lang, path):
     tag_set = set()
-    for lf in lang_files:
+    for lf in template_lang_files(path):
         tag_set |= lang_file_tag_set(lf, lang)
     return tag_set
 
 
+def _get_template_mask(path):
+    """Return the activation matrix and the template's bitmap of active locales."""
+    matrix = get_activation_matrix()
+    mask = matrix.templates.get(path)
+    if mask is None:
+        mask = 0
+        for lf in template_lang_files(path):
+            mask |= matrix.lang_file_mask(lf)
+        matrix.templates[path] = mask
+
+    return matrix, mask
+
+
 def template_tag_set(path, lang):
     """Given a template path, return a set of tags from the lang files for the lang.
 
@@ -233,7 +251,11 @@ def template_is_active(path, lang):
     :param lang: language code
     :return: boolean
     """
-    return template_has_tag(path, lang, 'active')
+    if settings.DEV or lang == settings.LANGUAGE_CODE:
+        return True
+
+    matrix, mask = _get_template_mask(path)
+    return matrix.is_active(mask, lang)
 
 
 def translations_for_template(template_name):
@@ -243,14 +265,8 @@ def translations_for_template(template_name):
     :param template_name: name of the template passed to render.
     :return: dict, like {'en-US': 'English (US)', 'fr': 'Français'}
     """
-    lang_files = [get_lang_path(template_name)]
-    template = get_template(template_name)
-    lang_files.extend(parse_template(template.template.filename))
-    active_translations = {}
-    for lf in lang_files:
-        active_translations.update(get_translations_for_langfile(lf))
-
-    return active_translations
+    matrix, mask = _get_template_mask(template_name)
+    return matrix.get_translations(mask)
 
 
 def langfiles_for_path(path):
@@ -0,0 +1,35 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.core.management.base import BaseCommand
+
+from lib.l10n_utils.dotlang import (compile_lang_files, compiled_lang_files_current,
+                                    get_locale_dirs)
+
+
+class Command(BaseCommand):
+    help = 'Compiles the .lang files of each locale into one file that loads faster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('locales', nargs='*',
+                            help='Locales to compile. Defaults to all of them.')
+        parser.add_argument('-q', '--quiet', action='store_true', dest='quiet', default=False,
+                            help='If no error occurs, swallow all output.')
+        parser.add_argument('-f', '--force', action='store_true', dest='force', default=False,
+                            help='Compile locales even if none of their lang files changed.')
+
+    def handle(self, *args, **options):
+        langs = options['locales']
+        if not langs:
+            langs = get_locale_dirs()
+
+        for lang in langs:
+            if not options['force'] and compiled_lang_files_current(lang):
+                if not options['quiet']:
+                    self.stdout.write('{0}: up to date'.format(lang))
+                continue
+
+            count = compile_lang_files(lang)
+            if not options['quiet']:
+                self.stdout.write('{0}: compiled {1} lang files'.format(lang, count))
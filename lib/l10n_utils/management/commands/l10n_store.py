@@ -0,0 +1,46 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+import os
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from decouple import config
+
+from lib.l10n_utils.dotlang import (STORE_FILE, build_store, get_locale_dirs,
+                                    store_is_up_to_date)
+
+
+def megabytes(size):
+    return size / 1024.0 / 1024.0
+
+
+class Command(BaseCommand):
+    help = 'Builds the translation store that all processes share through memory mapping'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-q', '--quiet', action='store_true', dest='quiet', default=False,
+                            help='If no error occurs, swallow all output.')
+        parser.add_argument('-f', '--force', action='store_true', dest='force', default=False,
+                            help='Rebuild the store even if no lang file changed.')
+
+    def handle(self, *args, **options):
+        locale_dir = os.path.join(settings.ROOT, 'locale')
+        langs = get_locale_dirs()
+        if not options['force'] and store_is_up_to_date(langs):
+            if not options['quiet']:
+                self.stdout.write('The store is up to date')
+            return
+
+        count, parsed_size = build_store(langs)
+        if options['quiet']:
+            return
+
+        workers = config('WEB_CONCURRENCY', default=2, cast=int)
+        store_size = os.path.getsize(os.path.join(locale_dir, STORE_FILE))
+        self.stdout.write('Stored {0} keys for {1} locales in {2:.1f} MB shared by all workers'.format(
+            count, len(langs), megabytes(store_size)))
+        self.stdout.write('Memory saved: ~{0:.1f} MB per worker, ~{1:.1f} MB for {2} workers'.format(
+            megabytes(parsed_size), megabytes(parsed_size * workers), workers))
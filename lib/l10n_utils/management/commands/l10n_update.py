@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 
 from bedrock.utils.git import GitRepo
+from lib.l10n_utils.dotlang import update_activation_matrix
 
 
 class Command(BaseCommand):
@@ -16,3 +17,4 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         repo = GitRepo(settings.LOCALES_PATH, settings.LOCALES_REPO)
         repo.update()
+        update_activation_matrix()
@@ -0,0 +1,116 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""A read-only key/value file that is memory mapped instead of loaded.
+
+All processes that open the same store file share its pages through the
+OS page cache, so the data isn't copied into each process. Keys and
+values are unicode strings.
+
+The file is a header, an open addressing hash table of
+(crc32 of key, record offset) buckets, then the records, each one the
+lengths of the utf-8 encoded key and value followed by the two."""
+import mmap
+import os
+import struct
+import zlib
+
+
+MAGIC = 'BDLS'
+VERSION = 1
+HEADER = struct.Struct('<4sII')
+BUCKET = struct.Struct('<II')
+RECORD = struct.Struct('<II')
+
+
+def _hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+
+def write_store(path, items):
+    """
+    Write a store file atomically.
+
+    :param path: Absolute path of the store file.
+    :param items: iterable of (key, value) unicode string pairs.
+    :return: number of keys written.
+    """
+    records = []
+    seen = set()
+    for key, value in items:
+        key = key.encode('utf-8')
+        if key not in seen:
+            seen.add(key)
+            records.append((key, value.encode('utf-8')))
+
+    bucket_count = 1
+    while bucket_count < len(records) * 2:
+        bucket_count *= 2
+    mask = bucket_count - 1
+
+    buckets = [(0, 0)] * bucket_count
+    offset = HEADER.size + BUCKET.size * bucket_count
+    for key, value in records:
+        key_hash = _hash(key)
+        index = key_hash & mask
+        while buckets[index][1]:
+            index = (index + 1) & mask
+        buckets[index] = (key_hash, offset)
+        offset += RECORD.size + len(key) + len(value)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as store_file:
+        store_file.write(HEADER.pack(MAGIC, VERSION, bucket_count))
+        for bucket in buckets:
+            store_file.write(BUCKET.pack(*bucket))
+        for key, value in records:
+            store_file.write(RECORD.pack(len(key), len(value)))
+            store_file.write(key)
+            store_file.write(value)
+    os.rename(tmp_path, path)
+    return len(records)
+
+
+class TranslationStore(object):
+    """A memory mapped store file opened for reading."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as store_file:
+            self.mtime = os.fstat(store_file.fileno()).st_mtime
+            self._map = mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, bucket_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError('%s is not a version %s store file' % (path, VERSION))
+
+        self._mask = bucket_count - 1
+
+    @property
+    def size(self):
+        return len(self._map)
+
+    def get(self, key, default=None):
+        key = key.encode('utf-8')
+        key_hash = _hash(key)
+        index = key_hash & self._mask
+        while True:
+            bucket_hash, offset = BUCKET.unpack_from(self._map, HEADER.size + BUCKET.size * index)
+            if not offset:
+                return default
+
+            if bucket_hash == key_hash:
+                key_len, value_len = RECORD.unpack_from(self._map, offset)
+                start = offset + RECORD.size
+                if self._map[start:start + key_len] == key:
+                    start += key_len
+                    return self._map[start:start + value_len].decode('utf-8')
+
+            index = (index + 1) & self._mask
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def close(self):
+        self._map.close()
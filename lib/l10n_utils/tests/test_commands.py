@@ -6,15 +6,23 @@
 from __future__ import unicode_literals
 
 import codecs
+import os
+import shutil
+import tempfile
 from os import path
 from StringIO import StringIO
 from textwrap import dedent
 
 from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 
 from mock import ANY, MagicMock, Mock, patch
 
+from lib.l10n_utils.dotlang import (ACTIVATION_FILE, COMPILED_LANG_FILE, STORE_FILE, Catalog,
+                                    StoreLangFile, compiled_lang_file, get_activation_matrix,
+                                    lang_file_tag_set, parse, read_tags,
+                                    update_activation_matrix)
 from lib.l10n_utils.gettext import _append_to_lang_file, merge_lang_files
 from lib.l10n_utils.management.commands.l10n_check import (
     get_todays_version,
@@ -375,3 +383,221 @@ class Testl10nMerge(TestCase):
         _append_to_lang_file('dude.lang', msgs)
         mock_write.assert_called_once_with(
             u'\n\n;{msg}\n{msg}\n'.format(msg=msgs[0]))
+
+
+class TestL10nCompile(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        shutil.copytree(path.join(ROOT, 'locale'), path.join(self.root, 'locale'))
+        self.settings_override = override_settings(ROOT=self.root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.root)
+
+    def lang_path(self, *args):
+        return path.join(self.root, 'locale', *args)
+
+    def test_compile_all_locales(self):
+        out = StringIO()
+        call_command('l10n_compile', stdout=out)
+        self.assertIn('de: compiled 6 lang files', out.getvalue())
+        for lang in ('de', 'en-GB', 'es-ES', 'fr'):
+            self.assertTrue(path.exists(self.lang_path(lang, COMPILED_LANG_FILE)))
+        self.assertFalse(path.exists(self.lang_path('templates', COMPILED_LANG_FILE)))
+
+    def test_compiled_matches_source(self):
+        """Parsing the compiled data should give the same result as the lang files."""
+        lang_files = [self.lang_path('de', 'main.lang'),
+                      self.lang_path('de', 'firefox', 'fx.lang'),
+                      self.lang_path('de', 'active_de_lang_file_bom.lang')]
+        options = [{}, {'skip_untranslated': False}, {'extract_comments': True},
+                   {'skip_untranslated': False, 'extract_comments': True}]
+        source = [[parse(lang_file, **kwargs) for kwargs in options] for lang_file in lang_files]
+        tags = [read_tags(lang_file) for lang_file in lang_files]
+
+        call_command('l10n_compile', 'de', quiet=True)
+        for i, lang_file in enumerate(lang_files):
+            compiled = compiled_lang_file(lang_file)
+            self.assertIsNotNone(compiled)
+            self.assertEqual(compiled['tags'], tags[i])
+            with patch('lib.l10n_utils.dotlang.read_entries') as read_entries:
+                self.assertEqual([parse(lang_file, **kwargs) for kwargs in options], source[i])
+                self.assertFalse(read_entries.called)
+
+    def test_changed_lang_file_not_compiled(self):
+        """A lang file modified after compiling should be read from the source."""
+        call_command('l10n_compile', 'de', quiet=True)
+        lang_file = self.lang_path('de', 'main.lang')
+        compiled_mtime = path.getmtime(self.lang_path('de', COMPILED_LANG_FILE))
+        with codecs.open(lang_file, 'a', 'utf-8') as lines:
+            lines.write(';The Dude abides.\nDer Dude bleibt.\n')
+        os.utime(lang_file, (compiled_mtime + 10, compiled_mtime + 10))
+
+        self.assertIsNone(compiled_lang_file(lang_file))
+        self.assertEqual(parse(lang_file)['The Dude abides.'], 'Der Dude bleibt.')
+
+    def test_unchanged_locale_not_compiled(self):
+        call_command('l10n_compile', 'de', quiet=True)
+        out = StringIO()
+        with patch('lib.l10n_utils.management.commands.l10n_compile.compile_lang_files') as compile_:
+            call_command('l10n_compile', 'de', stdout=out)
+            self.assertFalse(compile_.called)
+            self.assertIn('de: up to date', out.getvalue())
+
+            call_command('l10n_compile', 'de', force=True, quiet=True)
+            compile_.assert_called_once_with('de')
+
+    def test_changed_locale_compiled(self):
+        """Adding, removing or modifying a lang file should recompile the locale."""
+        call_command('l10n_compile', 'de', quiet=True)
+        lang_file = self.lang_path('de', 'main.lang')
+        os.utime(lang_file, (1, 1))
+        out = StringIO()
+        call_command('l10n_compile', 'de', stdout=out)
+        self.assertIn('de: compiled 6 lang files', out.getvalue())
+
+        os.remove(lang_file)
+        out = StringIO()
+        call_command('l10n_compile', 'de', stdout=out)
+        self.assertIn('de: compiled 5 lang files', out.getvalue())
+
+    def test_no_compiled_file(self):
+        self.assertIsNone(compiled_lang_file(self.lang_path('de', 'main.lang')))
+        self.assertIsNone(compiled_lang_file(path.join(ROOT, 'test.lang')))
+
+
+@override_settings(DEV=False)
+class TestL10nStore(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        shutil.copytree(path.join(ROOT, 'locale'), path.join(self.root, 'locale'))
+        self.settings_override = override_settings(ROOT=self.root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.root)
+
+    def lang_path(self, *args):
+        return path.join(self.root, 'locale', *args)
+
+    def test_report(self):
+        out = StringIO()
+        call_command('l10n_store', stdout=out)
+        self.assertTrue(path.exists(self.lang_path(STORE_FILE)))
+        self.assertIn('locales', out.getvalue())
+        self.assertIn('MB per worker', out.getvalue())
+
+    def test_unchanged_store_not_rebuilt(self):
+        call_command('l10n_store', quiet=True)
+        out = StringIO()
+        with patch('lib.l10n_utils.management.commands.l10n_store.build_store') as build_store:
+            call_command('l10n_store', stdout=out)
+            self.assertFalse(build_store.called)
+            self.assertIn('The store is up to date', out.getvalue())
+
+            build_store.return_value = (0, 0)
+            call_command('l10n_store', force=True, quiet=True)
+            self.assertTrue(build_store.called)
+
+    def test_changed_lang_file_rebuilds_store(self):
+        call_command('l10n_store', quiet=True)
+        os.utime(self.lang_path('de', 'main.lang'), (1, 1))
+        with patch('lib.l10n_utils.management.commands.l10n_store.build_store') as build_store:
+            build_store.return_value = (0, 0)
+            call_command('l10n_store', quiet=True)
+            self.assertTrue(build_store.called)
+
+    @patch('lib.l10n_utils.dotlang.cache.get', Mock(return_value=None))
+    def test_store_matches_source(self):
+        """Catalogs and tag sets should read the same data from the store."""
+        files = ['main', 'firefox/fx', 'active_de_lang_file_bom']
+        source = [parse(self.lang_path('de', '%s.lang' % file_)) for file_ in files]
+        tags = [lang_file_tag_set(file_, 'de') for file_ in files]
+
+        call_command('l10n_store', quiet=True)
+        catalog = Catalog('de', files)
+        for i, (rel_path, trans) in enumerate(catalog.files):
+            self.assertIsInstance(trans, StoreLangFile)
+            for text, translation in source[i].items():
+                self.assertEqual(trans.get(text), translation)
+            self.assertIsNone(trans.get('The Dude abides.'))
+            with patch('lib.l10n_utils.dotlang.read_tags') as read_tags:
+                self.assertEqual(lang_file_tag_set(files[i], 'de'), tags[i])
+                self.assertFalse(read_tags.called)
+
+    @patch('lib.l10n_utils.dotlang.cache.get', Mock(return_value=None))
+    def test_changed_lang_file_not_from_store(self):
+        """A lang file modified after building the store should be read from the source."""
+        call_command('l10n_store', quiet=True)
+        lang_file = self.lang_path('de', 'main.lang')
+        store_mtime = path.getmtime(self.lang_path(STORE_FILE))
+        with codecs.open(lang_file, 'a', 'utf-8') as lines:
+            lines.write(';The Dude abides.\nDer Dude bleibt.\n')
+        os.utime(lang_file, (store_mtime + 10, store_mtime + 10))
+
+        trans = Catalog('de', ['main']).files[0][1]
+        self.assertIsInstance(trans, dict)
+        self.assertEqual(trans['The Dude abides.'], 'Der Dude bleibt.')
+
+
+@override_settings(DEV=False)
+@patch.dict('lib.l10n_utils.dotlang.activation', clear=True)
+class TestL10nUpdate(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        shutil.copytree(path.join(ROOT, 'locale'), path.join(self.root, 'locale'))
+        self.settings_override = override_settings(ROOT=self.root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.root)
+
+    def lang_path(self, *args):
+        return path.join(self.root, 'locale', *args)
+
+    @patch('lib.l10n_utils.management.commands.l10n_update.GitRepo')
+    def test_writes_activation_matrix(self, git_repo):
+        """Workers should load the matrix written by the command instead of reading tags."""
+        call_command('l10n_update')
+        git_repo.return_value.update.assert_called_once_with()
+        self.assertTrue(path.exists(self.lang_path(ACTIVATION_FILE)))
+
+        with patch('lib.l10n_utils.dotlang.read_lang_file_tags') as read_tags_mock:
+            matrix = get_activation_matrix()
+            self.assertFalse(read_tags_mock.called)
+        self.assertTrue(matrix.is_active(matrix.lang_file_mask('active_de_lang_file'), 'de'))
+        self.assertFalse(matrix.is_active(matrix.lang_file_mask('inactive_de_lang_file'), 'de'))
+
+    def test_unchanged_matrix_not_written(self):
+        self.assertTrue(update_activation_matrix())
+        self.assertFalse(update_activation_matrix())
+        os.utime(self.lang_path('de', 'main.lang'), (1, 1))
+        self.assertTrue(update_activation_matrix())
+
+    def test_matrix_reloaded_when_written(self):
+        update_activation_matrix()
+        matrix = get_activation_matrix()
+        self.assertIs(get_activation_matrix(), matrix)
+
+        matrix_mtime = path.getmtime(self.lang_path(ACTIVATION_FILE))
+        os.utime(self.lang_path(ACTIVATION_FILE), (matrix_mtime + 10, matrix_mtime + 10))
+        # the file is only checked every DOTLANG_CACHE seconds
+        with patch('lib.l10n_utils.dotlang.os.path.getmtime') as getmtime:
+            self.assertIs(get_activation_matrix(), matrix)
+            self.assertFalse(getmtime.called)
+
+        matrix.next_check = 0
+        with patch('lib.l10n_utils.dotlang.read_lang_file_tags') as read_tags_mock:
+            self.assertIsNot(get_activation_matrix(), matrix)
+            self.assertFalse(read_tags_mock.called)
+
+    def test_matrix_without_file_not_rebuilt(self):
+        """Without the file the matrix is read from the lang files once."""
+        matrix = get_activation_matrix()
+        with patch('lib.l10n_utils.dotlang.read_lang_file_tags') as read_tags_mock:
+            self.assertIs(get_activation_matrix(), matrix)
+            self.assertFalse(read_tags_mock.called)
@@ -20,8 +20,10 @@ from pyquery import PyQuery as pq
 
 from bedrock.mozorg.tests import TestCase
 from lib.l10n_utils import render
-from lib.l10n_utils.dotlang import (_, _lazy, FORMAT_IDENTIFIER_RE, lang_file_has_tag,
-                                    lang_file_is_active, parse, translate)
+from lib.l10n_utils.dotlang import (_, _lazy, FORMAT_IDENTIFIER_RE, get_catalog,
+                                    get_module_lang_files, get_translations_for_langfile,
+                                    lang_file_has_tag, lang_file_is_active, module_lang_files,
+                                    module_translator, parse, translate)
 from lib.l10n_utils.extract import extract_python
 
 
@@ -51,6 +53,22 @@ class TestLangFilesActivation(TestCase):
         ok_(not lang_file_is_active('inactive_de_lang_file', 'de'))
         ok_(not lang_file_is_active('does_not_exist', 'de'))
 
+    @patch.dict('lib.l10n_utils.dotlang.activation', clear=True)
+    @patch.object(settings, 'PROD_LANGUAGES', ('de', 'en-US', 'fr'))
+    def test_get_translations_for_langfile(self):
+        """
+        `get_translations_for_langfile` should list the default locale and
+        the locales the lang file is active in, without reading files again.
+        """
+        expected = {'de': product_details.languages['de']['native'],
+                    'en-US': product_details.languages['en-US']['native']}
+        eq_(get_translations_for_langfile('active_de_lang_file'), expected)
+        with patch('lib.l10n_utils.dotlang.read_tags') as read_tags_mock:
+            eq_(get_translations_for_langfile('active_de_lang_file'), expected)
+            eq_(get_translations_for_langfile('inactive_de_lang_file'),
+                {'en-US': product_details.languages['en-US']['native']})
+            ok_(not read_tags_mock.called)
+
     def test_lang_file_has_tag(self):
         """
         `lang_file_has_tag` should return true if lang file has the
@@ -362,6 +380,45 @@ class TestDotlang(TestCase):
         trans_patch.assert_called_with(dirty_string, ['donnie', 'walter'] +
                                        settings.DOTLANG_FILES)
 
+    @patch('lib.l10n_utils.dotlang.translate')
+    def test_module_translator(self, trans_patch):
+        """
+        The functions from `module_translator` should search the .lang files
+        of the module they were made for, including a new `LANG_FILES`.
+        """
+        module_globals = {'__name__': 'the.dude', 'LANG_FILES': 'maude'}
+        gettext, gettext_lazy = module_translator(module_globals)
+        trans_str = 'Translate me'
+        gettext(trans_str)
+        trans_patch.assert_called_with(trans_str, ['maude'] + settings.DOTLANG_FILES)
+
+        gettext(trans_str, lang_files=['bunny'])
+        trans_patch.assert_called_with(trans_str, ['bunny'] + settings.DOTLANG_FILES)
+
+        module_globals['LANG_FILES'] = ['donnie', settings.DOTLANG_FILES[0]]
+        # have to call __unicode__ directly because the value is a Mock
+        # object, and the `unicode()` function throws an exception.
+        gettext_lazy(trans_str).__unicode__()
+        trans_patch.assert_called_with(trans_str, ['donnie'] + settings.DOTLANG_FILES)
+
+    @patch('lib.l10n_utils.dotlang.translate')
+    @patch('lib.l10n_utils.dotlang.sys._getframe')
+    def test_module_translator_skips_frame(self, getframe_patch, trans_patch):
+        gettext, gettext_lazy = module_translator({'__name__': 'the.dude'})
+        gettext('Translate me')
+        gettext_lazy('Translate me').__unicode__()
+        self.assertFalse(getframe_patch.called)
+        trans_patch.assert_called_with('Translate me', settings.DOTLANG_FILES)
+
+    @patch.dict('lib.l10n_utils.dotlang.module_lang_files', clear=True)
+    def test_module_lang_files_cached_without_lang_files(self):
+        """A module without `LANG_FILES` should also be worked out only once."""
+        module_globals = {'__name__': 'the.dude'}
+        self.assertEqual(get_module_lang_files(module_globals), [])
+        cached = module_lang_files['the.dude']
+        self.assertEqual(get_module_lang_files(module_globals), [])
+        self.assertIs(module_lang_files['the.dude'], cached)
+
     @patch('lib.l10n_utils.dotlang.translate')
     def test_gettext_works_without_extra_lang_files(self, trans_patch):
         """
@@ -378,6 +435,7 @@ class TestDotlang(TestCase):
         result = _('The %s %s.', 'dude', 'abides')
         eq_(result, 'The dude abides.')
 
+    @patch.dict('lib.l10n_utils.dotlang.catalogs', clear=True)
     @patch('lib.l10n_utils.dotlang.cache')
     def test_translate_skips_for_default_locale(self, cache_mock):
         """
@@ -393,6 +451,39 @@ class TestDotlang(TestCase):
             translate('The Dude abides.', ['main'])
         self.assertEqual(cache_mock.get.call_count, 0)
 
+    @patch.dict('lib.l10n_utils.dotlang.catalogs', clear=True)
+    @patch.object(settings, 'ROOT', ROOT)
+    def test_catalog_memoizes_results(self):
+        """Translating the same string again should not search the lang files."""
+        with self.activate('fr'):
+            result = translate(u'Stuff\xa0about\r\nmany\t   things.',
+                               ['does_not_exist', 'tweaked_message_translation'])
+            eq_(result, u'This is the translation.')
+
+            catalog = get_catalog('fr', ['does_not_exist', 'tweaked_message_translation'])
+            with patch('lib.l10n_utils.dotlang.strip_whitespace') as strip_mock:
+                result = translate(u'Stuff\xa0about\r\nmany\t   things.',
+                                   ['does_not_exist', 'tweaked_message_translation'])
+                eq_(result, u'This is the translation.')
+                ok_(not strip_mock.called)
+
+        eq_(len(catalog.results), 1)
+
+    @patch.dict('lib.l10n_utils.dotlang.catalogs', clear=True)
+    @patch.object(settings, 'ROOT', ROOT)
+    def test_catalog_rebuilt_when_stale(self):
+        catalog = get_catalog('fr', ['main'])
+        ok_(get_catalog('fr', ['main']) is catalog)
+        ok_(get_catalog('de', ['main']) is not catalog)
+        ok_(get_catalog('fr', ['main', 'other']) is not catalog)
+
+        catalog.expires = 0
+        ok_(get_catalog('fr', ['main']) is not catalog)
+
+        catalog = get_catalog('fr', ['main'])
+        with patch.object(settings, 'ROOT', '/some/other/root'):
+            ok_(get_catalog('fr', ['main']) is not catalog)
+
 
 @patch.object(jinja_env.loader, 'searchpath', TEMPLATE_DIRS)
 @patch.object(settings, 'ROOT_URLCONF', 'lib.l10n_utils.tests.test_files.urls')
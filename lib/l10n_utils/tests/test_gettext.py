@@ -39,7 +39,7 @@ class TestTemplateTagFuncs(TestCase):
     def test_cache_hit(self, cache_set_mock, cache_get_mock, template_tags_mock):
         """Should not call other methods on cache hit."""
         cache_get_mock.return_value = set(['active'])
-        self.assertTrue(template_is_active('the/dude', 'de'))
+        self.assertTrue(template_has_tag('the/dude', 'de', 'active'))
         cache_get_mock.assert_called_once_with('template_tag_set:the/dude:de')
         self.assertFalse(template_tags_mock.called)
         self.assertFalse(cache_set_mock.called)
@@ -51,7 +51,7 @@ class TestTemplateTagFuncs(TestCase):
         """Should check the files and set the cache on cache miss."""
         cache_get_mock.return_value = None
         template_tags_mock.return_value = set(['active'])
-        self.assertTrue(template_is_active('the/dude', 'de'))
+        self.assertTrue(template_has_tag('the/dude', 'de', 'active'))
         cache_key = 'template_tag_set:the/dude:de'
         cache_get_mock.assert_called_once_with(cache_key)
         self.assertTrue(template_tags_mock.called)
@@ -72,6 +72,28 @@ class TestTemplateTagFuncs(TestCase):
         self.assertSetEqual(_get_template_tag_set('stuff', 'es'),
                             set(['dude', 'walter', 'donny', 'uli', 'bunny', 'brandt']))
 
+    @patch.dict('lib.l10n_utils.dotlang.activation', clear=True)
+    @patch('lib.l10n_utils.gettext.template_lang_files')
+    @patch('lib.l10n_utils.dotlang.read_lang_file_tags')
+    @override_settings(ROOT=ROOT)
+    def test_template_is_active_matrix(self, read_tags_mock, template_lang_files_mock):
+        """Should read the tags once and then check templates without file access."""
+        read_tags_mock.side_effect = lambda lang, path: (
+            set(['active']) if (lang, path) in [('de', 'main'), ('fr', 'firefox/new')] else set())
+        template_lang_files_mock.return_value = ['the/dude', 'firefox/new']
+        self.assertTrue(template_is_active('the/dude', 'fr'))
+        self.assertFalse(template_is_active('the/dude', 'de'))
+        self.assertFalse(template_is_active('the/dude', 'es-ES'))
+        self.assertFalse(template_is_active('the/dude', 'xx'))
+        self.assertTrue(template_is_active('the/dude', settings.LANGUAGE_CODE))
+        template_lang_files_mock.assert_called_once_with('the/dude')
+        read_tags_count = read_tags_mock.call_count
+
+        template_lang_files_mock.return_value = ['the/dude', 'main']
+        self.assertTrue(template_is_active('walter', 'de'))
+        self.assertFalse(template_is_active('walter', 'fr'))
+        self.assertEqual(read_tags_mock.call_count, read_tags_count)
+
     @override_settings(LANGUAGE_CODE='en-US')
     def test_template_tag_set_default_locale(self):
         """The default language should always have every tag."""
@@ -0,0 +1,51 @@
+# coding: utf-8
+
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from lib.l10n_utils.store import TranslationStore, write_store
+
+
+class TestTranslationStore(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'store')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        items = [('key-%d' % i, 'value-%d' % i) for i in range(500)]
+        items.append(('Überall', 'Партнёры'))
+        items.append(('empty', ''))
+        self.assertEqual(write_store(self.path, items), 502)
+        store = TranslationStore(self.path)
+        for key, value in items:
+            self.assertEqual(store.get(key), value)
+        self.assertIn('empty', store)
+        self.assertNotIn('key-500', store)
+        self.assertIsNone(store.get('key-500'))
+        self.assertEqual(store.get('key-500', 'dude'), 'dude')
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_first_value_wins(self):
+        write_store(self.path, [('dude', 'abides'), ('dude', 'bowls')])
+        self.assertEqual(TranslationStore(self.path).get('dude'), 'abides')
+
+    def test_empty_store(self):
+        write_store(self.path, [])
+        self.assertIsNone(TranslationStore(self.path).get('dude'))
+
+    def test_not_a_store(self):
+        with open(self.path, 'wb') as store_file:
+            store_file.write(b'not a store file')
+        with self.assertRaises(ValueError):
+            TranslationStore(self.path)
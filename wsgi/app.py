@@ -25,6 +25,11 @@ from bedrock.base.static import BedrockWhiteNoise
 from raven.contrib.django.raven_compat.middleware.wsgi import Sentry
 
 application = get_wsgi_application()
+
+# read the lang file tags now instead of during the first request
+from lib.l10n_utils.dotlang import get_activation_matrix
+get_activation_matrix()
+
 application = BedrockWhiteNoise(application)
 application = Sentry(application)
 